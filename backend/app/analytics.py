@@ -0,0 +1,138 @@
+import itertools
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Sized, Tuple
+
+import numpy as np
+
+# Interpolated charts are drawn at 1-second resolution, capped at this many points
+INTERPOLATION_MAX_POINTS = 300
+# Intervals at or below this many seconds get interpolated charts
+INTERPOLATION_MAX_INTERVAL_SECONDS = 5
+
+
+class Series(NamedTuple):
+    """
+    Columnar response time samples. Raw checks have ``count`` 1 and
+    ``total`` equal to the response time; rollups carry their sum and count.
+    """
+    site_id: np.ndarray  # int64
+    ts: np.ndarray       # int64 epoch milliseconds
+    total: np.ndarray    # float64 seconds
+    count: np.ndarray    # float64
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, int, float, float]]) -> "Series":
+        """Builds a series from ``(site_id, ts, total, count)`` rows (tuples or sqlite3.Row)."""
+        data = _columns(rows, 4)
+        return cls(data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2], data[:, 3])
+
+    @classmethod
+    def from_checks(cls, rows: Iterable[Tuple[int, int, float]]) -> "Series":
+        """Builds a series from raw ``(site_id, ts, response_time)`` check rows."""
+        data = _columns(rows, 3)
+        return cls(data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2], np.ones(len(data)))
+
+    @classmethod
+    def concat(cls, *series: "Series") -> "Series":
+        return cls(*(np.concatenate(columns) for columns in zip(*series)))
+
+    def select(self, mask: np.ndarray) -> "Series":
+        return Series(*(column[mask] for column in self))
+
+
+def _columns(rows: Iterable[Sequence[float]], width: int) -> np.ndarray:
+    """Flattens rows of ``width`` numbers into a float64 array in one pass."""
+    size = width * len(rows) if isinstance(rows, Sized) else -1
+    return np.fromiter(itertools.chain.from_iterable(rows), dtype=np.float64, count=size).reshape(-1, width)
+
+
+def bucket_means(series: Series, site_ids: Sequence[int], start_ms: int,
+                 interval_ms: int, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Groups ``series`` into ``buckets`` buckets of ``interval_ms`` starting at
+    ``start_ms``. Returns ``(means, counts)``, each shaped
+    ``(len(site_ids), buckets)``, with NaN means for empty buckets. Samples
+    for other sites or outside the window are ignored.
+    """
+    sites = np.asarray(site_ids, dtype=np.int64)
+    order = np.argsort(sites)
+    position = np.searchsorted(sites[order], series.site_id)
+    position = np.minimum(position, len(sites) - 1)
+    row = order[position]
+    bucket = (series.ts - start_ms) // interval_ms
+
+    valid = (sites[row] == series.site_id) & (bucket >= 0) & (bucket < buckets)
+    flat = row[valid] * buckets + bucket[valid]
+    size = len(sites) * buckets
+    totals = np.bincount(flat, weights=series.total[valid], minlength=size)
+    counts = np.bincount(flat, weights=series.count[valid], minlength=size)
+
+    means = np.full(size, np.nan)
+    np.divide(totals, counts, out=means, where=counts > 0)
+    return means.reshape(len(sites), buckets), counts.reshape(len(sites), buckets)
+
+
+def interpolate(means: np.ndarray, interval_seconds: int, points: int) -> np.ndarray:
+    """
+    Resamples bucket means onto a 1-second grid of ``points`` steps with
+    linear interpolation, holding the first/last value beyond either end.
+    Sites with fewer than two non-empty buckets come back as NaN.
+    """
+    grid = np.arange(points, dtype=np.float64)
+    positions = np.arange(means.shape[1], dtype=np.float64) * interval_seconds
+    result = np.full((means.shape[0], points), np.nan)
+    for row, values in enumerate(means):
+        present = ~np.isnan(values)
+        if np.count_nonzero(present) >= 2:
+            result[row] = np.interp(grid, positions[present], values[present])
+    return result
+
+
+def build_chart(series: Series, site_ids: Sequence[int], start_time: datetime,
+                end_time: datetime, interval_seconds: int) -> List[Dict[str, Any]]:
+    """
+    Chart points for ``/sites/analytics``: per-site mean response time in ms
+    per interval (``site_<id>``) and the mean across sites (``average``).
+    Fine-grained intervals are interpolated to 1-second points.
+    """
+    if not site_ids:
+        return []
+    start_ms = int(start_time.timestamp() * 1000)
+    interval_ms = interval_seconds * 1000
+    span_ms = int((end_time - start_time).total_seconds() * 1000)
+    buckets = span_ms // interval_ms + 1
+
+    means, _ = bucket_means(series, site_ids, start_ms, interval_ms, buckets)
+    values = np.round(means * 1000, 2)  # Convert to ms
+
+    if interval_seconds <= INTERPOLATION_MAX_INTERVAL_SECONDS:
+        points = min(span_ms // 1000 + 1, INTERPOLATION_MAX_POINTS)
+        values = np.round(interpolate(values, interval_seconds, points), 2)
+        step, time_format = 1, "%H:%M:%S"
+        columns = np.arange(points)
+    else:
+        step, time_format = interval_seconds, "%H:%M"
+        # Only buckets where at least one site has data
+        columns = np.flatnonzero(~np.isnan(values).all(axis=0))
+
+    # Mean across sites of the (rounded) per-site values, one pass per chart
+    present = ~np.isnan(values[:, columns])
+    sums = np.where(present, values[:, columns], 0.0).sum(axis=0)
+    counts = present.sum(axis=0)
+    averages = np.round(np.divide(sums, counts, out=np.full(len(columns), np.nan), where=counts > 0), 2)
+
+    keys = [f"site_{site_id}" for site_id in site_ids]
+    chart = []
+    for position, column in enumerate(columns.tolist()):
+        point_time = start_time + timedelta(seconds=column * step)
+        point: Dict[str, Any] = {
+            "timestamp": point_time.strftime(time_format),
+            "full_timestamp": point_time.isoformat(),
+        }
+        for key, value in zip(keys, values[:, column].tolist()):
+            if value == value:  # Skip NaN
+                point[key] = value
+        average = averages[position]
+        point["average"] = None if np.isnan(average) else float(average)
+        chart.append(point)
+    return chart
@@ -0,0 +1,175 @@
+import asyncio
+import itertools
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .analytics import Series
+from .config import settings
+
+# (site_ids, hours, interval_seconds)
+CacheKey = Tuple[Tuple[int, ...], float, int]
+
+# One entity tag in an If-None-Match list, optionally weak, or "*"
+_ENTITY_TAG = re.compile(r'\s*(?:(\*)|(?:W/)?("[^"]*"))?\s*(?:,|$)')
+
+
+def _checked_at_ms(checked_at: str) -> int:
+    return int(datetime.fromisoformat(checked_at).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an ``If-None-Match`` header matches ``etag``: ``*`` or an equal
+    entity tag in its comma-separated list, compared weakly (ignoring ``W/``).
+    A malformed header never matches.
+    """
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    position = 0
+    tags = []
+    while position < len(if_none_match):
+        match = _ENTITY_TAG.match(if_none_match, position)
+        if match is None or match.end() == position:
+            return False
+        tags.append(match.group(1) or match.group(2))  # None for an empty list element
+        position = match.end()
+    return any(tag == "*" or tag == opaque for tag in tags)
+
+
+class AnalyticsEntry:
+    """
+    Cached state of one ``/sites/analytics`` query: the bucketed series of its
+    closed buckets, ``[closed_start_ms, closed_end_ms)``, and the last response
+    with the ETag it was served under. Requests for the same key hold ``lock``
+    so only one of them recomputes at a time.
+    """
+
+    def __init__(self, site_ids: Iterable[int], interval_ms: int, version: int):
+        self.site_ids = frozenset(site_ids)
+        self.interval_ms = interval_ms
+        self.version = version
+        self.lock = asyncio.Lock()
+        self.closed: Optional[Series] = None
+        self.closed_start_ms = 0
+        self.closed_end_ms = 0
+        self.response: Optional[Dict[str, Any]] = None
+        self.response_etag: Optional[str] = None
+
+    def take_closed(self, start_ms: int, open_start_ms: int) -> Tuple[Series, int]:
+        """
+        Returns the cached closed buckets still inside a window starting at
+        ``start_ms`` and the time from which the rest must be loaded. The entry
+        then expects ``store_closed`` with closed buckets up to ``open_start_ms``;
+        checks recorded meanwhile lower that bound again.
+        """
+        if self.closed is not None and self.closed_start_ms <= start_ms < self.closed_end_ms:
+            closed = self.closed.select((self.closed.ts >= start_ms) & (self.closed.ts < self.closed_end_ms))
+            load_from = self.closed_end_ms
+        else:
+            closed = Series.from_rows(())
+            load_from = start_ms
+        self.closed = None
+        self.closed_start_ms = start_ms
+        self.closed_end_ms = open_start_ms
+        return closed, load_from
+
+    def store_closed(self, closed: Series):
+        self.closed = closed
+
+    def changed(self, earliest_ms: int, version: int):
+        """Checks at or after ``earliest_ms`` were recorded for one of the entry's sites."""
+        self.version = version
+        self.closed_end_ms = min(self.closed_end_ms, earliest_ms // self.interval_ms * self.interval_ms)
+
+
+class AnalyticsCache:
+    """
+    LRU cache of analytics queries keyed by (site_ids, hours, interval). Closed
+    buckets are reused from one poll to the next so only the newly closed and
+    the open trailing bucket are loaded; the ingest listener
+    ``on_checks_recorded`` bumps an entry's version, and rewinds its closed
+    range when a late check lands in a bucket that was already cached.
+
+    ETags combine the entry version with the window position, so a poll with a
+    matching ``If-None-Match`` can be answered without touching the database.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = settings.ANALYTICS_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._entries: "OrderedDict[CacheKey, AnalyticsEntry]" = OrderedDict()
+        self._versions = itertools.count(1)
+        self._instance = time.time_ns()  # Keeps ETags from a previous process from matching
+
+        # Statistics
+        self._hits = 0
+        self._not_modified = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def entry(self, key: CacheKey, interval_ms: int) -> AnalyticsEntry:
+        """Returns the entry for ``key``, creating it (and evicting the least recently used) if needed."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.interval_ms == interval_ms:
+            self._entries.move_to_end(key)
+            return entry
+        entry = AnalyticsEntry(key[0], interval_ms, next(self._versions))
+        if self.max_entries > 0:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def etag(self, entry: AnalyticsEntry, start_ms: int, end_ms: int) -> str:
+        open_bucket = end_ms // entry.interval_ms
+        return f'"{self._instance:x}-{entry.version:x}-{start_ms:x}-{open_bucket:x}"'
+
+    def record_hit(self, not_modified: bool):
+        if not_modified:
+            self._not_modified += 1
+        else:
+            self._hits += 1
+
+    def record_miss(self):
+        self._misses += 1
+
+    def on_checks_recorded(self, records: List[Tuple[int, Dict[str, Any]]]):
+        """Ingest listener: marks entries covering the batch's sites as changed."""
+        earliest: Dict[int, int] = {}
+        for site_id, result in records:
+            ts = _checked_at_ms(result["checked_at"])
+            if site_id not in earliest or ts < earliest[site_id]:
+                earliest[site_id] = ts
+        for entry in self._entries.values():
+            touched = [earliest[site_id] for site_id in entry.site_ids.intersection(earliest)]
+            if touched:
+                entry.changed(min(touched), next(self._versions))
+
+    def invalidate(self):
+        """Drops every entry, e.g. after history was deleted."""
+        self._entries.clear()
+        self._invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "not_modified": self._not_modified,
+            "misses": self._misses,
+            "invalidations": self._invalidations,
+        }
+
+
+# --- Singleton Pattern ---
+_analytics_cache_instance: Optional[AnalyticsCache] = None
+
+def get_analytics_cache() -> AnalyticsCache:
+    """Returns the shared AnalyticsCache instance."""
+    global _analytics_cache_instance
+    if _analytics_cache_instance is None:
+        _analytics_cache_instance = AnalyticsCache()
+    return _analytics_cache_instance
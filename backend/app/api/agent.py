@@ -9,8 +9,9 @@ import logging
 from datetime import datetime
 
 from ..config import Settings, get_settings
-from ..database import record_check, get_sites, get_agent_by_hash, update_agent_status, add_agent, get_agents, delete_agent
+from ..database import get_sites, get_agent_by_hash, update_agent_status, add_agent, get_agents, delete_agent
 from ..monitor import get_monitor
+from ..ingest import get_ingest_queue, utc_timestamp
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -122,31 +123,32 @@ async def submit_check_results(
     api_key: str = Depends(authenticate_agent)
 ):
     """Submit check results from agent."""
-    submitted_count = 0
+    records = []
     errors = []
     
     for result in results:
         try:
-            # Use current time if not provided
-            checked_at = result.checked_at or datetime.utcnow().isoformat()
-            
-            await record_check(
-                site_id=result.site_id,
-                status=result.status,
-                response_time=result.response_time,
-                status_code=result.status_code,
-                error_message=result.error_message
-            )
-            submitted_count += 1
-            logger.debug(f"Recorded check result for site {result.site_id}: {result.status}")
-            
-        except Exception as e:
-            error_msg = f"Failed to record check for site {result.site_id}: {str(e)}"
+            # Keep the agent's check time; the ingest queue uses now if it's missing
+            checked_at = utc_timestamp(result.checked_at)
+        except ValueError as e:
+            error_msg = f"Failed to record check for site {result.site_id}: invalid checked_at ({e})"
             errors.append(error_msg)
             logger.error(error_msg)
+            continue
+        records.append((result.site_id, {
+            "status": result.status,
+            "response_time": result.response_time,
+            "status_code": result.status_code,
+            "error_message": result.error_message,
+            "checked_at": checked_at,
+        }))
+    
+    # Enqueued results are written in batches by the ingest queue
+    await get_ingest_queue().put_many(records)
+    logger.debug(f"Queued {len(records)} check results from agent")
     
     response = {
-        "submitted": submitted_count,
+        "submitted": len(records),
         "total": len(results)
     }
     
@@ -224,13 +226,13 @@ async def handle_agent_message(websocket: WebSocket, agent_id: str, message: dic
         # Handle check result submission
         try:
             result = AgentCheckResult(**data)
-            await record_check(
-                site_id=result.site_id,
-                status=result.status,
-                response_time=result.response_time,
-                status_code=result.status_code,
-                error_message=result.error_message
-            )
+            await get_ingest_queue().put(result.site_id, {
+                "status": result.status,
+                "response_time": result.response_time,
+                "status_code": result.status_code,
+                "error_message": result.error_message,
+                "checked_at": utc_timestamp(result.checked_at),
+            })
             
             # Send acknowledgment
             await websocket.send_text(json.dumps({
@@ -1,20 +1,32 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional
+from datetime import datetime
 from ..models import SiteCreate, SiteStatus, SiteCheck, MonitorStats
 from ..database import (
-    add_site, get_sites, get_site_status, get_site_history, 
-    delete_site as db_delete_site, DATABASE_PATH,
-    add_agent, get_agents, delete_agent
+    add_site, get_site, get_sites, get_site_history, get_phase_timings,
+    delete_site as db_delete_site, get_database, get_rollups, get_check_buckets, get_latency_sketches,
+    add_agent, get_agents, delete_agent, add_slo, get_slos, get_slo, delete_slo as db_delete_slo
 )
 from ..monitor import get_monitor
+from ..resolver import get_resolver
+from ..ingest import get_ingest_queue
+from ..retention import get_retention
+from ..content import validate_assertion
+from ..rollups import LATENCY_QUANTILES, pick_resolution, summarize_latency
+from ..sketch import DDSketch
+from ..analytics import Series, build_chart
+from ..analytics_cache import AnalyticsEntry, etag_matches, get_analytics_cache
+from ..slo import SLO_KINDS, get_slo_tracker
+from ..security import get_security_inventory
+from ..events import get_event_broker
+from ..live_state import get_live_state
+from ..jobs import get_check_jobs
 from ..config import Settings, get_settings
-import aiosqlite
-import ssl
-import socket
-from urllib.parse import urlparse
 from pydantic import BaseModel, constr, validator
 import re
 import hashlib
+import time
 
 router = APIRouter()
 ph = PasswordHasher()
@@ -24,6 +36,33 @@ class SiteCreate(BaseModel):
     url: str
     name: constr(min_length=1)
     scan_interval: str
+    force_cold_connection: bool = False
+    check_method: str = "GET"
+    max_body_bytes: Optional[int] = None
+    assertion_is_regex: bool = False
+    content_assertion: Optional[str] = None
+
+    @validator('check_method')
+    def validate_check_method(cls, v):
+        v = v.strip().upper()
+        if v not in ('GET', 'HEAD'):
+            raise ValueError("check_method must be 'GET' or 'HEAD'.")
+        return v
+
+    @validator('max_body_bytes')
+    def validate_max_body_bytes(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("max_body_bytes must be positive.")
+        return v
+
+    @validator('content_assertion')
+    def validate_content_assertion(cls, v, values, **kwargs):
+        if v is None:
+            return v
+        if values.get('check_method') == 'HEAD':
+            raise ValueError("Content assertions need a GET check; HEAD checks don't read a body.")
+        validate_assertion(v, values.get('assertion_is_regex', False))
+        return v
 
     @validator('scan_interval')
     def validate_scan_interval(cls, v, values, **kwargs):
@@ -54,9 +93,38 @@ class SiteCreate(BaseModel):
         
         return v
 
+class SloCreate(BaseModel):
+    site_id: int
+    name: constr(min_length=1)
+    kind: str = "availability"                 # 'availability' or 'latency'
+    objective: float                           # Target fraction of good checks, e.g. 0.999
+    latency_threshold: Optional[float] = None  # Latency SLOs: seconds a good check responds within
+
+    @validator('kind')
+    def validate_kind(cls, v):
+        v = v.strip().lower()
+        if v not in SLO_KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(SLO_KINDS)}.")
+        return v
+
+    @validator('objective')
+    def validate_objective(cls, v):
+        if not 0 < v < 1:
+            raise ValueError("objective must be between 0 and 1 (exclusive), e.g. 0.999.")
+        return v
+
+    @validator('latency_threshold')
+    def validate_latency_threshold(cls, v):
+        if v is not None and v <= 0:
+            raise ValueError("latency_threshold must be positive.")
+        return v
+
 class ManualCheckRequest(BaseModel):
     site_ids: Optional[List[int]] = None
 
+class WorkerScaleRequest(BaseModel):
+    count: int
+
 class AgentCreate(BaseModel):
     name: constr(min_length=1)
     api_key: constr(min_length=64)
@@ -72,10 +140,14 @@ class AgentCreate(BaseModel):
 async def create_site(site: SiteCreate):
     """Add a new site to monitor."""
     try:
-        site_id = await add_site(str(site.url), site.name, site.scan_interval)
-        # Refresh monitoring to pick up the new site
-        from ..monitor import monitor
-        await monitor.refresh_monitoring()
+        site_id = await add_site(
+            str(site.url), site.name, site.scan_interval, site.force_cold_connection,
+            site.check_method, site.max_body_bytes, site.content_assertion, site.assertion_is_regex
+        )
+        # Start monitoring the new site without disturbing the rest of the schedule
+        site_row = await get_site(site_id)
+        get_monitor().track_site(site_row, immediate=True)
+        get_live_state().site_added(site_row)
         return {"id": site_id, "message": "Site added successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -90,89 +162,211 @@ async def list_sites():
 @router.get("/sites/status", response_model=List[dict])
 async def get_sites_status():
     """Get current status of all sites being monitored with security information."""
-    sites_status = await get_site_status()
-    
-    # Enhance each site with security information
-    enhanced_sites = []
-    for site in sites_status:
-        # Detect if this is an agent (check if URL uses port 8081 or has agent-like characteristics)
-        url = site.get('url', '')
-        is_agent = (
-            ':8081' in url or 
-            'agent' in url.lower() or 
-            site.get('name', '').lower().startswith('agent')
-        )
-        
+    # Served from the in-memory live state, pre-serialised
+    return Response(content=get_live_state().status_json(), media_type="application/json")
+
+@router.get("/events")
+async def stream_events(site_ids: Optional[str] = None):  # Comma-separated IDs; all sites if omitted
+    """
+    Stream live dashboard updates as server-sent events: the latest check of
+    each site, status transitions and the stats summary, coalesced per client.
+    """
+    selected = None
+    if site_ids:
         try:
-            if is_agent:
-                # Get agent-specific security info
-                security_info = await get_agent_security_info(url)
-            else:
-                # Get regular site security info
-                security_info = await get_site_security_info(url)
-            
-            # Merge security info with site data
-            enhanced_site = {**site, **security_info}
-            enhanced_sites.append(enhanced_site)
-            
-        except Exception as e:
-            print(f"Failed to get security info for {url}: {e}")
-            # Add default security info on error
-            enhanced_site = {
-                **site,
-                'connection_type': 'agent' if is_agent else 'resource',
-                'protocol': 'unknown',
-                'is_encrypted': False,
-                'connection_status': 'error'
-            }
-            enhanced_sites.append(enhanced_site)
-    
-    return enhanced_sites
+            selected = {int(site_id) for site_id in site_ids.split(',') if site_id.strip()}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="site_ids must be comma-separated integers")
+    return StreamingResponse(
+        get_event_broker().stream(selected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/sites/certificates", response_model=List[dict])
+async def get_site_certificates():
+    """Get certificate expiry of every site, soonest first, as captured by its checks."""
+    return get_security_inventory().certificates(await get_sites())
 
 @router.get("/sites/{site_id}/history", response_model=List[dict])
-async def get_site_check_history(site_id: int, limit: int = 100):
-    """Get check history for a specific site."""
+async def get_site_check_history(
+    site_id: int,
+    limit: int = 100,
+    bucket_seconds: Optional[int] = None,  # Aggregate checks into buckets of this many seconds
+    hours: float = 24                       # Window for bucketed history
+):
+    """
+    Get check history for a specific site, optionally aggregated per time bucket.
+    Buckets are aligned to multiples of ``bucket_seconds``, so the window starts
+    up to one bucket earlier than ``hours`` ago and boundaries don't shift between polls.
+    """
     if limit > 1000:
         limit = 1000
-    return await get_site_history(site_id, limit)
+    if bucket_seconds is None:
+        return await get_site_history(site_id, limit)
+    if bucket_seconds < 1:
+        raise HTTPException(status_code=400, detail="bucket_seconds must be at least 1")
+    if hours <= 0:
+        raise HTTPException(status_code=400, detail="hours must be positive")
+    bucket_ms = bucket_seconds * 1000
+    end = int(time.time() * 1000)
+    start = (end - int(hours * 3600 * 1000)) // bucket_ms * bucket_ms
+    return await get_site_history(site_id, limit, bucket_ms=bucket_ms, start=start, end=end)
 
 @router.delete("/sites/{site_id}", response_model=dict)
 async def delete_site(site_id: int):
     """Delete a site and stop monitoring it."""
     try:
         await db_delete_site(site_id)
-        # Refresh monitoring to stop monitoring the deleted site
-        from ..monitor import monitor
-        await monitor.refresh_monitoring()
+        get_analytics_cache().invalidate()
+        get_slo_tracker().remove_site(site_id)
+        get_security_inventory().forget(site_id)
+        get_live_state().site_removed(site_id)
+        # Stop monitoring only the deleted site
+        get_monitor().untrack_site(site_id)
         return {"message": "Site deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.post("/check/manual", response_model=dict)
-async def manual_check(request: ManualCheckRequest):
-    """Manually trigger a check of specified sites, or all sites if none are specified."""
-    try:
-        monitor = get_monitor()
-        # If site_ids is None, check_sites_by_id will check all sites
-        results = await monitor.check_sites_by_id(request.site_ids)
-        return {"message": f"Checked {len(results)} sites", "results": results}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@router.post("/check/manual", response_model=dict, status_code=202)
+async def manual_check(request: Optional[ManualCheckRequest] = None):
+    """
+    Start a check job for the specified sites, or all sites if none are
+    specified. Returns the job at once; poll it or stream its events.
+    """
+    site_ids = request.site_ids if request is not None else None
+    job = get_check_jobs().submit(site_ids)
+    if not job.site_ids and job.missing:
+        raise HTTPException(status_code=404, detail="None of the sites are monitored")
+    return job.summary()
+
+@router.get("/check/jobs", response_model=List[dict])
+async def get_check_jobs_list():
+    """Get recent manual check jobs, newest first."""
+    return get_check_jobs().recent()
+
+@router.get("/check/jobs/{job_id}", response_model=dict)
+async def get_check_job(job_id: str):
+    """Get a manual check job and the results it has so far."""
+    job = get_check_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Check job not found")
+    return job.to_dict()
+
+@router.get("/check/jobs/{job_id}/events")
+async def stream_check_job(job_id: str):
+    """Stream a manual check job's results as server-sent events as each site completes."""
+    job = get_check_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Check job not found")
+    return StreamingResponse(
+        get_check_jobs().stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/stats", response_model=dict)
 async def get_monitoring_stats():
     """Get monitoring statistics."""
     try:
-        stats = await get_monitor().get_stats()
-        return {
-            "total_sites": stats["total_sites"],
-            "sites_up": stats["sites_up"],
-            "sites_down": stats["sites_down"],
-            "average_response_time": stats["average_response_time"],
-        }
+        return Response(content=await get_live_state().stats_json(), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/stats/scheduler", response_model=dict)
+async def get_scheduler_stats():
+    """Get check scheduler lateness and drift statistics."""
+    return get_monitor().get_scheduler_stats()
+
+@router.get("/stats/executor", response_model=dict)
+async def get_executor_stats():
+    """Get check executor queue depth and wait time statistics."""
+    return get_monitor().get_executor_stats()
+
+@router.get("/stats/workers", response_model=dict)
+async def get_worker_stats():
+    """Get sharded check worker statistics."""
+    return get_monitor().get_worker_stats()
+
+@router.put("/workers", response_model=dict)
+async def scale_workers(request: WorkerScaleRequest):
+    """Change the number of check worker processes; sites are rebalanced onto them."""
+    try:
+        get_monitor().scale_workers(request.count)
+        return {"message": f"Scaled check workers to {max(1, request.count)}"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/stats/dns", response_model=dict)
+async def get_dns_stats():
+    """Get shared DNS resolver cache statistics."""
+    return get_resolver().stats()
+
+@router.get("/stats/ingest", response_model=dict)
+async def get_ingest_stats():
+    """Get check result ingest queue depth and flush statistics."""
+    return get_ingest_queue().stats()
+
+@router.get("/stats/slo", response_model=dict)
+async def get_slo_stats(site_id: Optional[int] = None):
+    """Get error budgets and multi-window burn rates of all SLOs (or one site's)."""
+    return get_slo_tracker().evaluate(site_id)
+
+@router.get("/slos", response_model=List[dict])
+async def list_slos():
+    """List service level objectives."""
+    return await get_slos()
+
+@router.post("/slos", response_model=dict)
+async def create_slo(slo: SloCreate):
+    """Add a service level objective for a site."""
+    if slo.kind == "latency" and slo.latency_threshold is None:
+        raise HTTPException(status_code=400, detail="Latency SLOs need a latency_threshold (seconds).")
+    if not await get_site(slo.site_id):
+        raise HTTPException(status_code=404, detail="Site not found")
+    threshold = slo.latency_threshold if slo.kind == "latency" else None
+    slo_id = await add_slo(slo.site_id, slo.name, slo.kind, slo.objective, threshold)
+    await get_slo_tracker().add(await get_slo(slo_id))
+    return {"id": slo_id, "message": "SLO added successfully"}
+
+@router.delete("/slos/{slo_id}", response_model=dict)
+async def delete_slo(slo_id: int):
+    """Delete a service level objective."""
+    if not await db_delete_slo(slo_id):
+        raise HTTPException(status_code=404, detail="SLO not found")
+    get_slo_tracker().remove(slo_id)
+    return {"message": "SLO deleted successfully"}
+
+@router.get("/stats/analytics-cache", response_model=dict)
+async def get_analytics_cache_stats():
+    """Get analytics response cache statistics."""
+    return get_analytics_cache().stats()
+
+@router.get("/stats/security", response_model=dict)
+async def get_security_inventory_stats():
+    """Get background security inventory statistics."""
+    return get_security_inventory().stats()
+
+@router.get("/stats/live-state", response_model=dict)
+async def get_live_state_stats():
+    """Get in-memory live state statistics."""
+    return get_live_state().stats()
+
+@router.get("/stats/events", response_model=dict)
+async def get_event_stats():
+    """Get live event stream subscriber statistics."""
+    return get_event_broker().stats()
+
+@router.get("/stats/check-jobs", response_model=dict)
+async def get_check_job_stats():
+    """Get manual check job and deduplication statistics."""
+    return get_check_jobs().stats()
+
+@router.get("/stats/retention", response_model=dict)
+async def get_retention_stats():
+    """Get the retention policy and the rows and bytes reclaimed so far."""
+    return get_retention().stats()
+
 @router.get("/config")
 async def get_app_config(settings: Settings = Depends(get_settings)):
     return {
@@ -184,13 +378,144 @@ async def get_app_config(settings: Settings = Depends(get_settings)):
         }
     }
 
+async def _load_analytics_series(site_ids: List[int], resolution: Optional[int],
+                                 start_ms: int, end_ms: int, interval_ms: int) -> Series:
+    """Response time sums and counts per bucket, from rollups or, without a fitting resolution, raw checks."""
+    if resolution is None:
+        # Raw checks, aggregated per chart interval by SQLite
+        buckets = await get_check_buckets(site_ids, start_ms, end_ms, interval_ms)
+        return Series.from_rows(
+            (bucket['site_id'], bucket['bucket'], bucket['rt_sum'], bucket['rt_count'])
+            for bucket in buckets if bucket['rt_count']
+        )
+    rollups = await get_rollups(site_ids, resolution, start_ms // 1000, end_ms // 1000)
+    return Series.from_rows(
+        (rollup['site_id'], rollup['bucket'] * 1000, rollup['rt_sum'], rollup['rt_count'])
+        for rollup in rollups if rollup['rt_count']
+    )
+
+def _time_range(start_time: datetime, end_time: datetime, hours: float) -> dict:
+    """The ``time_range`` of an analytics response: the window actually served and the hours asked for."""
+    return {
+        "start": start_time.isoformat(),
+        "end": end_time.isoformat(),
+        "hours": hours
+    }
+
+async def _build_sites_analytics(entry: AnalyticsEntry, selected_site_ids: List[int], resolution: Optional[int],
+                                 start_time: datetime, end_time: datetime, interval_seconds: int,
+                                 hours: float) -> dict:
+    """Computes the analytics response, loading only the buckets ``entry`` doesn't hold yet."""
+    # Range filters and bucketing work on integer epoch milliseconds
+    start_ms = int(start_time.timestamp() * 1000)
+    end_ms = int(end_time.timestamp() * 1000)
+    interval_ms = interval_seconds * 1000
+    
+    # Get site information for the selected sites
+    async with get_database().read() as db:
+        
+        # Get detailed site information including latest status
+        placeholders = ','.join(['?' for _ in selected_site_ids])
+        sites_cursor = await db.execute(f"""
+            SELECT 
+                s.id,
+                s.name,
+                s.url,
+                s.scan_interval,
+                l.status,
+                l.response_time,
+                l.status_code,
+                l.error_message,
+                l.checked_at
+            FROM sites s
+            LEFT JOIN site_latest l ON l.site_id = s.id
+            WHERE s.id IN ({placeholders})
+            ORDER BY s.name
+        """, selected_site_ids)
+        
+        sites_rows = await sites_cursor.fetchall()
+        sites_info = {}
+        
+        # Parse URLs to extract hostname and IP info
+        from urllib.parse import urlparse
+        import socket
+        
+        for row in sites_rows:
+            site_data = dict(row)
+            
+            # Parse URL to get hostname
+            try:
+                parsed_url = urlparse(site_data['url'])
+                hostname = parsed_url.hostname or parsed_url.netloc
+                
+                # Resolve IP address through the shared, cached resolver
+                ip_address = await get_resolver().resolve_first(hostname, family=socket.AF_INET) if hostname else None
+                    
+            except Exception:
+                hostname = site_data['url']
+                ip_address = None
+            
+            sites_info[site_data['id']] = {
+                'name': site_data['name'],
+                'url': site_data['url'],
+                'hostname': hostname,
+                'ip_address': ip_address,
+                'last_status': site_data['status'],
+                'last_response_time': site_data['response_time'],
+                'last_status_code': site_data['status_code'],
+                'last_checked_at': site_data['checked_at'],
+                'scan_interval': site_data['scan_interval']
+            }
+    
+    # Average DNS/connect/TLS/TTFB/transfer timings over the window
+    phase_timings = await get_phase_timings(selected_site_ids, start_ms, end_ms)
+    # Tail latency over the window, merged from rollup sketches
+    latency_sketches = await get_latency_sketches(selected_site_ids, start_ms / 1000, end_ms / 1000)
+    
+    # Reuse the cached closed buckets, load the rest (columnar) and build the chart points
+    open_start_ms = end_ms // interval_ms * interval_ms
+    closed, load_from = entry.take_closed(start_ms, open_start_ms)
+    loaded = await _load_analytics_series(selected_site_ids, resolution, load_from, end_ms, interval_ms)
+    newly_closed = loaded.ts < open_start_ms
+    closed = Series.concat(closed, loaded.select(newly_closed))
+    entry.store_closed(closed)
+    series = Series.concat(closed, loaded.select(~newly_closed))
+    chart_data = build_chart(series, selected_site_ids, start_time, end_time, interval_seconds)
+    
+    return {
+        "data": chart_data,
+        "sites": [
+            {
+                "id": site_id, 
+                "name": sites_info.get(site_id, {}).get('name', f'Site {site_id}'),
+                "url": sites_info.get(site_id, {}).get('url'),
+                "hostname": sites_info.get(site_id, {}).get('hostname'),
+                "ip_address": sites_info.get(site_id, {}).get('ip_address'),
+                "last_status": sites_info.get(site_id, {}).get('last_status'),
+                "last_response_time": sites_info.get(site_id, {}).get('last_response_time'),
+                "last_status_code": sites_info.get(site_id, {}).get('last_status_code'),
+                "last_checked_at": sites_info.get(site_id, {}).get('last_checked_at'),
+                "scan_interval": sites_info.get(site_id, {}).get('scan_interval'),
+                "phase_timings": phase_timings.get(site_id),
+                "latency_percentiles": summarize_latency(latency_sketches.get(site_id, DDSketch()))
+            }
+            for site_id in selected_site_ids
+        ],
+        "time_range": _time_range(start_time, end_time, hours)
+    }
+
 @router.get("/sites/analytics", response_model=dict)
 async def get_sites_analytics(
+    request: Request,
     site_ids: str = None,  # Comma-separated site IDs, or "all" for all sites
     hours: float = 1,        # Number of hours back to fetch data (supports fractions)
     interval_minutes: float = 5  # Data point interval in minutes (supports fractions)
 ):
-    """Get historical response time data for charting."""
+    """
+    Get historical response time data for charting. The window start is aligned
+    down to an interval boundary, so it can begin up to one interval earlier
+    than ``hours`` ago; ``time_range`` reports the window actually served.
+    """
     try:
         from datetime import datetime, timedelta, timezone
         import json
@@ -220,232 +545,77 @@ async def get_sites_analytics(
         else:
             interval_seconds = int(interval_minutes * 60)  # Convert minutes to seconds
         
-        # Get site information for the selected sites
-        async with aiosqlite.connect(DATABASE_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            
-            # Get detailed site information including latest status
-            placeholders = ','.join(['?' for _ in selected_site_ids])
-            sites_cursor = await db.execute(f"""
-                SELECT 
-                    s.id,
-                    s.name,
-                    s.url,
-                    s.scan_interval,
-                    sc.status,
-                    sc.response_time,
-                    sc.status_code,
-                    sc.error_message,
-                    sc.checked_at
-                FROM sites s
-                LEFT JOIN site_checks sc ON s.id = sc.site_id
-                WHERE s.id IN ({placeholders})
-                  AND (sc.checked_at = (
-                      SELECT MAX(checked_at) 
-                      FROM site_checks 
-                      WHERE site_id = s.id
-                  ) OR sc.checked_at IS NULL)
-                ORDER BY s.name
-            """, selected_site_ids)
-            
-            sites_rows = await sites_cursor.fetchall()
-            sites_info = {}
-            
-            # Parse URLs to extract hostname and IP info
-            from urllib.parse import urlparse
-            import socket
+        # Serve the history from the coarsest rollup that tiles the interval;
+        # otherwise (sub-minute intervals) bucket raw checks
+        resolution = pick_resolution(interval_seconds)
+        
+        # Align the window to interval boundaries so closed buckets can be cached and reused
+        aligned_start = int(start_time.timestamp()) // interval_seconds * interval_seconds
+        start_time = datetime.fromtimestamp(aligned_start, tz=timezone.utc)
+        
+        # Repeated polls are answered from the cache until checks arrive for these sites
+        cache = get_analytics_cache()
+        entry = cache.entry((tuple(selected_site_ids), hours, interval_seconds), interval_seconds * 1000)
+        async with entry.lock:
+            etag = cache.etag(entry, int(start_time.timestamp() * 1000), int(end_time.timestamp() * 1000))
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                cache.record_hit(not_modified=True)
+                return Response(status_code=304, headers=headers)
+            if entry.response_etag == etag:
+                cache.record_hit(not_modified=False)
+                # Same data, but the window end moves with every poll
+                response = dict(entry.response, time_range=_time_range(start_time, end_time, hours))
+                return JSONResponse(response, headers=headers)
             
-            for row in sites_rows:
-                site_data = dict(row)
-                
-                # Parse URL to get hostname
-                try:
-                    parsed_url = urlparse(site_data['url'])
-                    hostname = parsed_url.hostname or parsed_url.netloc
-                    
-                    # Try to resolve IP address
-                    try:
-                        ip_address = socket.gethostbyname(hostname) if hostname else None
-                    except (socket.gaierror, socket.error):
-                        ip_address = None
-                        
-                except Exception:
-                    hostname = site_data['url']
-                    ip_address = None
-                
-                sites_info[site_data['id']] = {
-                    'name': site_data['name'],
-                    'url': site_data['url'],
-                    'hostname': hostname,
-                    'ip_address': ip_address,
-                    'last_status': site_data['status'],
-                    'last_response_time': site_data['response_time'],
-                    'last_status_code': site_data['status_code'],
-                    'last_checked_at': site_data['checked_at'],
-                    'scan_interval': site_data['scan_interval']
-                }
-            
-            # Get historical data
-            data_cursor = await db.execute("""
-                SELECT 
-                    site_id,
-                    response_time,
-                    status,
-                    checked_at,
-                    datetime(checked_at) as timestamp
-                FROM site_checks 
-                WHERE site_id IN ({}) 
-                  AND datetime(checked_at) >= datetime(?) 
-                  AND datetime(checked_at) <= datetime(?)
-                  AND response_time IS NOT NULL
-                ORDER BY checked_at ASC
-            """.format(placeholders), selected_site_ids + [start_time.isoformat(), end_time.isoformat()])
-            
-            checks = await data_cursor.fetchall()
-            
-        # Group data by time intervals
-        from collections import defaultdict
-        import math
-        
-        # Create time buckets
-        time_buckets = defaultdict(lambda: defaultdict(list))
-        
-        for check in checks:
-            # Parse timestamp and ensure it's timezone-aware
-            timestamp_str = check['timestamp']
-            try:
-                check_time = datetime.fromisoformat(timestamp_str)
-                # If no timezone info, assume UTC (which SQLite uses)
-                if check_time.tzinfo is None:
-                    check_time = check_time.replace(tzinfo=timezone.utc)
-            except ValueError:
-                # Handle different timestamp formats
-                check_time = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-            
-            # Round to nearest interval
-            bucket_timestamp = start_time + timedelta(
-                seconds=math.floor((check_time - start_time).total_seconds() / interval_seconds) * interval_seconds
+            cache.record_miss()
+            result = await _build_sites_analytics(
+                entry, selected_site_ids, resolution, start_time, end_time, interval_seconds, hours
             )
-            bucket_key = bucket_timestamp.isoformat()
-            
-            if check['response_time'] is not None and check['status'] == 'up':
-                time_buckets[bucket_key][check['site_id']].append(check['response_time'])
-        
-        # Format data for chart with interpolation
-        chart_data = []
-        current_time = start_time
-        
-        # First pass: collect actual data points
-        actual_data_points = {}
-        while current_time <= end_time:
-            bucket_key = current_time.isoformat()
-            data_point = {
-                "timestamp": current_time.strftime("%H:%M"),
-                "full_timestamp": current_time.isoformat()
-            }
-            
-            # Add actual response times for each site
-            has_data = False
-            for site_id in selected_site_ids:
-                response_times = time_buckets.get(bucket_key, {}).get(site_id, [])
-                
-                if response_times:
-                    avg_response_time = sum(response_times) / len(response_times)
-                    data_point[f"site_{site_id}"] = round(avg_response_time * 1000, 2)  # Convert to ms
-                    has_data = True
-                    # Store for interpolation
-                    if site_id not in actual_data_points:
-                        actual_data_points[site_id] = []
-                    actual_data_points[site_id].append((current_time, avg_response_time * 1000))
-            
-            if has_data:
-                chart_data.append(data_point)
-            
-            current_time += timedelta(seconds=interval_seconds)
-        
-        # Interpolate missing data points for smooth charts
-        if interval_seconds <= 5:  # Only interpolate for very fine-grained time ranges
-            interpolated_data = []
-            current_time = start_time
-            
-            while current_time <= end_time:
-                data_point = {
-                    "timestamp": current_time.strftime("%H:%M:%S") if interval_seconds <= 60 else current_time.strftime("%H:%M"),
-                    "full_timestamp": current_time.isoformat()
-                }
-                
-                for site_id in selected_site_ids:
-                    if site_id in actual_data_points and len(actual_data_points[site_id]) >= 2:
-                        # Find surrounding data points for interpolation
-                        site_points = actual_data_points[site_id]
-                        
-                        # Find the two closest points
-                        before = None
-                        after = None
-                        for i, (point_time, value) in enumerate(site_points):
-                            if point_time <= current_time:
-                                before = (point_time, value)
-                            if point_time >= current_time and after is None:
-                                after = (point_time, value)
-                                break
-                        
-                        # Interpolate value
-                        if before and after and before[0] != after[0]:
-                            # Linear interpolation
-                            time_diff = (after[0] - before[0]).total_seconds()
-                            current_diff = (current_time - before[0]).total_seconds()
-                            ratio = current_diff / time_diff
-                            interpolated_value = before[1] + (after[1] - before[1]) * ratio
-                            data_point[f"site_{site_id}"] = round(interpolated_value, 2)
-                        elif before:
-                            # Use last known value
-                            data_point[f"site_{site_id}"] = before[1]
-                        elif after:
-                            # Use next known value
-                            data_point[f"site_{site_id}"] = after[1]
-                
-                interpolated_data.append(data_point)
-                current_time += timedelta(seconds=1)  # 1-second resolution for smooth display
-            
-            chart_data = interpolated_data[:300]  # Limit to 300 points for performance
-        
-        # Calculate overall average for all sites combined
-        if len(selected_site_ids) >= 1:
-            for point in chart_data:
-                site_values = [point.get(f"site_{site_id}") for site_id in selected_site_ids 
-                              if point.get(f"site_{site_id}") is not None]
-                if site_values:
-                    point["average"] = round(sum(site_values) / len(site_values), 2)
-                else:
-                    point["average"] = None
-        
-        return {
-            "data": chart_data,
-            "sites": [
-                {
-                    "id": site_id, 
-                    "name": sites_info.get(site_id, {}).get('name', f'Site {site_id}'),
-                    "url": sites_info.get(site_id, {}).get('url'),
-                    "hostname": sites_info.get(site_id, {}).get('hostname'),
-                    "ip_address": sites_info.get(site_id, {}).get('ip_address'),
-                    "last_status": sites_info.get(site_id, {}).get('last_status'),
-                    "last_response_time": sites_info.get(site_id, {}).get('last_response_time'),
-                    "last_status_code": sites_info.get(site_id, {}).get('last_status_code'),
-                    "last_checked_at": sites_info.get(site_id, {}).get('last_checked_at'),
-                    "scan_interval": sites_info.get(site_id, {}).get('scan_interval')
-                }
-                for site_id in selected_site_ids
-            ],
-            "time_range": {
-                "start": start_time.isoformat(),
-                "end": end_time.isoformat(),
-                "hours": hours
-            }
-        }
+            entry.response, entry.response_etag = result, etag
+            return JSONResponse(result, headers=headers)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/sites/percentiles", response_model=dict)
+async def get_sites_percentiles(
+    site_ids: str = None,   # Comma-separated site IDs, or "all" for all sites
+    hours: float = 1,       # Window in hours back from now (supports fractions)
+    quantiles: str = None   # Comma-separated quantiles, default "0.5,0.95,0.99"
+):
+    """Get response time percentiles (seconds) per site and overall, merged from rollup sketches."""
+    try:
+        selected = None
+        if site_ids and site_ids.lower() != "all":
+            selected = [int(sid.strip()) for sid in site_ids.split(",")]
+        requested = [float(q) for q in quantiles.split(",")] if quantiles else list(LATENCY_QUANTILES)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not all(0 <= q <= 1 for q in requested):
+        raise HTTPException(status_code=400, detail="Quantiles must be between 0 and 1")
+
+    from datetime import datetime, timedelta, timezone
+
+    end_time = datetime.now(timezone.utc)
+    start_time = end_time - timedelta(hours=hours)
+    sketches = await get_latency_sketches(selected, start_time.timestamp(), end_time.timestamp())
+    overall = DDSketch()
+    for sketch in sketches.values():
+        overall.merge(sketch)
+    return {
+        "sites": [
+            {"id": site_id, **summarize_latency(sketches.get(site_id, DDSketch()), requested)}
+            for site_id in (selected if selected is not None else sorted(sketches))
+        ],
+        "overall": summarize_latency(overall, requested),
+        "time_range": {
+            "start": start_time.isoformat(),
+            "end": end_time.isoformat(),
+            "hours": hours
+        }
+    }
+
 @router.post("/agents/{site_id}/refresh-security", response_model=dict)
 async def refresh_agent_security(site_id: int):
     """Manually refresh security information for a specific agent."""
@@ -457,17 +627,7 @@ async def refresh_agent_security(site_id: int):
         if not site:
             raise HTTPException(status_code=404, detail="Agent not found")
         
-        url = site['url']
-        is_agent = (
-            ':8081' in url or 
-            'agent' in url.lower() or 
-            site.get('name', '').lower().startswith('agent')
-        )
-        
-        if is_agent:
-            security_info = await get_agent_security_info(url)
-        else:
-            security_info = await get_site_security_info(url)
+        security_info = await get_security_inventory().refresh(site)
         
         return {
             "message": "Security information refreshed successfully",
@@ -475,184 +635,11 @@ async def refresh_agent_security(site_id: int):
             "security_info": security_info
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_site_security_info(url: str) -> dict:
-    """Get SSL/TLS security information for a site."""
-    try:
-        parsed_url = urlparse(url)
-        hostname = parsed_url.hostname
-        port = parsed_url.port or (443 if parsed_url.scheme == 'https' else 80)
-        
-        security_info = {
-            'protocol': parsed_url.scheme,
-            'is_encrypted': parsed_url.scheme in ['https', 'wss'],
-            'hostname': hostname,
-            'port': port,
-            'tls_version': None,
-            'cipher_suite': None,
-            'key_strength': None,
-            'http_version': None
-        }
-        
-        if security_info['is_encrypted'] and hostname:
-            try:
-                # Create SSL context
-                context = ssl.create_default_context()
-                
-                # Connect to get SSL info
-                with socket.create_connection((hostname, port), timeout=5) as sock:
-                    with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                        # Get SSL information
-                        security_info.update({
-                            'tls_version': ssock.version(),
-                            'cipher_suite': ssock.cipher()[0] if ssock.cipher() else None,
-                            'key_strength': ssock.cipher()[2] if ssock.cipher() else None,
-                        })
-                        
-                        # Detect HTTP version (basic detection)
-                        if parsed_url.scheme == 'https':
-                            try:
-                                import httpx
-                                async with httpx.AsyncClient(timeout=5) as client:
-                                    response = await client.get(url)
-                                    security_info['http_version'] = f"HTTP/{response.http_version}"
-                            except:
-                                security_info['http_version'] = 'HTTP/1.1'  # fallback
-                        
-            except Exception as e:
-                print(f"Failed to get security info for {url}: {e}")
-        
-        return security_info
-        
-    except Exception as e:
-        print(f"Error parsing URL {url}: {e}")
-        return {
-            'protocol': 'unknown',
-            'is_encrypted': False,
-            'hostname': url,
-            'port': None,
-            'tls_version': None,
-            'cipher_suite': None,
-            'key_strength': None,
-            'http_version': None
-        }
-
-async def get_agent_security_info(url: str, agent_port: str = "8081") -> dict:
-    """Get security information for agent connections with fallback protocol detection."""
-    try:
-        parsed_url = urlparse(url)
-        hostname = parsed_url.hostname or parsed_url.netloc
-        
-        security_info = {
-            'connection_type': 'agent',
-            'agent_port': agent_port,
-            'hostname': hostname,
-            'ip_address': None,
-            'protocol': None,
-            'is_encrypted': False,
-            'tls_version': None,
-            'cipher_suite': None,
-            'key_strength': None,
-            'http_version': None,
-            'connection_status': 'disconnected',
-            'fallback_used': False
-        }
-        
-        # Try to resolve IP address
-        try:
-            if hostname:
-                security_info['ip_address'] = socket.gethostbyname(hostname)
-        except (socket.gaierror, socket.error):
-            pass
-        
-        # Try WSS first (WebSocket Secure)
-        try:
-            wss_url = f"wss://{hostname}:{agent_port}/agent/ws"
-            context = ssl.create_default_context()
-            
-            with socket.create_connection((hostname, int(agent_port)), timeout=5) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    security_info.update({
-                        'protocol': 'wss',
-                        'is_encrypted': True,
-                        'tls_version': ssock.version(),
-                        'cipher_suite': ssock.cipher()[0] if ssock.cipher() else None,
-                        'key_strength': ssock.cipher()[2] if ssock.cipher() else None,
-                        'connection_status': 'connected',
-                        'fallback_used': False
-                    })
-                    return security_info
-        except Exception as e:
-            print(f"WSS connection failed for agent {hostname}:{agent_port}: {e}")
-        
-        # Fallback to HTTPS with HTTP/2 detection
-        try:
-            https_url = f"https://{hostname}:{agent_port}/api/sites"
-            context = ssl.create_default_context()
-            
-            with socket.create_connection((hostname, int(agent_port)), timeout=5) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    # Try to detect HTTP version
-                    try:
-                        import httpx
-                        async with httpx.AsyncClient(timeout=5, http2=True) as client:
-                            response = await client.get(https_url)
-                            http_version = f"HTTP/{response.http_version}"
-                    except:
-                        http_version = "HTTP/1.1"  # fallback
-                    
-                    security_info.update({
-                        'protocol': 'https',
-                        'is_encrypted': True,
-                        'tls_version': ssock.version(),
-                        'cipher_suite': ssock.cipher()[0] if ssock.cipher() else None,
-                        'key_strength': ssock.cipher()[2] if ssock.cipher() else None,
-                        'http_version': http_version,
-                        'connection_status': 'connected',
-                        'fallback_used': True
-                    })
-                    return security_info
-        except Exception as e:
-            print(f"HTTPS fallback failed for agent {hostname}:{agent_port}: {e}")
-        
-        # Final fallback to HTTP/1.1
-        try:
-            http_url = f"http://{hostname}:{agent_port}/api/sites"
-            import httpx
-            async with httpx.AsyncClient(timeout=5) as client:
-                response = await client.get(http_url)
-                security_info.update({
-                    'protocol': 'http',
-                    'is_encrypted': False,
-                    'http_version': "HTTP/1.1",
-                    'connection_status': 'connected',
-                    'fallback_used': True
-                })
-        except Exception as e:
-            print(f"HTTP fallback failed for agent {hostname}:{agent_port}: {e}")
-            security_info['connection_status'] = 'failed'
-        
-        return security_info
-        
-    except Exception as e:
-        print(f"Error getting agent security info for {url}: {e}")
-        return {
-            'connection_type': 'agent',
-            'agent_port': agent_port,
-            'hostname': url,
-            'ip_address': None,
-            'protocol': 'unknown',
-            'is_encrypted': False,
-            'tls_version': None,
-            'cipher_suite': None,
-            'key_strength': None,
-            'http_version': None,
-            'connection_status': 'error',
-            'fallback_used': False
-        }
-
 # Agent Management Endpoints
 
 @router.get("/agents", response_model=List[dict])
@@ -6,11 +6,108 @@ class Settings(BaseSettings):
     """
     # Path for the SQLite database
     DATABASE_PATH: str = "siteup.db"
+
+    # SQLite connection manager: one writer plus a pool of read-only connections
+    # in WAL mode. DB_CACHE_SIZE_KIB is per connection; DB_MMAP_SIZE_BYTES=0 disables mmap
+    DB_READER_POOL_SIZE: int = 4
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_CACHE_SIZE_KIB: int = 16384
+    DB_MMAP_SIZE_BYTES: int = 268435456
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_CACHED_STATEMENTS: int = 256
     
     # Scan interval settings
     MIN_SCAN_INTERVAL_SECONDS: int = 30
     MAX_SCAN_INTERVAL_SECONDS: int = 3600
     DEVELOPMENT_MODE: bool = False
+
+    # Scheduler: sites are spread deterministically over min(interval, this window)
+    SCHEDULER_SPREAD_SECONDS: float = 60.0
+
+    # Shared HTTP client used for site checks
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 200
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 100
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 120.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 4
+    # Response bytes read per check unless a site sets its own cap
+    HTTP_MAX_BODY_BYTES: int = 1048576
+    # Longest regex content assertion match guaranteed across chunk boundaries
+    HTTP_ASSERTION_WINDOW_BYTES: int = 4096
+
+    # Check executor: global in-flight cap and per-IP politeness cap
+    # (the per-host cap is HTTP_MAX_CONNECTIONS_PER_HOST)
+    CHECK_MAX_CONCURRENCY: int = 256
+    CHECK_MAX_PER_IP: int = 8
+
+    # Sharded check workers: 0 runs checks in the API process, N > 0 starts N
+    # worker processes and partitions sites across them by site ID
+    CHECK_WORKERS: int = 0
+    CHECK_WORKER_BATCH_SIZE: int = 500
+
+    # Write-behind ingest queue for check results: producers block once
+    # INGEST_QUEUE_MAX_SIZE results are waiting; the writer commits a batch
+    # every INGEST_BATCH_SIZE results or INGEST_FLUSH_INTERVAL_SECONDS
+    INGEST_QUEUE_MAX_SIZE: int = 10000
+    INGEST_BATCH_SIZE: int = 500
+    INGEST_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+    # Retention, in days (0 keeps forever). Raw checks are pruned once the
+    # rollups hold them; each rollup resolution has its own horizon
+    RETENTION_RAW_DAYS: float = 7
+    RETENTION_1M_ROLLUP_DAYS: float = 14
+    RETENTION_5M_ROLLUP_DAYS: float = 90
+    RETENTION_1H_ROLLUP_DAYS: float = 0
+    RETENTION_1D_ROLLUP_DAYS: float = 0
+    # Enforcement runs every RETENTION_INTERVAL_SECONDS, deleting in batches of
+    # RETENTION_BATCH_SIZE rows with a pause between them so ingest isn't starved
+    RETENTION_INTERVAL_SECONDS: float = 3600.0
+    RETENTION_BATCH_SIZE: int = 5000
+    RETENTION_BATCH_PAUSE_SECONDS: float = 0.05
+    RETENTION_VACUUM_PAGES: int = 1000  # Free pages returned to the OS per step
+
+    # SLO error budgets are measured over this rolling window
+    SLO_WINDOW_DAYS: float = 30
+
+    # Cached /sites/analytics queries (0 disables the cache)
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 64
+
+    # Background TLS/security probes of agents: entries are re-probed after the
+    # TTL (the shorter error TTL after a failed probe), checked every interval
+    SECURITY_INVENTORY_TTL_SECONDS: float = 3600.0
+    SECURITY_INVENTORY_ERROR_TTL_SECONDS: float = 300.0
+    SECURITY_INVENTORY_INTERVAL_SECONDS: float = 60.0
+    SECURITY_PROBE_CONCURRENCY: int = 20
+    SECURITY_PROBE_TIMEOUT_SECONDS: float = 5.0
+    # Certificates expiring within this many days are flagged as expiring
+    CERT_EXPIRY_WARNING_DAYS: float = 14
+
+    # Dashboard event stream (/events): minimum spacing between updates sent to
+    # one client (updates in between are coalesced), idle heartbeat, client
+    # reconnect delay, and status transitions buffered before a client resyncs
+    LIVE_MIN_INTERVAL_SECONDS: float = 1.0
+    LIVE_HEARTBEAT_SECONDS: float = 15.0
+    LIVE_RETRY_SECONDS: float = 5.0
+    LIVE_MAX_PENDING_TRANSITIONS: int = 256
+    # /stats response time percentiles (from the rollups) are reused for this long
+    LIVE_STATS_PERCENTILES_TTL_SECONDS: float = 30.0
+
+    # Finished manual check jobs kept for polling
+    CHECK_JOBS_MAX_RETAINED: int = 100
+
+    # Ping checks: echoes per probe, spacing between them and per-echo timeout
+    PING_COUNT: int = 3
+    PING_INTERVAL_SECONDS: float = 0.2
+    PING_TIMEOUT_SECONDS: float = 4.0
+
+    # Shared DNS resolver cache
+    DNS_TIMEOUT_SECONDS: float = 5.0
+    DNS_DEFAULT_TTL_SECONDS: float = 300.0  # Used when record TTLs are unknown (no aiodns)
+    DNS_MIN_TTL_SECONDS: float = 5.0
+    DNS_MAX_TTL_SECONDS: float = 3600.0
+    DNS_NEGATIVE_TTL_SECONDS: float = 30.0
+    DNS_CACHE_MAX_ENTRIES: int = 10000
     
     # Logging level
     LOG_LEVEL: str = "INFO"
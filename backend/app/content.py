@@ -0,0 +1,54 @@
+import re
+from functools import lru_cache
+from typing import Optional, Pattern
+
+
+@lru_cache(maxsize=1024)
+def _compile(pattern: str) -> Pattern[bytes]:
+    return re.compile(pattern.encode())
+
+
+class StreamMatcher:
+    """
+    Incrementally matches a keyword or regex against a body that arrives in
+    chunks, keeping only a bounded tail of previous data so matches that
+    straddle chunk boundaries are still found.
+
+    Keywords are found wherever they occur. Regex matches are found as long as
+    they fit within ``window`` bytes.
+    """
+
+    def __init__(self, assertion: str, is_regex: bool = False, window: int = 4096):
+        self.matched = False
+        if is_regex:
+            self._regex: Optional[Pattern[bytes]] = _compile(assertion)
+            self._keyword = None
+            self._keep = window
+        else:
+            self._regex = None
+            self._keyword = assertion.encode()
+            self._keep = max(len(self._keyword) - 1, 0)
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> bool:
+        """Feeds the next chunk. Returns True once the assertion has matched."""
+        if self.matched or not chunk:
+            return self.matched
+        data = self._tail + chunk
+        if self._regex is not None:
+            self.matched = self._regex.search(data) is not None
+        else:
+            self.matched = self._keyword in data
+        self._tail = data[-self._keep:] if self._keep else b""
+        return self.matched
+
+
+def validate_assertion(assertion: str, is_regex: bool) -> None:
+    """Raises ValueError if ``assertion`` is not usable."""
+    if not assertion:
+        raise ValueError("Content assertion must not be empty")
+    if is_regex:
+        try:
+            _compile(assertion)
+        except re.error as e:
+            raise ValueError(f"Invalid content assertion regex: {e}")
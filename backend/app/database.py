@@ -1,32 +1,234 @@
 import aiosqlite
 import asyncio
-from typing import List, Dict, Any
-from datetime import datetime
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
 from .config import settings
+from .rollups import RESOLUTIONS, ROLLUP_COLUMNS, RollupBucket, RollupKey, accumulate, bucket_start, cover_window
+from .sketch import DDSketch
+
+logger = logging.getLogger(__name__)
 
 DATABASE_PATH = settings.DATABASE_PATH
 
+# Optional site_checks result columns, in insert order, beyond site_id and status
+CHECK_RESULT_COLUMNS = (
+    "response_time",
+    "status_code",
+    "error_message",
+    "packet_loss",
+    "jitter",
+    "dns_time",
+    "connect_time",
+    "tls_time",
+    "ttfb",
+    "transfer_time",
+    "body_bytes",
+)
+
+# Per-phase timing columns reported as averages by get_phase_timings
+PHASE_TIMING_COLUMNS = ("dns_time", "connect_time", "tls_time", "ttfb", "transfer_time")
+
+# site_security columns: TLS details captured from a check's own connection
+# (security.connection_security), kept for each site's latest handshake
+SECURITY_COLUMNS = (
+    "tls_version",
+    "cipher_suite",
+    "key_strength",
+    "alpn_protocol",
+    "http_version",
+    "certificate_subject",
+    "certificate_issuer",
+    "certificate_expires_at",
+)
+
+# Per-bucket aggregates returned by build_bucket_query; response time stats only cover up checks
+BUCKET_COLUMNS = ("site_id", "bucket", "count", "up_count", "rt_count", "rt_sum", "rt_avg", "rt_min", "rt_max")
+
+# SQL for checked_at as epoch milliseconds, for rows that predate the ts column
+_CHECKED_AT_MS = "CAST(strftime('%s', checked_at) AS INTEGER) * 1000"
+
+_ts_backfill_task: Optional[asyncio.Task] = None
+
+
+class Database:
+    """
+    Long-lived SQLite connections: a single writer serialised by a lock and a
+    pool of read-only connections, all in WAL mode so readers never block on
+    the writer. Each connection keeps its prepared statement cache
+    (``DB_CACHED_STATEMENTS``) for its whole lifetime. Connections are opened
+    lazily on first use and closed by ``close``.
+    """
+
+    def __init__(self, path: str, readers: int):
+        self.path = path
+        self._reader_count = max(1, readers)
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self._writes_held = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def open(self):
+        async with self._open_lock:
+            if self.is_open:
+                return
+            writer = await self._connect(self.path)
+            # Must precede anything that writes the file header (such as switching to
+            # WAL), so it only applies to new databases; existing ones need a one-off
+            # VACUUM (`python -m backend.app.retention vacuum`)
+            await writer.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # WAL is persistent in the database file; set it before any reader attaches
+            async with writer.execute("PRAGMA journal_mode=WAL") as cursor:
+                mode = (await cursor.fetchone())[0]
+            if mode.lower() != "wal":
+                logger.warning(f"SQLite journal mode is {mode}, not WAL; reads may block on writes")
+
+            self._idle = asyncio.Queue()
+            if self.path == ":memory:":
+                # A private in-memory database can't be shared: read through the writer
+                self._readers = []
+            else:
+                uri = f"{Path(self.path).resolve().as_uri()}?mode=ro"
+                self._readers = [await self._connect(uri, uri=True) for _ in range(self._reader_count)]
+            for reader in self._readers:
+                self._idle.put_nowait(reader)
+            self._writer = writer
+            logger.info(f"Opened database {self.path} with 1 writer and {len(self._readers)} readers")
+
+    async def close(self):
+        async with self._open_lock:
+            if not self.is_open:
+                return
+            async with self._write_lock:
+                for connection in self._readers:
+                    await connection.close()
+                await self._writer.close()
+            self._writer = None
+            self._readers = []
+            self._idle = None
+            logger.info("Database connections closed.")
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrows a read-only connection from the pool."""
+        if not self.is_open:
+            await self.open()
+        if not self._readers:
+            if self._writes_held:
+                yield self._writer  # hold_writes already keeps everyone else off it
+                return
+            async with self.write() as db:
+                yield db
+            return
+        idle = self._idle
+        connection = await idle.get()
+        try:
+            yield connection
+        finally:
+            idle.put_nowait(connection)
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Holds the writer for one transaction: commits when the block exits
+        normally and rolls back if it raises.
+        """
+        if not self.is_open:
+            await self.open()
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            await self._writer.commit()
+
+    @asynccontextmanager
+    async def hold_writes(self) -> AsyncIterator[None]:
+        """
+        Keeps writers out while the block runs; reads still work. As ingest
+        listeners run right after their batch commits, every batch committed
+        before the block has been seen by them, and none commits during it.
+        """
+        if not self.is_open:
+            await self.open()
+        async with self._write_lock:
+            self._writes_held = True
+            try:
+                yield
+            finally:
+                self._writes_held = False
+
+    @staticmethod
+    async def _connect(database: str, uri: bool = False) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(
+            database, uri=uri, cached_statements=settings.DB_CACHED_STATEMENTS
+        )
+        connection.row_factory = aiosqlite.Row
+        await connection.execute(f"PRAGMA busy_timeout={int(settings.DB_BUSY_TIMEOUT_MS)}")
+        await connection.execute(f"PRAGMA synchronous={settings.DB_SYNCHRONOUS}")
+        await connection.execute(f"PRAGMA cache_size=-{int(settings.DB_CACHE_SIZE_KIB)}")
+        await connection.execute(f"PRAGMA mmap_size={int(settings.DB_MMAP_SIZE_BYTES)}")
+        await connection.execute("PRAGMA temp_store=MEMORY")
+        return connection
+
+
+# --- Singleton Pattern ---
+_database_instance: Optional[Database] = None
+
+def get_database() -> Database:
+    """Returns the shared Database instance."""
+    global _database_instance
+    if _database_instance is None:
+        _database_instance = Database(DATABASE_PATH, settings.DB_READER_POOL_SIZE)
+    return _database_instance
+
+async def close_database():
+    """Closes the shared database connections (at shutdown)."""
+    if _ts_backfill_task is not None and not _ts_backfill_task.done():
+        _ts_backfill_task.cancel()
+        try:
+            await _ts_backfill_task
+        except asyncio.CancelledError:
+            pass
+    if _database_instance is not None:
+        await _database_instance.close()
+
 async def init_database():
     """Initialize the SQLite database and create tables if they don't exist."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with get_database().write() as db:
         await db.execute("""
             CREATE TABLE IF NOT EXISTS sites (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 url TEXT UNIQUE NOT NULL,
                 name TEXT NOT NULL,
                 scan_interval TEXT DEFAULT '60s',
+                force_cold_connection INTEGER DEFAULT 0,  -- 1 = never reuse pooled connections
+                check_method TEXT DEFAULT 'GET',          -- 'GET' or 'HEAD'
+                max_body_bytes INTEGER,                   -- NULL = HTTP_MAX_BODY_BYTES
+                content_assertion TEXT,                   -- keyword or regex the body must contain
+                assertion_is_regex INTEGER DEFAULT 0,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
         
-        # Check if scan_interval column exists and add it if not (for migration)
-        cursor = await db.execute("PRAGMA table_info(sites)")
-        columns = await cursor.fetchall()
-        column_names = [column[1] for column in columns]
-        
-        if 'scan_interval' not in column_names:
-            await db.execute("ALTER TABLE sites ADD COLUMN scan_interval TEXT DEFAULT '60s'")
-            print("Added scan_interval column to existing sites table")
+        # Add columns introduced after the initial schema (for migration)
+        await _add_missing_columns(db, "sites", {
+            "scan_interval": "TEXT DEFAULT '60s'",
+            "force_cold_connection": "INTEGER DEFAULT 0",
+            "check_method": "TEXT DEFAULT 'GET'",
+            "max_body_bytes": "INTEGER",
+            "content_assertion": "TEXT",
+            "assertion_is_regex": "INTEGER DEFAULT 0",
+        })
         
         await db.execute("""
             CREATE TABLE IF NOT EXISTS site_checks (
@@ -36,7 +238,119 @@ async def init_database():
                 response_time REAL,    -- in seconds
                 status_code INTEGER,
                 error_message TEXT,
+                packet_loss REAL,      -- ping checks: fraction of probes lost
+                jitter REAL,           -- ping checks: mean RTT variation in seconds
+                dns_time REAL,         -- DNS lookup time in seconds, NULL if served from cache
+                connect_time REAL,     -- TCP connect in seconds, NULL on a reused connection
+                tls_time REAL,         -- TLS handshake in seconds, NULL on a reused connection
+                ttfb REAL,             -- request sent to response headers received, in seconds
+                transfer_time REAL,    -- response body transfer in seconds
+                body_bytes INTEGER,    -- response bytes read (capped by max_body_bytes)
                 checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ts INTEGER,            -- checked_at as epoch milliseconds (UTC), used for range queries
+                FOREIGN KEY (site_id) REFERENCES sites (id)
+            )
+        """)
+        
+        await _add_missing_columns(db, "site_checks", {
+            "packet_loss": "REAL",
+            "jitter": "REAL",
+            "dns_time": "REAL",
+            "connect_time": "REAL",
+            "tls_time": "REAL",
+            "ttfb": "REAL",
+            "transfer_time": "REAL",
+            "body_bytes": "INTEGER",
+            "ts": "INTEGER",
+        })
+        
+        await db.execute("DROP INDEX IF EXISTS idx_site_checks_site_checked")
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_site_checks_site_ts
+            ON site_checks (site_id, ts)
+        """)
+        # Rows still waiting for the ts backfill; stays empty once it completes
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_site_checks_ts_missing
+            ON site_checks (id) WHERE ts IS NULL
+        """)
+        
+        # Latest check and counters per site, maintained by record_checks so the
+        # status views never have to scan site_checks
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS site_latest (
+                site_id INTEGER PRIMARY KEY,
+                status TEXT NOT NULL,
+                checked_at TIMESTAMP NOT NULL,
+                response_time REAL,
+                status_code INTEGER,
+                error_message TEXT,
+                packet_loss REAL,
+                jitter REAL,
+                dns_time REAL,
+                connect_time REAL,
+                tls_time REAL,
+                ttfb REAL,
+                transfer_time REAL,
+                body_bytes INTEGER,
+                total_up INTEGER NOT NULL DEFAULT 0,
+                total_down INTEGER NOT NULL DEFAULT 0,
+                last_change_at TIMESTAMP,  -- first check with the current status
+                FOREIGN KEY (site_id) REFERENCES sites (id)
+            )
+        """)
+        await _backfill_site_latest(db)
+        
+        # Latest TLS handshake details per site, captured by HTTPS checks and
+        # maintained by record_checks
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS site_security (
+                site_id INTEGER PRIMARY KEY,
+                checked_at TIMESTAMP NOT NULL,
+                tls_version TEXT,
+                cipher_suite TEXT,
+                key_strength INTEGER,
+                alpn_protocol TEXT,
+                http_version TEXT,
+                certificate_subject TEXT,
+                certificate_issuer TEXT,
+                certificate_expires_at TEXT,  -- ISO 8601, UTC
+                FOREIGN KEY (site_id) REFERENCES sites (id)
+            )
+        """)
+        
+        # Per-site aggregates at each rollups.RESOLUTIONS bucket width, maintained
+        # by record_checks (rebuild with `python -m backend.app.rollups rebuild`)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS site_rollups (
+                site_id INTEGER NOT NULL,
+                resolution INTEGER NOT NULL,  -- bucket width in seconds
+                bucket INTEGER NOT NULL,      -- bucket start, epoch seconds (UTC)
+                count INTEGER NOT NULL,       -- all checks
+                up_count INTEGER NOT NULL,
+                rt_count INTEGER NOT NULL,    -- up checks with a response time
+                rt_sum REAL NOT NULL,
+                rt_min REAL,
+                rt_max REAL,
+                sketch BLOB,                  -- DDSketch of those response times
+                PRIMARY KEY (site_id, resolution, bucket)
+            ) WITHOUT ROWID
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_site_rollups_resolution_bucket
+            ON site_rollups (resolution, bucket)
+        """)
+        
+        # Service level objectives, evaluated in memory by slo.SloTracker
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS site_slos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                site_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,        -- 'availability' or 'latency'
+                objective REAL NOT NULL,   -- target fraction of good checks, e.g. 0.999
+                latency_threshold REAL,    -- latency SLOs: seconds a good check responds within
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (site_id) REFERENCES sites (id)
             )
         """)
@@ -52,41 +366,407 @@ async def init_database():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        
-        await db.commit()
+    
+    # Online migration: fill ts for rows written before it existed
+    async with get_database().read() as db:
+        async with db.execute("SELECT 1 FROM site_checks WHERE ts IS NULL LIMIT 1") as cursor:
+            needs_backfill = await cursor.fetchone() is not None
+    global _ts_backfill_task
+    if needs_backfill and (_ts_backfill_task is None or _ts_backfill_task.done()):
+        _ts_backfill_task = asyncio.create_task(backfill_check_timestamps())
 
-async def add_site(url: str, name: str, scan_interval: str = "60s") -> int:
+async def backfill_check_timestamps(batch_size: int = 5000, pause: float = 0.05) -> int:
+    """
+    Fill site_checks.ts from checked_at in small batches, newest rows first so
+    recent history becomes queryable by ts soonest. Returns the rows updated.
+    """
+    updated = 0
+    logger.info("Backfilling site_checks.ts from checked_at...")
+    while True:
+        async with get_database().write() as db:
+            cursor = await db.execute(f"""
+                UPDATE site_checks SET ts = {_CHECKED_AT_MS}
+                WHERE id IN (SELECT id FROM site_checks WHERE ts IS NULL ORDER BY id DESC LIMIT ?)
+            """, (batch_size,))
+            count = cursor.rowcount
+        updated += count
+        if count < batch_size:
+            break
+        await asyncio.sleep(pause)
+    logger.info(f"Backfilled ts for {updated} checks.")
+    return updated
+
+async def _backfill_site_latest(db: aiosqlite.Connection):
+    """Populate site_latest for sites that have check history but no row yet (for migration)."""
+    async with db.execute("""
+        SELECT 1 FROM sites s
+        WHERE NOT EXISTS (SELECT 1 FROM site_latest WHERE site_id = s.id)
+          AND EXISTS (SELECT 1 FROM site_checks WHERE site_id = s.id)
+        LIMIT 1
+    """) as cursor:
+        if await cursor.fetchone() is None:
+            return
+    columns = ", ".join(CHECK_RESULT_COLUMNS)
+    cursor = await db.execute(f"""
+        INSERT INTO site_latest (site_id, status, checked_at, {columns}, total_up, total_down)
+        SELECT sc.site_id, sc.status, sc.checked_at, {", ".join(f"sc.{c}" for c in CHECK_RESULT_COLUMNS)},
+               counts.total_up, counts.total_down
+        FROM (
+            SELECT site_id,
+                   SUM(status = 'up') AS total_up,
+                   SUM(status = 'down') AS total_down,
+                   (SELECT id FROM site_checks latest
+                    WHERE latest.site_id = grouped.site_id
+                    ORDER BY checked_at DESC, id DESC LIMIT 1) AS latest_id
+            FROM site_checks grouped
+            WHERE site_id NOT IN (SELECT site_id FROM site_latest)
+            GROUP BY site_id
+        ) counts
+        JOIN site_checks sc ON sc.id = counts.latest_id
+    """)
+    if cursor.rowcount > 0:
+        # The current status began right after the last check with a different one
+        await db.execute("""
+            UPDATE site_latest
+            SET last_change_at = (
+                SELECT MIN(checked_at) FROM site_checks sc
+                WHERE sc.site_id = site_latest.site_id
+                  AND sc.checked_at > COALESCE((
+                      SELECT MAX(checked_at) FROM site_checks other
+                      WHERE other.site_id = site_latest.site_id AND other.status != site_latest.status
+                  ), '')
+            )
+            WHERE last_change_at IS NULL
+        """)
+        print(f"Backfilled site_latest for {cursor.rowcount} sites")
+
+async def _add_missing_columns(db: aiosqlite.Connection, table: str, columns: Dict[str, str]):
+    """Add any of the given columns that an existing table doesn't have yet."""
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    existing = {column[1] for column in await cursor.fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            print(f"Added {name} column to existing {table} table")
+
+async def add_site(url: str, name: str, scan_interval: str = "60s",
+                   force_cold_connection: bool = False, check_method: str = "GET",
+                   max_body_bytes: int = None, content_assertion: str = None,
+                   assertion_is_regex: bool = False) -> int:
     """Add a new site to monitor."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with get_database().write() as db:
         cursor = await db.execute(
-            "INSERT INTO sites (url, name, scan_interval) VALUES (?, ?, ?)",
-            (url, name, scan_interval)
+            """INSERT INTO sites (url, name, scan_interval, force_cold_connection, check_method,
+                                  max_body_bytes, content_assertion, assertion_is_regex)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (url, name, scan_interval, int(force_cold_connection), check_method,
+             max_body_bytes, content_assertion, int(assertion_is_regex))
         )
-        await db.commit()
         return cursor.lastrowid
 
 async def get_sites() -> List[Dict[str, Any]]:
     """Get all sites being monitored."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with get_database().read() as db:
         cursor = await db.execute("SELECT * FROM sites ORDER BY name")
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
-async def record_check(site_id: int, status: str, response_time: float = None, 
-                      status_code: int = None, error_message: str = None):
-    """Record a site check result."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
-            INSERT INTO site_checks (site_id, status, response_time, status_code, error_message)
-            VALUES (?, ?, ?, ?, ?)
-        """, (site_id, status, response_time, status_code, error_message))
+async def get_site(site_id: int) -> Dict[str, Any]:
+    """Get a single site by ID."""
+    async with get_database().read() as db:
+        # Close the cursor so the pooled connection doesn't keep a read snapshot open
+        async with db.execute("SELECT * FROM sites WHERE id = ?", (site_id,)) as cursor:
+            row = await cursor.fetchone()
+        return dict(row) if row else None
+
+async def record_check(site_id: int, status: str, **fields):
+    """
+    Record a site check result. Any of CHECK_RESULT_COLUMNS may be passed as
+    keyword arguments; missing ones are stored as NULL.
+    """
+    await record_checks([(site_id, {"status": status, **fields})])
+
+async def record_checks(records: List[Tuple[int, Dict[str, Any]]]):
+    """Record a batch of ``(site_id, result)`` check results in one transaction."""
+    if not records:
+        return
+    columns = ("site_id", "status", "checked_at", "ts") + CHECK_RESULT_COLUMNS
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    rows = []
+    for site_id, result in records:
+        checked_at = result.get("checked_at") or now
+        rows.append((site_id, result["status"], checked_at, _epoch_ms(checked_at))
+                    + tuple(result.get(column) for column in CHECK_RESULT_COLUMNS))
+    async with get_database().write() as db:
+        await db.executemany(
+            f"INSERT INTO site_checks ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            rows
+        )
+        # site_latest takes the same values minus ts, plus counters and change time
+        await db.executemany(_SITE_LATEST_UPSERT, [
+            row[:3] + row[4:] + (int(row[1] == 'up'), int(row[1] == 'down'), row[2]) for row in rows
+        ])
+        await _merge_rollups(db, accumulate(
+            (site_id, status, ts / 1000, response_time)
+            for site_id, status, _, ts, response_time, *_ in rows
+        ))
+        security_rows = [
+            (site_id, row[2]) + tuple(result["security"].get(column) for column in SECURITY_COLUMNS)
+            for (site_id, result), row in zip(records, rows) if result.get("security")
+        ]
+        if security_rows:
+            await db.executemany(_SITE_SECURITY_UPSERT, security_rows)
+
+def _epoch_ms(timestamp: str) -> int:
+    """Epoch milliseconds of a UTC ``YYYY-MM-DD HH:MM:SS`` timestamp as stored in checked_at."""
+    return int(datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+async def _merge_rollups(db: aiosqlite.Connection, buckets: Dict[RollupKey, RollupBucket]):
+    """Merge freshly aggregated buckets into site_rollups."""
+    keys = list(buckets)
+    chunk = 300  # 3 parameters per key stays under SQLite's variable limit
+    for start in range(0, len(keys), chunk):
+        part = keys[start:start + chunk]
+        values = ", ".join("(?, ?, ?)" for _ in part)
+        async with db.execute(f"""
+            SELECT site_id, resolution, bucket, {', '.join(ROLLUP_COLUMNS)}
+            FROM site_rollups
+            WHERE (site_id, resolution, bucket) IN (VALUES {values})
+        """, [value for key in part for value in key]) as cursor:
+            for row in await cursor.fetchall():
+                existing = RollupBucket.from_row(tuple(row)[3:])
+                existing.merge(buckets[tuple(row)[:3]])
+                buckets[tuple(row)[:3]] = existing
+    columns = ("site_id", "resolution", "bucket") + ROLLUP_COLUMNS
+    await db.executemany(
+        f"INSERT OR REPLACE INTO site_rollups ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        [key + bucket.to_row() for key, bucket in buckets.items()]
+    )
+
+async def rebuild_rollups(site_ids: Optional[List[int]] = None, chunk_size: int = 50000) -> int:
+    """
+    Recompute site_rollups from site_checks (all sites, or just ``site_ids``).
+    Only buckets the remaining raw checks fully cover are rebuilt: for each
+    site and resolution, rollups from the bucket holding the site's oldest raw
+    check on are replaced, except that a bucket which already exists there is
+    kept, as it may count checks retention has pruned since. Older rollups are
+    never touched, so rebuilding after pruning keeps the long-term history.
+    Checks ingested while this runs are rolled up by record_checks as usual.
+    Returns the number of checks processed.
+    """
+    site_filter = f"site_id IN ({', '.join('?' for _ in site_ids)})" if site_ids else "1"
+    params = list(site_ids or [])
+    rebuild_from: Dict[Tuple[int, int], int] = {}  # (site_id, resolution) -> first rebuilt bucket
+    async with get_database().write() as db:
+        async with db.execute(f"""
+            SELECT site_id, MIN(COALESCE(ts, {_CHECKED_AT_MS})) AS oldest
+            FROM site_checks WHERE {site_filter} GROUP BY site_id
+        """, params) as cursor:
+            oldest = {row['site_id']: row['oldest'] / 1000 for row in await cursor.fetchall()}
+        for site_id, oldest_seconds in oldest.items():
+            for resolution in RESOLUTIONS:
+                first = bucket_start(oldest_seconds, resolution)
+                async with db.execute(
+                    "SELECT 1 FROM site_rollups WHERE site_id = ? AND resolution = ? AND bucket = ?",
+                    (site_id, resolution, first)
+                ) as cursor:
+                    if await cursor.fetchone() is not None and first < oldest_seconds:
+                        first += resolution  # Starts before the oldest raw check; keep it
+                rebuild_from[(site_id, resolution)] = first
+        await db.executemany(
+            "DELETE FROM site_rollups WHERE site_id = ? AND resolution = ? AND bucket >= ?",
+            [key + (first,) for key, first in rebuild_from.items()]
+        )
+        async with db.execute("SELECT COALESCE(MAX(id), 0) FROM site_checks") as cursor:
+            last_id = (await cursor.fetchone())[0]
+
+    processed = 0
+    after_id = 0
+    while after_id < last_id:
+        async with get_database().read() as db:
+            cursor = await db.execute(f"""
+                SELECT id, site_id, status, COALESCE(ts, {_CHECKED_AT_MS}) AS ts, response_time
+                FROM site_checks
+                WHERE id > ? AND id <= ? AND {site_filter}
+                ORDER BY id
+                LIMIT ?
+            """, [after_id, last_id] + params + [chunk_size])
+            rows = await cursor.fetchall()
+        if not rows:
+            break
+        after_id = rows[-1]['id']
+        processed += len(rows)
+        buckets = accumulate(
+            (row['site_id'], row['status'], row['ts'] / 1000, row['response_time'])
+            for row in rows
+        )
+        buckets = {
+            key: bucket for key, bucket in buckets.items()
+            if key[2] >= rebuild_from.get(key[:2], key[2])
+        }
+        async with get_database().write() as db:
+            await _merge_rollups(db, buckets)
+    return processed
+
+async def get_rollups(site_ids: List[int], resolution: int, start: float, end: float,
+                      with_sketch: bool = False) -> List[Dict[str, Any]]:
+    """Rollup rows for the given sites whose buckets start within ``[start, end]`` (epoch seconds)."""
+    if not site_ids:
+        return []
+    placeholders = ','.join('?' for _ in site_ids)
+    columns = ROLLUP_COLUMNS if with_sketch else tuple(c for c in ROLLUP_COLUMNS if c != "sketch")
+    async with get_database().read() as db:
+        cursor = await db.execute(f"""
+            SELECT site_id, bucket, {', '.join(columns)}
+            FROM site_rollups
+            WHERE site_id IN ({placeholders}) AND resolution = ? AND bucket >= ? AND bucket <= ?
+            ORDER BY bucket
+        """, list(site_ids) + [resolution, int(start), int(end)])
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+async def get_checks_since(site_ids: List[int], start: float) -> List[Dict[str, Any]]:
+    """Status, response time and ts (epoch ms) of the given sites' checks from ``start`` (epoch seconds) on."""
+    if not site_ids:
+        return []
+    async with get_database().read() as db:
+        async with db.execute(f"""
+            SELECT site_id, status, response_time, ts
+            FROM site_checks
+            WHERE site_id IN ({','.join('?' for _ in site_ids)}) AND ts >= ?
+        """, list(site_ids) + [int(start * 1000)]) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+async def get_latency_sketches(site_ids: Optional[List[int]], start: float, end: float) -> Dict[int, DDSketch]:
+    """
+    Response time sketch per site over ``[start, end)`` (epoch seconds, widened
+    to whole minutes), merged from the rollup sketches covering the window
+    (see cover_window) without reading raw checks. ``None`` means all sites.
+    """
+    ranges = cover_window(start, end)
+    if not ranges or site_ids == []:
+        return {}
+    conditions = ' OR '.join('(resolution = ? AND bucket >= ? AND bucket < ?)' for _ in ranges)
+    params: List[Any] = [value for window in ranges for value in window]
+    site_filter = ''
+    if site_ids is not None:
+        site_filter = f"site_id IN ({','.join('?' for _ in site_ids)}) AND "
+        params = list(site_ids) + params
+    sketches: Dict[int, DDSketch] = {}
+    async with get_database().read() as db:
+        async with db.execute(f"""
+            SELECT site_id, sketch FROM site_rollups
+            WHERE {site_filter}rt_count > 0 AND ({conditions})
+        """, params) as cursor:
+            async for row in cursor:
+                sketch = DDSketch.from_bytes(row['sketch'])
+                if row['site_id'] in sketches:
+                    sketches[row['site_id']].merge(sketch)
+                else:
+                    sketches[row['site_id']] = sketch
+    return sketches
+
+async def get_rollup_coverage() -> Tuple[int, int]:
+    """Returns ``(raw checks, checks counted in daily rollups)``."""
+    async with get_database().read() as db:
+        async with db.execute("SELECT COUNT(*) FROM site_checks") as cursor:
+            raw = (await cursor.fetchone())[0]
+        async with db.execute("SELECT COALESCE(SUM(count), 0) FROM site_rollups WHERE resolution = 86400") as cursor:
+            rolled_up = (await cursor.fetchone())[0]
+        return raw, rolled_up
+
+async def get_sites_with_checks() -> List[int]:
+    async with get_database().read() as db:
+        cursor = await db.execute("SELECT site_id FROM site_latest ORDER BY site_id")
+        return [row[0] for row in await cursor.fetchall()]
+
+async def prune_site_checks(site_id: int, before: int, limit: int) -> int:
+    """Delete up to ``limit`` of a site's checks older than ``before`` (epoch ms); returns rows deleted."""
+    async with get_database().write() as db:
+        cursor = await db.execute("""
+            DELETE FROM site_checks WHERE id IN (
+                SELECT id FROM site_checks WHERE site_id = ? AND ts < ? LIMIT ?
+            )
+        """, (site_id, before, limit))
+        return cursor.rowcount
+
+async def prune_rollups(resolution: int, before: int, limit: int) -> int:
+    """Delete up to ``limit`` rollup rows of one resolution with buckets before ``before`` (epoch seconds)."""
+    async with get_database().write() as db:
+        cursor = await db.execute("""
+            DELETE FROM site_rollups WHERE (site_id, resolution, bucket) IN (
+                SELECT site_id, resolution, bucket FROM site_rollups
+                WHERE resolution = ? AND bucket < ? LIMIT ?
+            )
+        """, (resolution, before, limit))
+        return cursor.rowcount
+
+async def get_storage_stats() -> Dict[str, int]:
+    """Database file size, free pages and auto_vacuum mode (0 none, 1 full, 2 incremental)."""
+    stats = {}
+    async with get_database().read() as db:
+        for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum"):
+            async with db.execute(f"PRAGMA {pragma}") as cursor:
+                stats[pragma] = (await cursor.fetchone())[0]
+    stats["size_bytes"] = stats["page_size"] * stats["page_count"]
+    stats["free_bytes"] = stats["page_size"] * stats["freelist_count"]
+    return stats
+
+async def incremental_vacuum(pages: int):
+    """Return up to ``pages`` free pages to the OS (needs auto_vacuum=INCREMENTAL)."""
+    async with get_database().write() as db:
+        async with db.execute(f"PRAGMA incremental_vacuum({int(pages)})") as cursor:
+            await cursor.fetchall()  # The pragma frees one page per step
+
+async def vacuum():
+    """Rebuild the database file, switching it to incremental auto-vacuum. Blocks writers while it runs."""
+    async with get_database().write() as db:
         await db.commit()
+        await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        await db.execute("VACUUM")
+
+def _site_latest_upsert() -> str:
+    """
+    Upsert for site_latest: counters always accumulate, while the latest-check
+    fields only move forward in time (agents may deliver results late).
+    """
+    columns = ("site_id", "status", "checked_at") + CHECK_RESULT_COLUMNS + ("total_up", "total_down", "last_change_at")
+    newer = "excluded.checked_at >= site_latest.checked_at"
+    latest = ",\n            ".join(
+        f"{column} = CASE WHEN {newer} THEN excluded.{column} ELSE site_latest.{column} END"
+        for column in ("status", "checked_at") + CHECK_RESULT_COLUMNS
+    )
+    return f"""
+        INSERT INTO site_latest ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})
+        ON CONFLICT(site_id) DO UPDATE SET
+            total_up = site_latest.total_up + excluded.total_up,
+            total_down = site_latest.total_down + excluded.total_down,
+            last_change_at = CASE WHEN {newer} AND excluded.status != site_latest.status
+                                  THEN excluded.checked_at ELSE site_latest.last_change_at END,
+            {latest}
+    """
+
+_SITE_LATEST_UPSERT = _site_latest_upsert()
+
+_SITE_SECURITY_UPSERT = f"""
+    INSERT INTO site_security (site_id, checked_at, {', '.join(SECURITY_COLUMNS)})
+    VALUES (?, ?, {', '.join('?' for _ in SECURITY_COLUMNS)})
+    ON CONFLICT(site_id) DO UPDATE SET
+        checked_at = excluded.checked_at,
+        {', '.join(f"{column} = excluded.{column}" for column in SECURITY_COLUMNS)}
+    WHERE excluded.checked_at >= site_security.checked_at
+"""
+
+async def get_site_security() -> Dict[int, Dict[str, Any]]:
+    """Latest captured TLS handshake details of every site, keyed by site ID."""
+    async with get_database().read() as db:
+        cursor = await db.execute("SELECT * FROM site_security")
+        rows = await cursor.fetchall()
+        return {row['site_id']: dict(row) for row in rows}
 
 async def get_site_status() -> List[Dict[str, Any]]:
     """Get current status of all sites with latest check information."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with get_database().read() as db:
         cursor = await db.execute("""
             SELECT 
                 s.id,
@@ -94,83 +774,179 @@ async def get_site_status() -> List[Dict[str, Any]]:
                 s.name,
                 s.scan_interval,
                 s.created_at,
-                sc.status,
-                sc.response_time,
-                sc.status_code,
-                sc.error_message,
-                sc.checked_at,
-                (SELECT COUNT(*) FROM site_checks WHERE site_id = s.id AND status = 'up') as total_up,
-                (SELECT COUNT(*) FROM site_checks WHERE site_id = s.id AND status = 'down') as total_down
+                l.status,
+                l.response_time,
+                l.status_code,
+                l.error_message,
+                l.checked_at,
+                COALESCE(l.total_up, 0) as total_up,
+                COALESCE(l.total_down, 0) as total_down,
+                l.last_change_at
             FROM sites s
-            LEFT JOIN site_checks sc ON s.id = sc.site_id
-            WHERE sc.checked_at = (
-                SELECT MAX(checked_at) 
-                FROM site_checks 
-                WHERE site_id = s.id
-            ) OR sc.checked_at IS NULL
+            LEFT JOIN site_latest l ON l.site_id = s.id
             ORDER BY s.name
         """)
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
-async def get_site_history(site_id: int, limit: int = 100) -> List[Dict[str, Any]]:
-    """Get check history for a specific site."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+def build_bucket_query(site_ids: List[int], start: int, end: int, bucket_ms: int,
+                       descending: bool = False, limit: Optional[int] = None) -> Tuple[str, List[Any]]:
+    """
+    SQL and parameters aggregating the sites' checks between two epoch-millisecond
+    times into ``bucket_ms`` wide buckets aligned to ``start``. Each row has the
+    BUCKET_COLUMNS, with ``bucket`` the bucket start in epoch milliseconds, so
+    the result size scales with the number of buckets rather than checks.
+    Pass a ``start`` that is a multiple of ``bucket_ms`` for boundaries that
+    stay the same from one request to the next.
+    """
+    if bucket_ms <= 0:
+        raise ValueError("bucket_ms must be positive")
+    placeholders = ','.join('?' for _ in site_ids)
+    up_response_time = "CASE WHEN status = 'up' THEN response_time END"
+    sql = f"""
+        SELECT
+            site_id,
+            ts - (ts - ?) % ? AS bucket,
+            COUNT(*) AS count,
+            SUM(status = 'up') AS up_count,
+            COUNT({up_response_time}) AS rt_count,
+            SUM({up_response_time}) AS rt_sum,
+            AVG({up_response_time}) AS rt_avg,
+            MIN({up_response_time}) AS rt_min,
+            MAX({up_response_time}) AS rt_max
+        FROM site_checks
+        WHERE site_id IN ({placeholders})
+          AND ts >= ?
+          AND ts <= ?
+        GROUP BY site_id, bucket
+        ORDER BY bucket {'DESC' if descending else 'ASC'}, site_id
+    """
+    params: List[Any] = [start, bucket_ms] + list(site_ids) + [start, end]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+async def get_check_buckets(site_ids: List[int], start: int, end: int, bucket_ms: int,
+                            descending: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Per-site check aggregates per bucket (see build_bucket_query)."""
+    if not site_ids:
+        return []
+    async with get_database().read() as db:
+        cursor = await db.execute(*build_bucket_query(site_ids, start, end, bucket_ms, descending, limit))
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+async def get_site_history(site_id: int, limit: int = 100, bucket_ms: Optional[int] = None,
+                           start: Optional[int] = None, end: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get check history for a specific site, newest first. With ``bucket_ms``,
+    returns per-bucket aggregates between ``start`` and ``end`` (epoch ms)
+    instead of individual checks.
+    """
+    if bucket_ms is not None:
+        return await get_check_buckets([site_id], start, end, bucket_ms, descending=True, limit=limit)
+    async with get_database().read() as db:
         cursor = await db.execute("""
             SELECT * FROM site_checks 
             WHERE site_id = ? 
-            ORDER BY checked_at DESC 
+            ORDER BY ts DESC 
             LIMIT ?
         """, (site_id, limit))
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
+async def get_phase_timings(site_ids: List[int], start: int, end: int) -> Dict[int, Dict[str, Any]]:
+    """Average per-phase check timings (seconds) per site between two epoch-millisecond times."""
+    if not site_ids:
+        return {}
+    placeholders = ','.join('?' for _ in site_ids)
+    averages = ', '.join(f"AVG({column}) AS {column}" for column in PHASE_TIMING_COLUMNS)
+    async with get_database().read() as db:
+        cursor = await db.execute(f"""
+            SELECT site_id, {averages}
+            FROM site_checks
+            WHERE site_id IN ({placeholders})
+              AND ts >= ?
+              AND ts <= ?
+            GROUP BY site_id
+        """, list(site_ids) + [start, end])
+        rows = await cursor.fetchall()
+        return {row['site_id']: {column: row[column] for column in PHASE_TIMING_COLUMNS} for row in rows}
+
 async def delete_site(site_id: int):
     """Delete a site and all its check history."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with get_database().write() as db:
         await db.execute("DELETE FROM site_checks WHERE site_id = ?", (site_id,))
+        await db.execute("DELETE FROM site_latest WHERE site_id = ?", (site_id,))
+        await db.execute("DELETE FROM site_security WHERE site_id = ?", (site_id,))
+        await db.execute("DELETE FROM site_rollups WHERE site_id = ?", (site_id,))
+        await db.execute("DELETE FROM site_slos WHERE site_id = ?", (site_id,))
         await db.execute("DELETE FROM sites WHERE id = ?", (site_id,))
-        await db.commit()
+
+async def add_slo(site_id: int, name: str, kind: str, objective: float,
+                  latency_threshold: Optional[float] = None) -> int:
+    """Add a service level objective for a site."""
+    async with get_database().write() as db:
+        cursor = await db.execute(
+            "INSERT INTO site_slos (site_id, name, kind, objective, latency_threshold) VALUES (?, ?, ?, ?, ?)",
+            (site_id, name, kind, objective, latency_threshold)
+        )
+        return cursor.lastrowid
+
+async def get_slos() -> List[Dict[str, Any]]:
+    """Get all service level objectives."""
+    async with get_database().read() as db:
+        cursor = await db.execute("SELECT * FROM site_slos ORDER BY site_id, id")
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+async def get_slo(slo_id: int) -> Optional[Dict[str, Any]]:
+    """Get a single service level objective by ID."""
+    async with get_database().read() as db:
+        async with db.execute("SELECT * FROM site_slos WHERE id = ?", (slo_id,)) as cursor:
+            row = await cursor.fetchone()
+        return dict(row) if row else None
+
+async def delete_slo(slo_id: int) -> bool:
+    """Delete a service level objective; returns whether it existed."""
+    async with get_database().write() as db:
+        cursor = await db.execute("DELETE FROM site_slos WHERE id = ?", (slo_id,))
+        return cursor.rowcount > 0
 
 async def add_agent(name: str, api_key_hash: str, description: str = None) -> int:
     """Add a new agent to the database."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with get_database().write() as db:
         cursor = await db.execute(
             "INSERT INTO agents (name, api_key_hash, description) VALUES (?, ?, ?)",
             (name, api_key_hash, description)
         )
-        await db.commit()
         return cursor.lastrowid
 
 async def get_agents() -> List[Dict[str, Any]]:
     """Get all registered agents."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with get_database().read() as db:
         cursor = await db.execute("SELECT * FROM agents ORDER BY name")
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
 async def get_agent_by_hash(api_key_hash: str) -> Dict[str, Any]:
     """Get agent by API key hash."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("SELECT * FROM agents WHERE api_key_hash = ?", (api_key_hash,))
-        row = await cursor.fetchone()
+    async with get_database().read() as db:
+        async with db.execute("SELECT * FROM agents WHERE api_key_hash = ?", (api_key_hash,)) as cursor:
+            row = await cursor.fetchone()
         return dict(row) if row else None
 
 async def update_agent_status(api_key_hash: str, status: str):
     """Update agent status and last seen timestamp."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
+    async with get_database().write() as db:
         await db.execute("""
             UPDATE agents 
             SET status = ?, last_seen = CURRENT_TIMESTAMP 
             WHERE api_key_hash = ?
         """, (status, api_key_hash))
-        await db.commit()
 
 async def delete_agent(agent_id: int):
     """Delete an agent."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("DELETE FROM agents WHERE id = ?", (agent_id,))
-        await db.commit() 
\ No newline at end of file
+    async with get_database().write() as db:
+        await db.execute("DELETE FROM agents WHERE id = ?", (agent_id,))
\ No newline at end of file
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from .config import settings
+from .live_state import STATE_CHECK_FIELDS, StateChange, get_live_state
+
+logger = logging.getLogger(__name__)
+
+# Fields published for each site with a new check
+LIVE_CHECK_FIELDS = STATE_CHECK_FIELDS + ("total_up", "total_down")
+
+
+class Subscriber:
+    """
+    One event stream client: its site filter and the updates waiting to be
+    sent. Checks are coalesced to the latest per site and stats to the latest
+    summary, so a slow client receives one message covering everything that
+    happened since its last one instead of a backlog.
+    """
+
+    def __init__(self, site_ids: Optional[Set[int]] = None):
+        self.site_ids = site_ids
+        self.checks: Dict[int, str] = {}  # site_id -> serialised latest check
+        self.transitions: Deque[str] = deque()
+        self.stats: Optional[str] = None
+        self.resync = False
+        self.ready = asyncio.Event()
+        self.superseded = 0  # Check updates replaced before they were sent
+
+    def wants(self, site_id: int) -> bool:
+        return self.site_ids is None or site_id in self.site_ids
+
+    def push(self, checks: Dict[int, str], transitions: List[Tuple[int, str]], stats: Optional[str]):
+        for site_id, check in checks.items():
+            if self.wants(site_id):
+                if site_id in self.checks:
+                    self.superseded += 1
+                self.checks[site_id] = check
+        for site_id, transition in transitions:
+            if self.wants(site_id):
+                if len(self.transitions) >= settings.LIVE_MAX_PENDING_TRANSITIONS:
+                    # Too far behind to replay; the client reloads the status instead
+                    self.transitions.clear()
+                    self.resync = True
+                self.transitions.append(transition)
+        if stats is not None:
+            self.stats = stats
+        if self.checks or self.transitions or self.stats is not None or self.resync:
+            self.ready.set()
+
+    def request_resync(self):
+        self.resync = True
+        self.ready.set()
+
+    def take(self) -> str:
+        """Everything pending as one ``update`` event, assembled from the pre-serialised parts."""
+        parts = [
+            f'"checks":[{",".join(self.checks.values())}]',
+            f'"transitions":[{",".join(self.transitions)}]',
+        ]
+        if self.stats is not None:
+            parts.append(f'"stats":{self.stats}')
+        if self.resync:
+            parts.append('"resync":true')
+        self.checks = {}
+        self.transitions.clear()
+        self.stats = None
+        self.resync = False
+        self.ready.clear()
+        return f"event: update\ndata: {{{','.join(parts)}}}\n\n"
+
+
+class EventBroker:
+    """
+    Fans live state changes out to dashboard event streams. Registered as a
+    ``LiveState`` listener, it serialises each change once (latest check per
+    site, status transitions and the stats summary when it changed) and hands
+    the same strings to every subscriber, so N viewers cost one serialisation
+    and no queries.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        self._stats: Optional[Dict[str, Any]] = None
+
+        # Statistics
+        self._batches = 0
+        self._messages = 0
+
+    def subscribe(self, site_ids: Optional[Set[int]] = None) -> Subscriber:
+        subscriber = Subscriber(site_ids)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def stream(self, site_ids: Optional[Set[int]] = None) -> AsyncIterator[str]:
+        """
+        Server-sent events for one client. Updates are sent at most every
+        ``LIVE_MIN_INTERVAL_SECONDS``, and a comment every
+        ``LIVE_HEARTBEAT_SECONDS`` keeps idle connections open through proxies.
+        """
+        subscriber = self.subscribe(site_ids)
+        try:
+            yield f"retry: {int(settings.LIVE_RETRY_SECONDS * 1000)}\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), settings.LIVE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                self._messages += 1
+                yield subscriber.take()
+                await asyncio.sleep(settings.LIVE_MIN_INTERVAL_SECONDS)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def on_state_changed(self, change: StateChange):
+        """Live state listener: publishes a change to every subscriber."""
+        state = get_live_state()
+        stats = state.summary()
+        changed = stats != self._stats
+        self._stats = stats
+        if not self._subscribers:
+            return
+        self._batches += 1
+        checks = {}
+        for site_id in change.site_ids:
+            site = state.site(site_id)
+            if site is not None:
+                checks[site_id] = json.dumps({"id": site_id, **{field: site.get(field) for field in LIVE_CHECK_FIELDS}})
+        transitions = [(transition["site_id"], json.dumps(transition)) for transition in change.transitions]
+        serialised_stats = json.dumps(stats) if changed else None
+        for subscriber in self._subscribers:
+            if change.sites_changed:
+                # Clients reload the site list after sites are added or removed
+                subscriber.request_resync()
+            subscriber.push(checks, transitions, serialised_stats)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "batches_published": self._batches,
+            "messages_sent": self._messages,
+            "superseded_updates": sum(subscriber.superseded for subscriber in self._subscribers),
+        }
+
+
+# --- Singleton Pattern ---
+_event_broker_instance: Optional[EventBroker] = None
+
+def get_event_broker() -> EventBroker:
+    """Returns the shared EventBroker instance."""
+    global _event_broker_instance
+    if _event_broker_instance is None:
+        _event_broker_instance = EventBroker()
+    return _event_broker_instance
@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, lowest runs first
+PRIORITY_DOWN = 0
+PRIORITY_NORMAL = 1
+
+
+class _Job:
+    __slots__ = ("key", "fn", "host", "ip", "future", "enqueued_at", "task")
+
+    def __init__(self, key: Tuple, fn: Callable[[], Awaitable[Any]], host: str,
+                 ip: Optional[str], future: asyncio.Future):
+        self.key = key
+        self.fn = fn
+        self.host = host
+        self.ip = ip
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+    def __lt__(self, other: "_Job") -> bool:
+        return self.key < other.key
+
+
+class CheckExecutor:
+    """
+    Runs checks through a priority queue with a global concurrency cap and
+    per-host / per-IP politeness caps.
+
+    Jobs whose host or IP is at its cap are parked on that key rather than
+    blocking a slot, and are put back on the queue as soon as a check for the
+    same host or IP finishes.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_host: int, max_per_ip: int,
+                 resolve: Optional[Callable[[str], Awaitable[Optional[str]]]] = None):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.max_per_ip = max_per_ip
+        self._resolve = resolve
+
+        self._queue: List[_Job] = []
+        self._parked: Dict[Tuple[str, str], Deque[_Job]] = defaultdict(deque)
+        self._parked_count = 0
+        self._active = 0
+        self._host_active: Dict[str, int] = defaultdict(int)
+        self._ip_active: Dict[str, int] = defaultdict(int)
+        self._seq = 0
+
+        # Statistics
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_last = 0.0
+
+    async def submit(self, fn: Callable[[], Awaitable[Any]], host: str,
+                     priority: int = PRIORITY_NORMAL, overdue: float = 0.0) -> Any:
+        """
+        Queues a check and waits for its result. Lower ``priority`` classes run
+        first; within a class, the most overdue checks run first.
+        """
+        ip = await self._resolve_ip(host)
+        self._seq += 1
+        future = asyncio.get_running_loop().create_future()
+        job = _Job((priority, -overdue, self._seq), fn, host, ip, future)
+        heapq.heappush(self._queue, job)
+        self._pump()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if job.task is not None:
+                job.task.cancel()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, active checks and queue wait times (seconds)."""
+        return {
+            "queue_depth": len(self._queue) + self._parked_count,
+            "parked": self._parked_count,
+            "active": self._active,
+            "active_hosts": len(self._host_active),
+            "max_concurrency": self.max_concurrency,
+            "completed": self._completed,
+            "wait_last": self._wait_last,
+            "wait_avg": self._wait_total / self._completed if self._completed else None,
+            "wait_max": self._wait_max,
+        }
+
+    async def close(self):
+        """Cancels queued and running checks."""
+        pending = list(self._queue)
+        for parked in self._parked.values():
+            pending.extend(parked)
+        self._queue.clear()
+        self._parked.clear()
+        self._parked_count = 0
+        for job in pending:
+            job.future.cancel()
+
+    async def _resolve_ip(self, host: str) -> Optional[str]:
+        if self._resolve is None or not host:
+            return None
+        try:
+            return await self._resolve(host)
+        except Exception as e:
+            logger.debug(f"Could not resolve {host} for per-IP limits: {e}")
+            return None
+
+    def _pump(self):
+        """Starts queued jobs while there is global capacity."""
+        while self._queue and self._active < self.max_concurrency:
+            job = heapq.heappop(self._queue)
+            if job.future.done():
+                continue
+            if self._host_active[job.host] >= self.max_per_host:
+                self._park(("host", job.host), job)
+            elif job.ip and self._ip_active[job.ip] >= self.max_per_ip:
+                self._park(("ip", job.ip), job)
+            else:
+                self._start(job)
+
+    def _park(self, key: Tuple[str, str], job: _Job):
+        self._parked[key].append(job)
+        self._parked_count += 1
+
+    def _unpark(self, key: Tuple[str, str]):
+        parked = self._parked.get(key)
+        if parked:
+            heapq.heappush(self._queue, parked.popleft())
+            self._parked_count -= 1
+            if not parked:
+                del self._parked[key]
+
+    def _start(self, job: _Job):
+        self._active += 1
+        self._host_active[job.host] += 1
+        if job.ip:
+            self._ip_active[job.ip] += 1
+
+        wait = time.monotonic() - job.enqueued_at
+        self._wait_last = wait
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+
+        job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: _Job):
+        try:
+            result = await job.fn()
+            if not job.future.done():
+                job.future.set_result(result)
+        except asyncio.CancelledError:
+            job.future.cancel()
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self._finish(job)
+
+    def _finish(self, job: _Job):
+        self._active -= 1
+        self._completed += 1
+        self._host_active[job.host] -= 1
+        if not self._host_active[job.host]:
+            del self._host_active[job.host]
+        self._unpark(("host", job.host))
+        if job.ip:
+            self._ip_active[job.ip] -= 1
+            if not self._ip_active[job.ip]:
+                del self._ip_active[job.ip]
+            self._unpark(("ip", job.ip))
+        self._pump()
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import os
+import socket
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+_PAYLOAD = b"SREoob-ping".ljust(56, b"\x00")
+
+
+def _checksum(data: bytes) -> int:
+    """Internet checksum (RFC 1071)."""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_request(ident: int, seq: int) -> bytes:
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    checksum = _checksum(header + _PAYLOAD)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, ident, seq) + _PAYLOAD
+
+
+class IcmpEngine:
+    """
+    Asyncio ICMP echo engine sharing a single socket for every probe.
+
+    Prefers an unprivileged datagram ICMP socket (Linux ``ping_group_range``)
+    and falls back to a raw socket. Replies are matched to outstanding
+    requests by source address and sequence number (plus identifier on raw
+    sockets, where the kernel delivers every ICMP packet on the host).
+    """
+
+    def __init__(self):
+        self._sock: Optional[socket.socket] = None
+        self._raw = False
+        self._ident = os.getpid() & 0xFFFF
+        self._seq = 0
+        self._pending: Dict[Tuple[str, int], Tuple[asyncio.Future, float]] = {}
+        self._open_failed = False
+
+    @property
+    def available(self) -> bool:
+        """True if an ICMP socket is (or can be) opened."""
+        return self._ensure_socket()
+
+    def _ensure_socket(self) -> bool:
+        if self._sock is not None:
+            return True
+        if self._open_failed:
+            return False
+
+        for sock_type, raw in ((socket.SOCK_DGRAM, False), (socket.SOCK_RAW, True)):
+            try:
+                sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+            except OSError:
+                continue
+            sock.setblocking(False)
+            self._sock = sock
+            self._raw = raw
+            asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable)
+            logger.info(f"ICMP engine using {'raw' if raw else 'datagram'} socket")
+            return True
+
+        self._open_failed = True
+        logger.warning("Could not open an ICMP socket (need CAP_NET_RAW or ping_group_range).")
+        return False
+
+    def close(self):
+        """Closes the socket and fails any outstanding echoes."""
+        if self._sock is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            except RuntimeError:
+                pass
+            self._sock.close()
+            self._sock = None
+        for future, _ in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+    def _on_readable(self):
+        while self._sock is not None:
+            try:
+                data, addr = self._sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.debug(f"ICMP receive error: {e}")
+                return
+
+            received_at = time.perf_counter()
+            if self._raw:
+                data = data[(data[0] & 0x0F) * 4:]  # Strip the IP header
+            if len(data) < 8:
+                continue
+
+            icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", data[:8])
+            if icmp_type != ICMP_ECHO_REPLY:
+                continue
+            # Datagram sockets rewrite the identifier to the socket's port.
+            if self._raw and ident != self._ident:
+                continue
+
+            pending = self._pending.pop((addr[0], seq), None)
+            if pending is not None:
+                future, sent_at = pending
+                if not future.done():
+                    future.set_result(received_at - sent_at)
+
+    async def echo(self, address: str, timeout: float) -> Optional[float]:
+        """Sends one echo request. Returns the RTT in seconds, or None on timeout."""
+        if not self._ensure_socket():
+            raise RuntimeError("ICMP socket not available")
+
+        self._seq = (self._seq + 1) & 0xFFFF
+        seq = self._seq
+        key = (address, seq)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = (future, time.perf_counter())
+        try:
+            self._sock.sendto(_echo_request(self._ident, seq), (address, 0))
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, BlockingIOError):
+            return None
+        finally:
+            self._pending.pop(key, None)
+
+    async def probe(self, address: str, count: int = 3, interval: float = 0.2,
+                    timeout: float = 4.0) -> Dict[str, Any]:
+        """
+        Sends ``count`` echoes ``interval`` seconds apart and summarises them.
+        ``jitter`` is the mean absolute difference between consecutive RTTs.
+        """
+        async def delayed_echo(delay: float) -> Optional[float]:
+            if delay:
+                await asyncio.sleep(delay)
+            return await self.echo(address, timeout)
+
+        rtts = await asyncio.gather(*(delayed_echo(i * interval) for i in range(count)))
+        received: List[float] = [rtt for rtt in rtts if rtt is not None]
+
+        jitter = None
+        if len(received) >= 2:
+            jitter = sum(abs(b - a) for a, b in zip(received, received[1:])) / (len(received) - 1)
+
+        return {
+            "sent": count,
+            "received": len(received),
+            "packet_loss": (count - len(received)) / count if count else 0.0,
+            "rtt_min": min(received) if received else None,
+            "rtt_avg": sum(received) / len(received) if received else None,
+            "rtt_max": max(received) if received else None,
+            "jitter": jitter,
+        }
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+from .database import record_checks
+
+logger = logging.getLogger(__name__)
+
+CheckRecord = Tuple[int, Dict[str, Any]]
+
+_FLUSH_RETRIES = 3
+
+
+def utc_timestamp(value: Optional[str] = None) -> str:
+    """
+    Normalises an ISO timestamp (or now, if None) to the UTC
+    ``YYYY-MM-DD HH:MM:SS`` format SQLite's CURRENT_TIMESTAMP uses.
+    """
+    if value:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc)
+    else:
+        parsed = datetime.now(timezone.utc)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class IngestQueue:
+    """
+    Write-behind queue for check results. Producers (the monitor, the agent
+    HTTP endpoint and the agent WebSocket) enqueue results and return
+    immediately; a single writer task flushes them in batched transactions
+    once ``INGEST_BATCH_SIZE`` results are waiting or ``INGEST_FLUSH_INTERVAL_SECONDS``
+    has passed. Producers wait when the queue is full (backpressure), and
+    ``stop`` drains everything before returning.
+
+    Listeners registered with ``add_listener`` are called with each batch after
+    it has been committed.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._has_items = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[List[CheckRecord]], None]] = []
+        self._stopping = False
+
+        # Statistics
+        self._enqueued = 0
+        self._flushed = 0
+        self._dropped = 0
+        self._batches = 0
+        self._blocked_puts = 0
+        self._high_water = 0
+        self._last_flush_seconds: Optional[float] = None
+        self._last_batch_size = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._writer is not None and not self._writer.done()
+
+    async def start(self):
+        if not self.is_running:
+            self._queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_MAX_SIZE)
+            self._writer = asyncio.create_task(self._write_loop())
+            logger.info("Check ingest queue started.")
+
+    async def stop(self):
+        """
+        Flushes everything queued so far, then stops the writer. Results put
+        while stopping are written through, and any that still got in behind
+        the sentinel (e.g. a put blocked on a full queue) are flushed here.
+        """
+        if self.is_running:
+            self._stopping = True
+            try:
+                await self._queue.put(None)  # Sentinel: flush and exit
+                self._has_items.set()
+                await self._writer
+                while not self._queue.empty():
+                    leftovers = [record for record in self._drain_queue() if record is not None]
+                    for start in range(0, len(leftovers), settings.INGEST_BATCH_SIZE):
+                        await self._flush(leftovers[start:start + settings.INGEST_BATCH_SIZE])
+            finally:
+                self._writer = None
+                self._stopping = False
+            logger.info("Check ingest queue drained and stopped.")
+
+    def add_listener(self, callback: Callable[[List[CheckRecord]], None]):
+        """Registers a callback invoked with every committed batch."""
+        self._listeners.append(callback)
+
+    async def put(self, site_id: int, result: Dict[str, Any]):
+        await self.put_many([(site_id, result)])
+
+    async def put_many(self, records: List[CheckRecord]):
+        """Enqueues results, waiting if the queue is full."""
+        stamped = [(site_id, self._stamp(result)) for site_id, result in records]
+        if not self.is_running or self._stopping:
+            # No writer, or it is flushing its last batch: write through synchronously
+            await self._flush(stamped)
+            return
+        for record in stamped:
+            if self._queue.full():
+                self._blocked_puts += 1
+            await self._queue.put(record)
+            self._enqueued += 1
+        self._has_items.set()
+        self._high_water = max(self._high_water, self._queue.qsize())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_size": settings.INGEST_QUEUE_MAX_SIZE,
+            "high_water": self._high_water,
+            "enqueued": self._enqueued,
+            "flushed": self._flushed,
+            "dropped": self._dropped,
+            "batches": self._batches,
+            "blocked_puts": self._blocked_puts,
+            "last_batch_size": self._last_batch_size,
+            "last_flush_seconds": self._last_flush_seconds,
+        }
+
+    @staticmethod
+    def _stamp(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Pins the check time at enqueue so batching delay never shifts it."""
+        return {**result, "checked_at": utc_timestamp(result.get("checked_at"))}
+
+    async def _write_loop(self):
+        while True:
+            record = await self._queue.get()
+            stopping = record is None
+            batch = [] if stopping else [record]
+            deadline = time.monotonic() + settings.INGEST_FLUSH_INTERVAL_SECONDS
+
+            while not stopping and len(batch) < settings.INGEST_BATCH_SIZE:
+                try:
+                    record = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    # Wait on an event rather than queue.get() so a timeout can't lose an item
+                    self._has_items.clear()
+                    try:
+                        await asyncio.wait_for(self._has_items.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    continue
+                if record is None:
+                    stopping = True
+                else:
+                    batch.append(record)
+
+            if stopping:
+                # Drain whatever is left behind the sentinel
+                batch.extend(record for record in self._drain_queue() if record is not None)
+
+            for start in range(0, len(batch), settings.INGEST_BATCH_SIZE):
+                await self._flush(batch[start:start + settings.INGEST_BATCH_SIZE])
+            if stopping:
+                return
+
+    def _drain_queue(self) -> List[Optional[CheckRecord]]:
+        records = []
+        while not self._queue.empty():
+            records.append(self._queue.get_nowait())
+        return records
+
+    async def _flush(self, batch: List[CheckRecord]):
+        if not batch:
+            return
+        started = time.perf_counter()
+        for attempt in range(1, _FLUSH_RETRIES + 1):
+            try:
+                await record_checks(batch)
+                break
+            except Exception as e:
+                if attempt == _FLUSH_RETRIES:
+                    self._dropped += len(batch)
+                    logger.error(f"Dropping {len(batch)} check results after {attempt} failed writes: {e}")
+                    return
+                logger.warning(f"Check result write failed (attempt {attempt}): {e}")
+                await asyncio.sleep(0.5 * attempt)
+
+        self._last_flush_seconds = time.perf_counter() - started
+        self._last_batch_size = len(batch)
+        self._flushed += len(batch)
+        self._batches += 1
+
+        for listener in self._listeners:
+            try:
+                listener(batch)
+            except Exception as e:
+                logger.error(f"Ingest listener {listener!r} failed: {e}", exc_info=True)
+
+
+# --- Singleton Pattern ---
+_ingest_instance: Optional[IngestQueue] = None
+
+def get_ingest_queue() -> IngestQueue:
+    """Returns the shared IngestQueue instance."""
+    global _ingest_instance
+    if _ingest_instance is None:
+        _ingest_instance = IngestQueue()
+    return _ingest_instance
@@ -0,0 +1,204 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .config import settings
+from .monitor import get_monitor
+
+logger = logging.getLogger(__name__)
+
+
+class CheckJob:
+    """
+    A manual check of a set of sites. Results are filled in as each site's
+    check finishes; the event returned by ``watch`` is set at the next
+    change, so streams can follow progress without busy-looping.
+    """
+
+    def __init__(self, job_id: str, site_ids: List[int], missing: List[int]):
+        self.id = job_id
+        self.site_ids = site_ids
+        self.missing = missing  # Requested IDs that aren't monitored
+        self.deduplicated = 0   # Sites whose check was already in flight and was joined
+        self.status = "running"
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at: Optional[str] = None
+        self.results: Dict[int, Optional[Dict[str, Any]]] = {}  # In completion order
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def record(self, site_id: int, result: Optional[Dict[str, Any]]):
+        self.results[site_id] = result
+        self._notify()
+
+    def finish(self):
+        self.status = "completed"
+        self.finished_at = datetime.now(timezone.utc).isoformat()
+        self._notify()
+
+    def _notify(self):
+        # Wake everyone watching the current event, then start a new one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def watch(self) -> asyncio.Event:
+        """Event set at the job's next change; take it before reading the job's state."""
+        return self._changed
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": len(self.site_ids),
+            "completed": len(self.results),
+            "down": sum(1 for result in self.results.values() if not result or result.get("status") != "up"),
+            "deduplicated": self.deduplicated,
+            "missing_site_ids": self.missing,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "results": [
+                {"site_id": site_id, **(result or {"status": "error", "error_message": "Check failed"})}
+                for site_id, result in self.results.items()
+            ],
+        }
+
+
+class CheckJobManager:
+    """
+    Runs manual checks as background jobs. Each site is checked through the
+    monitor's executor, like a scheduled check, and the result is recorded
+    through the ingest queue. A site already being checked for another job
+    isn't checked again: the new job joins the in-flight check (single-flight),
+    so operators clicking at once cost one probe per site. Finished jobs are
+    kept for polling up to ``CHECK_JOBS_MAX_RETAINED``.
+    """
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, CheckJob]" = OrderedDict()
+        self._inflight: Dict[int, asyncio.Task] = {}  # site_id -> shared check
+        self._ids = itertools.count(1)
+        self._prefix = f"{time.time_ns():x}"  # Keeps IDs from a previous process from matching
+
+        # Statistics
+        self._submitted = 0
+        self._checks = 0
+        self._deduplicated = 0
+
+    def submit(self, site_ids: Optional[List[int]] = None) -> CheckJob:
+        """Starts a job checking ``site_ids`` (every monitored site if None) and returns it at once."""
+        sites = {site['id']: site for site in get_monitor().sites}
+        requested = list(sites) if site_ids is None else list(dict.fromkeys(site_ids))
+        job = CheckJob(
+            f"{self._prefix}-{next(self._ids)}",
+            [site_id for site_id in requested if site_id in sites],
+            [site_id for site_id in requested if site_id not in sites],
+        )
+        checks = []
+        for site_id in job.site_ids:
+            check = self._inflight.get(site_id)
+            if check is None:
+                check = self._inflight[site_id] = asyncio.create_task(self._check(sites[site_id]))
+                self._checks += 1
+            else:
+                job.deduplicated += 1
+            checks.append((site_id, check))
+        self._deduplicated += job.deduplicated
+        self._submitted += 1
+
+        job.task = asyncio.create_task(self._run(job, checks))
+        self._jobs[job.id] = job
+        self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[CheckJob]:
+        return self._jobs.get(job_id)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        return [job.summary() for job in reversed(self._jobs.values())]
+
+    async def _check(self, site: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            return await get_monitor().check_and_record(site)
+        except Exception as e:
+            logger.error(f"Manual check of site {site['id']} failed: {e}", exc_info=True)
+            return None
+        finally:
+            self._inflight.pop(site['id'], None)
+
+    async def _run(self, job: CheckJob, checks: List[Tuple[int, asyncio.Task]]):
+        async def follow(site_id: int, check: asyncio.Task):
+            # shield: one job's cancellation mustn't cancel a check other jobs share
+            job.record(site_id, await asyncio.shield(check))
+
+        try:
+            await asyncio.gather(*(follow(site_id, check) for site_id, check in checks))
+        finally:
+            job.finish()
+            self._evict()
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - settings.CHECK_JOBS_MAX_RETAINED)]:
+            del self._jobs[job_id]
+
+    async def stream(self, job: CheckJob) -> AsyncIterator[str]:
+        """Server-sent events for a job: a ``result`` per site as it completes, then ``done``."""
+        sent = 0
+        while True:
+            change = job.watch()
+            finished = job.finished
+            items = list(job.results.items())
+            for site_id, result in items[sent:]:
+                payload = {"site_id": site_id, **(result or {"status": "error", "error_message": "Check failed"})}
+                yield f"event: result\ndata: {json.dumps(payload)}\n\n"
+            sent = len(items)
+            if finished:
+                yield f"event: done\ndata: {json.dumps(job.summary())}\n\n"
+                return
+            try:
+                await asyncio.wait_for(change.wait(), settings.LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+
+    async def stop(self):
+        """Cancels running jobs and their checks."""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        tasks += list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self._jobs),
+            "running": sum(1 for job in self._jobs.values() if not job.finished),
+            "submitted": self._submitted,
+            "checks": self._checks,
+            "deduplicated": self._deduplicated,
+            "checks_in_flight": len(self._inflight),
+        }
+
+
+# --- Singleton Pattern ---
+_job_manager_instance: Optional[CheckJobManager] = None
+
+def get_check_jobs() -> CheckJobManager:
+    """Returns the shared CheckJobManager instance."""
+    global _job_manager_instance
+    if _job_manager_instance is None:
+        _job_manager_instance = CheckJobManager()
+    return _job_manager_instance
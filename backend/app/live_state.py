@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .config import settings
+from .database import get_latency_sketches, get_site_status
+from .rollups import summarize_latency
+from .security import get_security_inventory
+from .sketch import DDSketch
+
+logger = logging.getLogger(__name__)
+
+# Latest-check fields of a site row, as in get_site_status
+STATE_CHECK_FIELDS = ("status", "response_time", "status_code", "error_message", "checked_at")
+
+# Window for the response time percentiles in the stats summary
+STATS_LATENCY_WINDOW_SECONDS = 3600
+
+
+class StateChange(NamedTuple):
+    """What one update changed: sites with a new check, status transitions, and whether sites were added or removed."""
+    site_ids: List[int]
+    transitions: List[Dict[str, Any]]
+    sites_changed: bool = False
+
+
+class LiveState:
+    """
+    In-memory copy of every site's row in ``get_site_status`` (site fields,
+    latest check, up/down totals and last status change), seeded from the
+    database at startup and kept current by the ingest listener
+    ``on_checks_recorded``, which sees results from the monitor, its workers
+    and agents alike. ``/sites/status`` and ``/stats`` are answered from it as
+    pre-serialised JSON, rebuilt only after the state (or, for the status,
+    the security inventory) changed.
+
+    Listeners registered with ``add_listener`` get a ``StateChange`` after
+    each update.
+    """
+
+    def __init__(self):
+        self._sites: Dict[int, Dict[str, Any]] = {}
+        self._listeners: List[Callable[[StateChange], None]] = []
+        self._version = 0
+        self._loaded = False
+
+        self._summary: Optional[Dict[str, Any]] = None
+        self._summary_version = -1
+        self._status_json: Optional[bytes] = None
+        self._status_key: Optional[Tuple[int, int, int]] = None
+        self._stats_json: Optional[bytes] = None
+        self._stats_version = -1
+        self._percentiles: Optional[Dict[str, Any]] = None
+        self._percentiles_at: Optional[float] = None
+        self._percentiles_lock = asyncio.Lock()
+
+        # Statistics
+        self._updates = 0
+        self._status_builds = 0
+        self._stats_builds = 0
+
+    async def start(self):
+        """Seeds the state from site_latest."""
+        self._sites = {site['id']: site for site in await get_site_status()}
+        self._loaded = True
+        self._version += 1
+        logger.info(f"Live state seeded with {len(self._sites)} sites.")
+
+    def add_listener(self, callback: Callable[[StateChange], None]):
+        """Registers ``callback`` to be called with each ``StateChange``."""
+        self._listeners.append(callback)
+
+    def site(self, site_id: int) -> Optional[Dict[str, Any]]:
+        return self._sites.get(site_id)
+
+    def on_checks_recorded(self, records: List[Tuple[int, Dict[str, Any]]]):
+        """Ingest listener: applies a committed batch of check results."""
+        touched: Dict[int, None] = {}
+        transitions = []
+        for site_id, result in records:
+            site = self._sites.get(site_id)
+            if site is None:
+                continue  # Deleted while its check was in flight
+            touched[site_id] = None
+            status = result['status']
+            site['total_up'] = (site.get('total_up') or 0) + (status == 'up')
+            site['total_down'] = (site.get('total_down') or 0) + (status == 'down')
+            if site.get('checked_at') and result['checked_at'] < site['checked_at']:
+                continue  # A late (agent) result only counts towards the totals
+            previous = site.get('status')
+            site.update({field: result.get(field) for field in STATE_CHECK_FIELDS})
+            if previous != status:
+                site['last_change_at'] = result['checked_at']
+                transitions.append({"site_id": site_id, "from": previous, "to": status, "at": result['checked_at']})
+        if touched:
+            self._changed(StateChange(list(touched), transitions))
+
+    def site_added(self, site: Dict[str, Any]):
+        self._sites[site['id']] = {
+            **{field: site.get(field) for field in ("id", "url", "name", "scan_interval", "created_at")},
+            **{field: None for field in STATE_CHECK_FIELDS},
+            "total_up": 0,
+            "total_down": 0,
+            "last_change_at": None,
+        }
+        self._changed(StateChange([], [], sites_changed=True))
+
+    def site_removed(self, site_id: int):
+        if self._sites.pop(site_id, None) is not None:
+            self._changed(StateChange([], [], sites_changed=True))
+
+    def _changed(self, change: StateChange):
+        self._version += 1
+        self._updates += 1
+        for listener in self._listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                logger.error(f"Live state listener {listener!r} failed: {e}", exc_info=True)
+
+    def summary(self) -> Dict[str, Any]:
+        """Site counts by latest status and the average latest response time of sites that are up."""
+        if self._summary_version != self._version:
+            up_times = [
+                site['response_time'] for site in self._sites.values()
+                if site.get('status') == 'up' and site.get('response_time') is not None
+            ]
+            sites_up = sum(1 for site in self._sites.values() if site.get('status') == 'up')
+            self._summary = {
+                "total_sites": len(self._sites),
+                "sites_up": sites_up,
+                "sites_down": len(self._sites) - sites_up,
+                "average_response_time": sum(up_times) / len(up_times) if up_times else None,
+            }
+            self._summary_version = self._version
+        return self._summary
+
+    def status_json(self) -> bytes:
+        """``/sites/status`` as JSON: every site ordered by name, with its security information."""
+        inventory = get_security_inventory()
+        # Certificate days remaining are rounded, so hourly rebuilds keep them current enough
+        key = (self._version, inventory.version, int(time.time() // 3600))
+        if self._status_key != key:
+            self._status_json = json.dumps([
+                {**site, **inventory.get(site)}
+                for site in sorted(self._sites.values(), key=lambda site: site['name'])
+            ]).encode()
+            self._status_key = key
+            self._status_builds += 1
+        return self._status_json
+
+    def _percentiles_stale(self) -> bool:
+        return (self._percentiles_at is None
+                or time.monotonic() - self._percentiles_at >= settings.LIVE_STATS_PERCENTILES_TTL_SECONDS)
+
+    async def stats_json(self) -> bytes:
+        """
+        ``/stats`` as JSON. The response time percentiles come from the rollup
+        sketches of the last hour and are refreshed at most every
+        ``LIVE_STATS_PERCENTILES_TTL_SECONDS``; everything else is in memory.
+        """
+        if self._percentiles_stale():
+            async with self._percentiles_lock:
+                if self._percentiles_stale():
+                    now = time.time()
+                    overall = DDSketch()
+                    for sketch in (await get_latency_sketches(None, now - STATS_LATENCY_WINDOW_SECONDS, now)).values():
+                        overall.merge(sketch)
+                    self._percentiles = summarize_latency(overall)
+                    self._percentiles_at = time.monotonic()
+                    self._stats_json = None
+        if self._stats_json is None or self._stats_version != self._version:
+            self._stats_json = json.dumps({
+                **self.summary(),
+                "response_time_percentiles": self._percentiles,
+            }).encode()
+            self._stats_version = self._version
+            self._stats_builds += 1
+        return self._stats_json
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._loaded,
+            "sites": len(self._sites),
+            "version": self._version,
+            "updates": self._updates,
+            "status_builds": self._status_builds,
+            "stats_builds": self._stats_builds,
+        }
+
+
+# --- Singleton Pattern ---
+_live_state_instance: Optional[LiveState] = None
+
+def get_live_state() -> LiveState:
+    """Returns the shared LiveState instance."""
+    global _live_state_instance
+    if _live_state_instance is None:
+        _live_state_instance = LiveState()
+    return _live_state_instance
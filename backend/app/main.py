@@ -3,7 +3,15 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_database
+from .database import init_database, close_database
+from .ingest import get_ingest_queue
+from .analytics_cache import get_analytics_cache
+from .slo import get_slo_tracker
+from .retention import get_retention
+from .security import get_security_inventory
+from .events import get_event_broker
+from .live_state import get_live_state
+from .jobs import get_check_jobs
 from .monitor import monitor_instance as monitor
 from .api import endpoints, auth, agent
 from .config import settings
@@ -27,15 +35,31 @@ async def lifespan(app: FastAPI):
     # Startup
     logging.info("Initializing database...")
     await init_database()
+    await get_ingest_queue().start()
+    get_ingest_queue().add_listener(get_analytics_cache().on_checks_recorded)
+    get_ingest_queue().add_listener(get_slo_tracker().on_checks_recorded)
+    get_ingest_queue().add_listener(get_security_inventory().on_checks_recorded)
+    await get_live_state().start()
+    get_ingest_queue().add_listener(get_live_state().on_checks_recorded)
+    get_live_state().add_listener(get_event_broker().on_state_changed)
+    await get_slo_tracker().start()
     logging.info("Starting site monitoring...")
     await monitor.start()
+    await get_retention().start()
+    await get_security_inventory().start()
     logging.info("Application startup complete")
     
     yield
         
     # Shutdown
     logging.info("Shutting down application...")
+    await get_security_inventory().stop()
+    await get_retention().stop()
+    await get_slo_tracker().stop()
+    await get_check_jobs().stop()
     await monitor.stop()
+    await get_ingest_queue().stop()
+    await close_database()
     logging.info("Application shutdown complete")
 
 # Create FastAPI app
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl, field_validator, validator, constr
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 import re
 from .config import settings
@@ -8,6 +8,11 @@ class SiteCreate(BaseModel):
     url: str
     name: constr(min_length=1)
     scan_interval: str
+    force_cold_connection: bool = False
+    check_method: str = "GET"
+    max_body_bytes: Optional[int] = None
+    assertion_is_regex: bool = False
+    content_assertion: Optional[str] = None
     
     @field_validator('url')
     @classmethod
@@ -73,6 +78,11 @@ class Site(BaseModel):
     url: str
     name: str
     scan_interval: str = "60s"
+    force_cold_connection: bool = False
+    check_method: str = "GET"
+    max_body_bytes: Optional[int] = None
+    content_assertion: Optional[str] = None
+    assertion_is_regex: bool = False
     created_at: datetime
 
 class SiteCheck(BaseModel):
@@ -82,6 +92,14 @@ class SiteCheck(BaseModel):
     response_time: Optional[float] = None
     status_code: Optional[int] = None
     error_message: Optional[str] = None
+    packet_loss: Optional[float] = None
+    jitter: Optional[float] = None
+    dns_time: Optional[float] = None
+    connect_time: Optional[float] = None
+    tls_time: Optional[float] = None
+    ttfb: Optional[float] = None
+    transfer_time: Optional[float] = None
+    body_bytes: Optional[int] = None
     checked_at: datetime
 
 class SiteStatus(BaseModel):
@@ -97,9 +115,11 @@ class SiteStatus(BaseModel):
     checked_at: Optional[datetime] = None
     total_up: int = 0
     total_down: int = 0
+    last_change_at: Optional[datetime] = None
 
 class MonitorStats(BaseModel):
     total_sites: int
     sites_up: int
     sites_down: int
-    average_response_time: Optional[float] = None 
\ No newline at end of file
+    average_response_time: Optional[float] = None
+    response_time_percentiles: Optional[Dict[str, Any]] = None
@@ -1,11 +1,28 @@
 import asyncio
 import logging
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import httpx
-from .database import get_sites, record_check, get_site_status
+from .database import get_sites
 from .config import settings
+from .scheduler import CheckScheduler
+from .executor import CheckExecutor, PRIORITY_DOWN, PRIORITY_NORMAL
+from .icmp import IcmpEngine
+from .resolver import ResolvedTransport, get_resolver, pinned_resolution
+from .ingest import get_ingest_queue, utc_timestamp
+from .content import StreamMatcher
+from .security import connection_security
 import re
+import socket
+from urllib.parse import urlparse
+
+# HTTP/2 support in httpx needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+    logging.warning("h2 library not available. HTTP checks will use HTTP/1.1 only.")
 
 # Import ping3 for native ICMP ping
 try:
@@ -13,7 +30,7 @@ try:
     PING3_AVAILABLE = True
 except ImportError:
     PING3_AVAILABLE = False
-    logging.warning("ping3 library not available. Ping monitoring will be disabled.")
+    logging.warning("ping3 library not available. Ping fallback will be disabled.")
 
 logger = logging.getLogger(__name__)
 
@@ -22,71 +39,121 @@ class SiteMonitor:
     The SiteMonitor is responsible for periodically checking the status of all registered sites.
     """
     def __init__(self):
-        self.sites: List[Dict[str, Any]] = []
+        self._sites: Dict[int, Dict[str, Any]] = {}
+        self.scheduler = CheckScheduler(spread_seconds=settings.SCHEDULER_SPREAD_SECONDS)
         self._task: Optional[asyncio.Task] = None
+        self._batches: set = set()
+        self.executor = CheckExecutor(
+            max_concurrency=settings.CHECK_MAX_CONCURRENCY,
+            max_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_per_ip=settings.CHECK_MAX_PER_IP,
+            resolve=self._resolve_host,
+        )
+        self._last_status: Dict[int, str] = {}
+        self._security_refreshed: Dict[int, float] = {}  # site_id -> monotonic time of its last TLS handshake
+        self.icmp = IcmpEngine()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pool = None  # WorkerPool when checks run in worker processes
         self.is_running = False
 
+    @property
+    def sites(self) -> List[Dict[str, Any]]:
+        """The sites currently being monitored."""
+        return list(self._sites.values())
+
     async def start(self):
-        """Starts the monitoring background task."""
+        """
+        Starts the monitoring background task, or the sharded worker processes
+        when CHECK_WORKERS is set.
+        """
         if not self.is_running:
             self.is_running = True
+            if settings.CHECK_WORKERS > 0:
+                from .workers import WorkerPool
+                self._pool = WorkerPool(self._persist_results)
+                await self._pool.start(settings.CHECK_WORKERS)
             await self.refresh_monitoring()
+            if self._pool is None:
+                self._task = asyncio.create_task(self._monitor_loop())
             logger.info("Site monitor started.")
 
     async def stop(self):
         """Stops the monitoring background task."""
-        if self.is_running and self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                logger.info("Monitoring task successfully cancelled.")
+        if self.is_running:
+            if self._task:
+                self._task.cancel()
+                try:
+                    await self._task
+                except asyncio.CancelledError:
+                    logger.info("Monitoring task successfully cancelled.")
+            if self._pool is not None:
+                await self._pool.stop()
+                self._pool = None
+            await self._cancel_batches()
+            await self.executor.close()
+            await self._close_client()
+            self.icmp.close()
+            self._task = None
             self.is_running = False
             logger.info("Site monitor stopped.")
 
     async def refresh_monitoring(self):
         """
-        Refreshes the list of sites from the database and restarts the
-        monitoring loop with the updated list.
+        Reconciles the monitored sites with the database. Only sites that were
+        added, removed or changed are touched; every other site keeps its place
+        in the schedule.
         """
-        if self._task:
-            # Cancel the existing task before refreshing
-            if not self._task.done():
-                self._task.cancel()
-                try:
-                    await self._task
-                except asyncio.CancelledError:
-                    pass # Expected
-        
-        self.sites = await get_sites()
-        
-        if self.is_running:
-            self._task = asyncio.create_task(self._monitor_loop())
-        
-        logger.info(f"Monitoring refreshed. Tracking {len(self.sites)} sites.")
+        db_sites = {site['id']: site for site in await get_sites()}
 
-    async def _monitor_loop(self):
-        """The main loop that checks sites at their specified intervals."""
-        last_check_times = {site['id']: 0 for site in self.sites}
+        for site_id in set(self._sites) - set(db_sites):
+            self.untrack_site(site_id)
+        for site in db_sites.values():
+            self.track_site(site)
+
+        logger.info(f"Monitoring refreshed. Tracking {len(self._sites)} sites.")
+
+    def track_site(self, site: Dict[str, Any], immediate: bool = False):
+        """
+        Adds a site to the running scheduler, or updates it in place if it is
+        already tracked. New sites are checked straight away when ``immediate``
+        is set, otherwise after their deterministic jitter offset.
+        """
+        interval = self._parse_interval(site['scan_interval'])
+        existing = self._sites.get(site['id'])
+        self._sites[site['id']] = site
+
+        if self._pool is not None:
+            if existing != site:
+                self._pool.assign(site, immediate=immediate)
+        elif existing is None:
+            self.scheduler.add(site['id'], interval, immediate=immediate)
+            logger.debug(f"Tracking site {site['id']} every {interval}s")
+        elif existing.get('scan_interval') != site.get('scan_interval'):
+            self.scheduler.update(site['id'], interval)
+            logger.debug(f"Site {site['id']} interval changed to {interval}s")
+
+    def untrack_site(self, site_id: int):
+        """Removes a site from the running scheduler."""
+        if self._sites.pop(site_id, None) is not None:
+            if self._pool is not None:
+                self._pool.unassign(site_id)
+            self.scheduler.remove(site_id)
+            self._last_status.pop(site_id, None)
+            self._security_refreshed.pop(site_id, None)
+            logger.debug(f"Stopped tracking site {site_id}")
 
+    async def _monitor_loop(self):
+        """The main loop that sleeps until the next site deadline and dispatches due checks."""
         while True:
             try:
-                current_time = time.time()
-                sites_to_check_tasks = []
-
-                for site in self.sites:
-                    interval_seconds = self._parse_interval(site['scan_interval'])
-                    if current_time - last_check_times.get(site['id'], 0) >= interval_seconds:
-                        sites_to_check_tasks.append(site)
-                
-                if sites_to_check_tasks:
-                    results = await self.check_sites(sites_to_check_tasks)
-                    for site, result in zip(sites_to_check_tasks, results):
-                        if result: # Ensure result is not None
-                            await record_check(site['id'], **result)
-                            last_check_times[site['id']] = current_time
-
-                await asyncio.sleep(1) 
+                due = await self.scheduler.wait_due()
+                batch = [self._sites[site_id] for site_id, _ in due if site_id in self._sites]
+                if batch:
+                    # Run the batch in the background so a slow check never delays
+                    # the next deadline.
+                    task = asyncio.create_task(self._run_batch(batch, dict(due)))
+                    self._batches.add(task)
+                    task.add_done_callback(self._batches.discard)
             except asyncio.CancelledError:
                 logger.info("Monitor loop cancelled.")
                 break
@@ -94,84 +161,316 @@ class SiteMonitor:
                 logger.error(f"Error in monitor loop: {e}", exc_info=True)
                 await asyncio.sleep(5) # Avoid rapid-fire errors
 
-    async def check_sites(self, sites: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
-        """Checks a list of sites concurrently."""
-        # Separate HTTP/HTTPS sites from ping sites
-        http_sites = [site for site in sites if not site['url'].startswith('ping://')]
-        ping_sites = [site for site in sites if site['url'].startswith('ping://')]
-        
-        results = []
-        
-        # Check HTTP/HTTPS sites with httpx client
-        if http_sites:
-            async with httpx.AsyncClient(verify=False, timeout=10) as client:
-                http_tasks = [self.check_single_site(client, site) for site in http_sites]
-                http_results = await asyncio.gather(*http_tasks, return_exceptions=True)
-                results.extend(http_results)
-        
-        # Check ping sites separately
-        if ping_sites:
-            ping_tasks = [self.check_ping_site(site) for site in ping_sites]
-            ping_results = await asyncio.gather(*ping_tasks, return_exceptions=True)
-            results.extend(ping_results)
-        
-        # Reorder results to match original site order
-        if http_sites and ping_sites:
-            ordered_results = []
-            http_idx = ping_idx = 0
-            for site in sites:
-                if site['url'].startswith('ping://'):
-                    ordered_results.append(ping_results[ping_idx])
-                    ping_idx += 1
-                else:
-                    ordered_results.append(http_results[http_idx])
-                    http_idx += 1
-            return ordered_results
-        
-        return results
-
-    async def check_all_sites(self) -> List[Optional[Dict[str, Any]]]:
-        """Manually triggers a check of all sites."""
-        return await self.check_sites(self.sites)
-    
-    async def check_sites_by_id(self, site_ids: Optional[List[int]] = None) -> List[Optional[Dict[str, Any]]]:
-        """Manually triggers a check for a specific list of site IDs."""
-        if site_ids is None:
-            return await self.check_all_sites()
-        
-        sites_to_check = [site for site in self.sites if site['id'] in site_ids]
-        return await self.check_sites(sites_to_check)
+    async def _run_batch(self, sites: List[Dict[str, Any]], overdue: Dict[int, float]):
+        """Checks a batch of due sites and records the results."""
+        try:
+            results = await self.check_sites(sites, overdue)
+            records = [
+                (site['id'], result) for site, result in zip(sites, results)
+                if isinstance(result, dict) # Skip failed checks and exceptions
+            ]
+            await self._persist_results(records)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error running check batch: {e}", exc_info=True)
+
+    async def _persist_results(self, records: List[Tuple[int, Dict[str, Any]]]):
+        """Hands a batch of ``(site_id, result)`` check results to the ingest queue."""
+        for site_id, result in records:
+            self._last_status[site_id] = result['status']
+        await get_ingest_queue().put_many(records)
+
+    async def _cancel_batches(self):
+        """Cancels any in-flight check batches."""
+        for task in list(self._batches):
+            task.cancel()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        self._batches.clear()
+
+    @staticmethod
+    def _create_client(cold: bool = False) -> httpx.AsyncClient:
+        """
+        Builds an HTTP client for site checks. Cold clients never keep
+        connections alive. New connections go to the shared resolver's
+        addresses (see ResolvedTransport), so a check's DNS lookup is done
+        once, before the request, and the connect phase is TCP only. Checks
+        never go through a proxy, even if one is set in the environment.
+        """
+        if cold:
+            limits = httpx.Limits(max_connections=1, max_keepalive_connections=0)
+        else:
+            limits = httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            )
+        http2 = settings.HTTP2_ENABLED and H2_AVAILABLE
+        return httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT_SECONDS,
+            transport=ResolvedTransport(limits, http2=http2),
+            trust_env=False,  # Checks connect directly; proxies aren't supported
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Returns the long-lived pooled client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    async def _close_client(self):
+        """Closes the pooled client and its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _check_http_site(self, site: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Checks an HTTP/HTTPS site over a warm pooled connection, or a cold one
+        if requested or its TLS details are due a refresh. DNS goes through the shared resolver so its time is
+        recorded separately as ``dns_time`` (None when served from cache); a
+        new connection then reuses that answer, so ``connect_time`` is the
+        TCP connect alone.
+        """
+        host = urlparse(site['url']).hostname
+        resolution = await get_resolver().resolve(host) if host else None
+        if resolution is not None and resolution.error:
+            return {
+                "status": "down",
+                "status_code": None,
+                "response_time": resolution.elapsed or 0,
+                "error_message": f"DNS resolution failed: {resolution.error}",
+                "dns_time": resolution.elapsed,
+            }
+
+        refresh_security = self._security_refresh_due(site)
+        with pinned_resolution(resolution):
+            if site.get('force_cold_connection') or refresh_security:
+                async with self._create_client(cold=True) as client:
+                    result = await self.check_single_site(client, site)
+            else:
+                result = await self.check_single_site(self._get_client(), site)
+
+        if refresh_security or (result is not None and result.get("security")):
+            self._security_refreshed[site['id']] = time.monotonic()
+        if result is not None and resolution is not None:
+            result["dns_time"] = resolution.elapsed
+        return result
+
+    def _security_refresh_due(self, site: Dict[str, Any]) -> bool:
+        """
+        Whether an HTTPS site's check should handshake on a fresh connection:
+        TLS details are captured on new connections only, so a site served
+        over a long-lived pooled connection would otherwise keep reporting the
+        certificate of its first handshake and miss renewals.
+        """
+        if not site['url'].startswith('https://'):
+            return False
+        refreshed = self._security_refreshed.get(site['id'])
+        return refreshed is None or time.monotonic() - refreshed >= settings.SECURITY_INVENTORY_TTL_SECONDS
+
+    @staticmethod
+    async def _resolve_host(host: str) -> Optional[str]:
+        """Resolves a host to its first address, used to key per-IP limits."""
+        return await get_resolver().resolve_first(host)
+
+    async def _submit_check(self, site: Dict[str, Any], overdue: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Queues a single site check on the executor. Down sites and overdue sites go first."""
+        url = site['url']
+        if url.startswith('ping://'):
+            host = url[len('ping://'):]
+            check = lambda: self.check_ping_site(site)
+        else:
+            host = urlparse(url).hostname or url
+            check = lambda: self._check_http_site(site)
+
+        priority = PRIORITY_DOWN if self._last_status.get(site['id']) == 'down' else PRIORITY_NORMAL
+        return await self.executor.submit(check, host, priority=priority, overdue=overdue)
+
+    async def check_sites(self, sites: List[Dict[str, Any]],
+                          overdue: Optional[Dict[int, float]] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Checks a list of sites through the bounded executor. Results are
+        returned in the same order as ``sites``.
+        """
+        overdue = overdue or {}
+        tasks = [self._submit_check(site, overdue.get(site['id'], 0.0)) for site in sites]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def check_and_record(self, site: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Checks a site outside its schedule (e.g. a manual check) through the
+        executor and records the result like a scheduled one.
+        """
+        result = await self._submit_check(site)
+        if isinstance(result, dict):
+            result = {**result, "checked_at": utc_timestamp()}
+            await self._persist_results([(site['id'], result)])
+        return result
+
+    @staticmethod
+    def _phase_timings(marks: Dict[str, float]) -> Dict[str, Optional[float]]:
+        """
+        Turns httpcore trace marks into per-phase durations in seconds. Phases
+        that didn't happen (e.g. connect/TLS on a reused connection) are None.
+        Event names are normalised by dropping the http11./http2./connection. prefix.
+        """
+        def span(start_event: str, end_event: str) -> Optional[float]:
+            start, end = marks.get(start_event), marks.get(end_event)
+            return end - start if start is not None and end is not None else None
+
+        return {
+            "connect_time": span("connect_tcp.started", "connect_tcp.complete"),
+            "tls_time": span("start_tls.started", "start_tls.complete"),
+            "ttfb": span("send_request_headers.started", "receive_response_headers.complete"),
+            "transfer_time": span("receive_response_headers.complete", "receive_response_body.complete"),
+        }
+
+    @staticmethod
+    def _connection_security(response: httpx.Response) -> Optional[Dict[str, Any]]:
+        """TLS details of the connection a response arrived on, or None if it isn't TLS."""
+        stream = response.extensions.get("network_stream")
+        ssl_object = stream.get_extra_info("ssl_object") if stream is not None else None
+        if ssl_object is None:
+            return None
+        try:
+            return connection_security(ssl_object, response.http_version)
+        except Exception as e:
+            logger.debug(f"Could not read TLS details for {response.url}: {e}")
+            return None
 
     @staticmethod
     async def check_single_site(client: httpx.AsyncClient, site: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Performs a single check for a given site (HTTP/HTTPS)."""
+        """
+        Performs a single check for a given site (HTTP/HTTPS), timing each
+        connection phase through httpx's trace extension.
+
+        The body is streamed and reading stops at the site's byte cap (wire
+        bytes), or as soon as the optional content assertion matches. HEAD
+        checks never read a body. Checks that open a new TLS connection attach
+        what it negotiated as ``security`` (see security.connection_security).
+        """
         url = site['url']
-        start_time = time.time()
+        method = (site.get('check_method') or 'GET').upper()
+        max_body_bytes = site.get('max_body_bytes') or settings.HTTP_MAX_BODY_BYTES
+        assertion = site.get('content_assertion')
+        matcher = StreamMatcher(
+            assertion, bool(site.get('assertion_is_regex')), settings.HTTP_ASSERTION_WINDOW_BYTES
+        ) if assertion and method != 'HEAD' else None
+        marks: Dict[str, float] = {}
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            marks[event_name.split('.', 1)[1]] = time.perf_counter()
+
+        start_time = time.perf_counter()
         try:
-            response = await client.get(url)
-            response_time = time.time() - start_time
-            return {
-                "status": "up" if response.is_success else "down",
+            async with client.stream(method, url, extensions={"trace": trace}) as response:
+                headers_time = time.perf_counter()
+                security = SiteMonitor._connection_security(response) if "start_tls.complete" in marks else None
+                if method != 'HEAD':
+                    async for chunk in response.aiter_bytes():
+                        if matcher is not None and matcher.feed(chunk):
+                            break
+                        if response.num_bytes_downloaded >= max_body_bytes:
+                            break
+                end_time = time.perf_counter()
+                body_bytes = response.num_bytes_downloaded
+
+            timings = SiteMonitor._phase_timings(marks)
+            # Measure transfer ourselves: an early stop never completes the body trace
+            timings["transfer_time"] = end_time - headers_time if method != 'HEAD' else None
+
+            is_up = response.is_success
+            error_message = None if is_up else response.reason_phrase
+            if is_up and matcher is not None and not matcher.matched:
+                is_up = False
+                error_message = f"Content assertion not matched in first {body_bytes} bytes"
+
+            result = {
+                "status": "up" if is_up else "down",
                 "status_code": response.status_code,
-                "response_time": response_time,
-                "error_message": None if response.is_success else response.reason_phrase,
+                "response_time": end_time - start_time,
+                "error_message": error_message,
+                "body_bytes": body_bytes,
+                **timings,
             }
+            if security:
+                result["security"] = security
+            return result
         except httpx.RequestError as e:
-            response_time = time.time() - start_time
+            response_time = time.perf_counter() - start_time
             logger.warning(f"Request failed for {url}: {e}")
             return {
                 "status": "down",
                 "status_code": None,
                 "response_time": response_time,
                 "error_message": str(e),
+                **SiteMonitor._phase_timings(marks),
             }
         except Exception as e:
             logger.error(f"Unexpected error checking site {url}: {e}", exc_info=True)
             return None # Indicate a failure in the check itself
 
+    async def check_ping_site(self, site: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Performs a ping check for a given site (ping://) on the shared asyncio
+        ICMP engine, falling back to ping3 if no ICMP socket can be opened.
+        """
+        url = site['url']
+        host = url.replace('ping://', '')
+
+        if not self.icmp.available:
+            return await self._check_ping_site_ping3(host)
+
+        try:
+            resolution = await get_resolver().resolve(host, family=socket.AF_INET)
+            if resolution.error:
+                return {
+                    "status": "down",
+                    "status_code": None,
+                    "response_time": 0,
+                    "error_message": "Host unknown or cannot resolve",
+                    "dns_time": resolution.elapsed,
+                }
+
+            probe = await self.icmp.probe(
+                resolution.address,
+                count=settings.PING_COUNT,
+                interval=settings.PING_INTERVAL_SECONDS,
+                timeout=settings.PING_TIMEOUT_SECONDS,
+            )
+            if probe["received"]:
+                return {
+                    "status": "up",
+                    "status_code": 0,  # Use 0 for successful ping
+                    "response_time": probe["rtt_avg"],
+                    "error_message": None,
+                    "packet_loss": probe["packet_loss"],
+                    "jitter": probe["jitter"],
+                    "dns_time": resolution.elapsed,
+                }
+            return {
+                "status": "down",
+                "status_code": None,
+                "response_time": settings.PING_TIMEOUT_SECONDS,  # Timeout duration
+                "error_message": "Ping timeout",
+                "packet_loss": probe["packet_loss"],
+                "jitter": None,
+                "dns_time": resolution.elapsed,
+            }
+        except Exception as e:
+            logger.error(f"Error pinging {host}: {e}")
+            return {
+                "status": "down",
+                "status_code": None,
+                "response_time": 0,
+                "error_message": str(e),
+            }
+
     @staticmethod
-    async def check_ping_site(site: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Performs a ping check for a given site (ping://) using native ping3 library."""
+    async def _check_ping_site_ping3(host: str) -> Optional[Dict[str, Any]]:
+        """Single-packet ping using ping3 in a worker thread (fallback when no ICMP socket is available)."""
         if not PING3_AVAILABLE:
             return {
                 "status": "down",
@@ -180,25 +479,21 @@ class SiteMonitor:
                 "error_message": "ping3 library not available",
             }
         
-        url = site['url']
-        host = url.replace('ping://', '')
-        
         try:
-            # Use ping3 for native ICMP ping
             # Run in thread pool to avoid blocking the event loop
             loop = asyncio.get_event_loop()
             response_time = await loop.run_in_executor(
                 None, 
-                lambda: ping3.ping(host, timeout=4, unit='s')
+                lambda: ping3.ping(host, timeout=settings.PING_TIMEOUT_SECONDS, unit='s')
             )
             
-            if response_time is not None:
-                # Successful ping
+            if response_time is None:
+                # Timeout
                 return {
-                    "status": "up",
-                    "status_code": 0,  # Use 0 for successful ping
-                    "response_time": response_time,
-                    "error_message": None,
+                    "status": "down",
+                    "status_code": None,
+                    "response_time": settings.PING_TIMEOUT_SECONDS,  # Timeout duration
+                    "error_message": "Ping timeout",
                 }
             elif response_time is False:
                 # Host unknown/cannot resolve
@@ -209,12 +504,12 @@ class SiteMonitor:
                     "error_message": "Host unknown or cannot resolve",
                 }
             else:
-                # Timeout (response_time is None)
+                # Successful ping
                 return {
-                    "status": "down",
-                    "status_code": None,
-                    "response_time": 4.0,  # Timeout duration
-                    "error_message": "Ping timeout",
+                    "status": "up",
+                    "status_code": 0,  # Use 0 for successful ping
+                    "response_time": response_time,
+                    "error_message": None,
                 }
         except Exception as e:
             logger.error(f"Error pinging {host}: {e}")
@@ -243,23 +538,34 @@ class SiteMonitor:
         
         return max(settings.MIN_SCAN_INTERVAL_SECONDS, min(value, settings.MAX_SCAN_INTERVAL_SECONDS))
 
-    async def get_stats(self) -> Dict[str, Any]:
-        """Get monitoring statistics."""
-        sites_status = await get_site_status()
-        total_sites = len(sites_status)
-        sites_up = sum(1 for s in sites_status if s.get('status') == 'up')
-        sites_down = total_sites - sites_up
-        
-        up_sites_with_time = [s for s in sites_status if s.get('status') == 'up' and s.get('response_time') is not None]
-        avg_response_time = None
-        if up_sites_with_time:
-            avg_response_time = sum(s['response_time'] for s in up_sites_with_time) / len(up_sites_with_time)
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Get scheduler lateness and drift statistics (per worker when sharded)."""
+        if self._pool is not None:
+            return self._worker_stats("scheduler")
+        return self.scheduler.stats()
+
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """Get check executor queue depth and wait time statistics (per worker when sharded)."""
+        if self._pool is not None:
+            return self._worker_stats("executor")
+        return self.executor.stats()
+
+    def get_worker_stats(self) -> Dict[str, Any]:
+        """Get check worker pool statistics."""
+        if self._pool is None:
+            return {"workers": 0}
+        return self._pool.stats()
+
+    def scale_workers(self, count: int):
+        """Changes the number of check worker processes, rebalancing sites onto them."""
+        if self._pool is None:
+            raise ValueError("Sharded check workers are disabled (CHECK_WORKERS=0).")
+        self._pool.scale(count)
 
+    def _worker_stats(self, key: str) -> Dict[str, Any]:
+        per_worker = self._pool.stats()["per_worker"]
         return {
-            "total_sites": total_sites,
-            "sites_up": sites_up,
-            "sites_down": sites_down,
-            "average_response_time": avg_response_time,
+            "workers": {worker_id: stats.get(key) for worker_id, stats in per_worker.items()}
         }
 
 # --- Singleton Pattern ---
@@ -0,0 +1,301 @@
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import httpcore
+import httpx
+
+from .config import settings
+
+# aiodns gives us record TTLs; without it we fall back to getaddrinfo and a fixed TTL
+try:
+    import aiodns
+    AIODNS_AVAILABLE = True
+except ImportError:
+    AIODNS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class Resolution(NamedTuple):
+    """Result of a lookup. ``elapsed`` is the lookup time, or None if served from cache."""
+    host: str
+    addresses: List[str]
+    ttl: float
+    elapsed: Optional[float]
+    error: Optional[str] = None
+
+    @property
+    def address(self) -> Optional[str]:
+        return self.addresses[0] if self.addresses else None
+
+
+class DnsResolver:
+    """
+    Shared async resolver with a TTL-respecting positive cache, a negative
+    cache for failed lookups and in-flight deduplication, so concurrent
+    lookups for the same name share one query.
+    """
+
+    def __init__(self):
+        self._cache: Dict[Tuple[str, int], Tuple[float, Resolution]] = {}
+        self._inflight: Dict[Tuple[str, int], asyncio.Task] = {}
+        self._aiodns = None
+
+        # Statistics
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._deduplicated = 0
+        self._failures = 0
+        self._lookups = 0
+        self._lookup_time_total = 0.0
+        self._lookup_time_max = 0.0
+
+    async def resolve(self, host: str, family: int = socket.AF_UNSPEC) -> Resolution:
+        """Resolves ``host``, returning cached results while their TTL lasts."""
+        if _is_ip_literal(host):
+            address = host.strip("[]")
+            return Resolution(address, [address], float("inf"), None)
+
+        key = (host.lower(), family)
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, resolution = cached
+            if expires_at > time.monotonic():
+                if resolution.error:
+                    self._negative_hits += 1
+                else:
+                    self._hits += 1
+                return resolution._replace(elapsed=None)
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self._misses += 1
+            task = asyncio.create_task(self._lookup(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._deduplicated += 1
+        return await asyncio.shield(task)
+
+    async def resolve_first(self, host: str, family: int = socket.AF_UNSPEC) -> Optional[str]:
+        """Resolves ``host`` and returns its first address, or None."""
+        return (await self.resolve(host, family)).address
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "aiodns" if AIODNS_AVAILABLE else "getaddrinfo",
+            "cached_names": len(self._cache),
+            "hits": self._hits,
+            "negative_hits": self._negative_hits,
+            "misses": self._misses,
+            "deduplicated": self._deduplicated,
+            "failures": self._failures,
+            "lookup_time_avg": self._lookup_time_total / self._lookups if self._lookups else None,
+            "lookup_time_max": self._lookup_time_max,
+        }
+
+    def clear(self):
+        self._cache.clear()
+
+    async def _lookup(self, key: Tuple[str, int]) -> Resolution:
+        host, family = key
+        start = time.perf_counter()
+        try:
+            addresses, ttl = await asyncio.wait_for(
+                self._query(host, family), timeout=settings.DNS_TIMEOUT_SECONDS
+            )
+            error = None if addresses else "No addresses found"
+        except Exception as e:
+            addresses, ttl, error = [], None, str(e) or type(e).__name__
+        elapsed = time.perf_counter() - start
+
+        self._lookups += 1
+        self._lookup_time_total += elapsed
+        self._lookup_time_max = max(self._lookup_time_max, elapsed)
+        if error:
+            self._failures += 1
+            ttl = settings.DNS_NEGATIVE_TTL_SECONDS
+            logger.debug(f"DNS lookup failed for {host}: {error}")
+        else:
+            ttl = min(max(ttl, settings.DNS_MIN_TTL_SECONDS), settings.DNS_MAX_TTL_SECONDS)
+
+        resolution = Resolution(host, addresses, ttl, elapsed, error)
+        if len(self._cache) >= settings.DNS_CACHE_MAX_ENTRIES:
+            # Evict the oldest entry (dicts keep insertion order)
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = (time.monotonic() + ttl, resolution)
+        return resolution
+
+    async def _query(self, host: str, family: int) -> Tuple[List[str], float]:
+        """Returns ``(addresses, ttl)``, preferring IPv4 for AF_UNSPEC."""
+        if AIODNS_AVAILABLE:
+            if self._aiodns is None:
+                self._aiodns = aiodns.DNSResolver()
+            record_types = {socket.AF_INET: ("A",), socket.AF_INET6: ("AAAA",)}.get(family, ("A", "AAAA"))
+            for record_type in record_types:
+                try:
+                    records = await self._aiodns.query(host, record_type)
+                except aiodns.error.DNSError:
+                    continue
+                if records:
+                    return [r.host for r in records], min(r.ttl for r in records)
+            return [], None
+
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, family=family, type=socket.SOCK_STREAM)
+        addresses = []
+        for info in sorted(infos, key=lambda i: i[0] != socket.AF_INET):
+            if info[4][0] not in addresses:
+                addresses.append(info[4][0])
+        return addresses, settings.DNS_DEFAULT_TTL_SECONDS
+
+
+# The answer a check already got for its host, reused by connections it opens
+_pinned_resolution: ContextVar[Optional[Resolution]] = ContextVar("pinned_resolution", default=None)
+
+
+@contextmanager
+def pinned_resolution(resolution: Optional[Resolution]) -> Iterator[None]:
+    """Makes connections opened in this context use ``resolution`` for its host without another lookup."""
+    token = _pinned_resolution.set(resolution)
+    try:
+        yield
+    finally:
+        _pinned_resolution.reset(token)
+
+
+class ResolvedNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore network backend that connects to the addresses the shared
+    resolver has for a host, in order, instead of letting the socket layer
+    look the name up again. Inside ``pinned_resolution`` the check's own
+    answer is used even if its cache entry expired meanwhile, so a check
+    never looks its host up twice. TLS SNI and the Host header still come
+    from the request URL, so only the TCP destination changes.
+    """
+
+    def __init__(self):
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None,
+                          socket_options: Optional[Iterable[Any]] = None) -> httpcore.AsyncNetworkStream:
+        resolution = _pinned_resolution.get()
+        if resolution is None or resolution.host != host.lower().strip("[]"):
+            resolution = await get_resolver().resolve(host)
+        if resolution.error:
+            raise httpcore.ConnectError(f"DNS resolution failed: {resolution.error}")
+        error: Optional[Exception] = None
+        for address in resolution.addresses:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options: Optional[Iterable[Any]] = None) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float):
+        await self._backend.sleep(seconds)
+
+
+def _transport_error(error: Exception) -> httpx.TransportError:
+    """The httpx exception matching an httpcore one (they share class names)."""
+    for cls in type(error).__mro__:
+        mapped = getattr(httpx, cls.__name__, None)
+        if isinstance(mapped, type) and issubclass(mapped, httpx.TransportError):
+            return mapped(str(error))
+    return httpx.TransportError(str(error))
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream: Any):
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception as e:
+            if isinstance(e, (httpcore.TimeoutException, httpcore.NetworkError, httpcore.ProtocolError)):
+                raise _transport_error(e) from e
+            raise
+
+    async def aclose(self):
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class ResolvedTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport over an httpcore connection pool whose connections go
+    through ``ResolvedNetworkBackend``. Requests, responses and errors are
+    translated like httpx's own transport does; proxies aren't supported.
+    """
+
+    def __init__(self, limits: httpx.Limits, http2: bool = False):
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=False),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http2=http2,
+            network_backend=ResolvedNetworkBackend(),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        try:
+            response = await self._pool.handle_async_request(core_request)
+        except (httpcore.TimeoutException, httpcore.NetworkError, httpcore.ProtocolError,
+                httpcore.UnsupportedProtocol) as e:
+            raise _transport_error(e) from e
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._pool.aclose()
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+# --- Singleton Pattern ---
+_resolver_instance: Optional[DnsResolver] = None
+
+def get_resolver() -> DnsResolver:
+    """Returns the shared DnsResolver instance."""
+    global _resolver_instance
+    if _resolver_instance is None:
+        _resolver_instance = DnsResolver()
+    return _resolver_instance
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from .analytics_cache import get_analytics_cache
+from .config import settings
+from .database import (
+    get_rollup_coverage, get_sites_with_checks, get_storage_stats, incremental_vacuum,
+    prune_rollups, prune_site_checks, rebuild_rollups, vacuum,
+)
+
+logger = logging.getLogger(__name__)
+
+# auto_vacuum mode value for INCREMENTAL
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+def rollup_retention_days() -> Dict[int, float]:
+    """Retention per rollup resolution (seconds -> days, 0 = forever)."""
+    return {
+        60: settings.RETENTION_1M_ROLLUP_DAYS,
+        300: settings.RETENTION_5M_ROLLUP_DAYS,
+        3600: settings.RETENTION_1H_ROLLUP_DAYS,
+        86400: settings.RETENTION_1D_ROLLUP_DAYS,
+    }
+
+
+class RetentionManager:
+    """
+    Background task enforcing the retention policy: raw checks older than
+    ``RETENTION_RAW_DAYS`` are deleted (their rollups stay), each rollup
+    resolution is pruned to its own horizon, and the freed pages are returned
+    to the OS with incremental vacuum. Deletes run in small batches, each its
+    own short write transaction, so ingest keeps flowing while it runs.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._rollups_verified = False
+        self._vacuum_warned = False
+
+        # Statistics
+        self._runs = 0
+        self._last_run: Optional[Dict[str, Any]] = None
+        self._total_rows_deleted = 0
+        self._total_bytes_reclaimed = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if not self.is_running:
+            self._task = asyncio.create_task(self._loop())
+            logger.info("Retention task started.")
+
+    async def stop(self):
+        if self.is_running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Retention task stopped.")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "policy": {
+                "raw_days": settings.RETENTION_RAW_DAYS,
+                "rollup_days": rollup_retention_days(),
+            },
+            "runs": self._runs,
+            "total_rows_deleted": self._total_rows_deleted,
+            "total_bytes_reclaimed": self._total_bytes_reclaimed,
+            "last_run": self._last_run,
+        }
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Retention run failed: {e}", exc_info=True)
+            await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Applies the policy once and returns what was reclaimed."""
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+
+        deleted: Dict[str, int] = {}
+        if settings.RETENTION_RAW_DAYS > 0:
+            await self._ensure_rollups()
+            cutoff = int((now - timedelta(days=settings.RETENTION_RAW_DAYS)).timestamp() * 1000)
+            deleted["site_checks"] = await self._prune_checks(cutoff)
+
+        for resolution, days in rollup_retention_days().items():
+            if days > 0:
+                cutoff = int((now - timedelta(days=days)).timestamp())
+                deleted[f"rollups_{resolution}s"] = await self._drain(
+                    lambda: prune_rollups(resolution, cutoff, settings.RETENTION_BATCH_SIZE)
+                )
+
+        reclaimed = await self._vacuum(await get_storage_stats())
+        after = await get_storage_stats()
+
+        rows = sum(deleted.values())
+        self._runs += 1
+        self._total_rows_deleted += rows
+        self._total_bytes_reclaimed += reclaimed
+        self._last_run = {
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "rows_deleted": deleted,
+            "bytes_reclaimed": reclaimed,         # Returned to the OS by incremental vacuum
+            "size_bytes": after["size_bytes"],
+            "free_bytes": after["free_bytes"],   # Free pages reused by later writes
+        }
+        if rows:
+            get_analytics_cache().invalidate()  # Cached charts may still show pruned buckets
+            logger.info(f"Retention deleted {rows} rows and reclaimed {reclaimed} bytes.")
+        return self._last_run
+
+    async def _ensure_rollups(self):
+        """Rebuilds rollups once if they don't cover the raw history yet (e.g. after an upgrade)."""
+        if self._rollups_verified:
+            return
+        raw, rolled_up = await get_rollup_coverage()
+        if rolled_up < raw:
+            logger.info(f"Rollups cover {rolled_up} of {raw} checks; rebuilding before pruning raw checks.")
+            await rebuild_rollups()
+        self._rollups_verified = True
+
+    async def _prune_checks(self, cutoff: int) -> int:
+        deleted = 0
+        for site_id in await get_sites_with_checks():
+            deleted += await self._drain(
+                lambda: prune_site_checks(site_id, cutoff, settings.RETENTION_BATCH_SIZE)
+            )
+        return deleted
+
+    @staticmethod
+    async def _drain(delete_batch) -> int:
+        """Runs ``delete_batch`` until it deletes nothing, pausing between batches."""
+        deleted = 0
+        while True:
+            count = await delete_batch()
+            deleted += count
+            if count < settings.RETENTION_BATCH_SIZE:
+                return deleted
+            await asyncio.sleep(settings.RETENTION_BATCH_PAUSE_SECONDS)
+
+    async def _vacuum(self, storage: Dict[str, int]) -> int:
+        """Returns free pages to the OS a step at a time; returns the bytes reclaimed."""
+        if storage["auto_vacuum"] != _AUTO_VACUUM_INCREMENTAL:
+            if not self._vacuum_warned:
+                self._vacuum_warned = True
+                logger.warning(
+                    "Database was created without incremental auto-vacuum: freed pages are reused "
+                    "but the file won't shrink. Run `python -m backend.app.retention vacuum` once to convert it."
+                )
+            return 0
+        free_pages = storage["freelist_count"]
+        while free_pages:
+            await incremental_vacuum(settings.RETENTION_VACUUM_PAGES)
+            remaining = (await get_storage_stats())["freelist_count"]
+            if remaining >= free_pages:
+                break
+            free_pages = remaining
+            await asyncio.sleep(settings.RETENTION_BATCH_PAUSE_SECONDS)
+        return (storage["freelist_count"] - free_pages) * storage["page_size"]
+
+
+# --- Singleton Pattern ---
+_retention_instance: Optional[RetentionManager] = None
+
+def get_retention() -> RetentionManager:
+    """Returns the shared RetentionManager instance."""
+    global _retention_instance
+    if _retention_instance is None:
+        _retention_instance = RetentionManager()
+    return _retention_instance
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point: ``python -m backend.app.retention {run,vacuum}``."""
+    parser = argparse.ArgumentParser(description="Apply the check retention policy.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("run", help="Apply the retention policy once.")
+    commands.add_parser("vacuum", help="Rebuild the database file and enable incremental vacuum "
+                                       "(blocks writes; stop the server first).")
+    args = parser.parse_args(argv)
+
+    from .database import close_database, init_database
+
+    async def run():
+        await init_database()
+        try:
+            if args.command == "vacuum":
+                before = await get_storage_stats()
+                await vacuum()
+                after = await get_storage_stats()
+                print(f"Vacuumed: {before['size_bytes']} -> {after['size_bytes']} bytes")
+            else:
+                print(await RetentionManager().run_once())
+        finally:
+            await close_database()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .sketch import DDSketch
+
+# Rollup resolutions in seconds: 1 minute, 5 minutes, 1 hour, 1 day
+RESOLUTIONS = (60, 300, 3600, 86400)
+
+# (site_id, resolution, bucket start in epoch seconds)
+RollupKey = Tuple[int, int, int]
+
+# Latency quantiles reported by default
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RollupBucket:
+    """
+    Aggregate of the checks for one site in one time bucket. Response time
+    statistics and the latency sketch only cover checks that were up and
+    reported a response time, matching what the analytics charts plot.
+    """
+
+    __slots__ = ("count", "up_count", "rt_count", "rt_sum", "rt_min", "rt_max", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.up_count = 0
+        self.rt_count = 0
+        self.rt_sum = 0.0
+        self.rt_min: Optional[float] = None
+        self.rt_max: Optional[float] = None
+        self.sketch = DDSketch()
+
+    def add(self, status: str, response_time: Optional[float]):
+        self.count += 1
+        if status != 'up':
+            return
+        self.up_count += 1
+        if response_time is not None:
+            self.rt_count += 1
+            self.rt_sum += response_time
+            self.rt_min = response_time if self.rt_min is None else min(self.rt_min, response_time)
+            self.rt_max = response_time if self.rt_max is None else max(self.rt_max, response_time)
+            self.sketch.add(response_time)
+
+    def merge(self, other: "RollupBucket"):
+        self.count += other.count
+        self.up_count += other.up_count
+        self.rt_count += other.rt_count
+        self.rt_sum += other.rt_sum
+        for value in (other.rt_min, other.rt_max):
+            if value is not None:
+                self.rt_min = value if self.rt_min is None else min(self.rt_min, value)
+                self.rt_max = value if self.rt_max is None else max(self.rt_max, value)
+        self.sketch.merge(other.sketch)
+
+    def to_row(self) -> Tuple[Any, ...]:
+        """Values for the site_rollups aggregate columns (see ROLLUP_COLUMNS)."""
+        return (self.count, self.up_count, self.rt_count, self.rt_sum,
+                self.rt_min, self.rt_max, self.sketch.to_bytes())
+
+    @classmethod
+    def from_row(cls, row) -> "RollupBucket":
+        bucket = cls()
+        (bucket.count, bucket.up_count, bucket.rt_count, bucket.rt_sum,
+         bucket.rt_min, bucket.rt_max, sketch) = row
+        if sketch is not None:
+            bucket.sketch = DDSketch.from_bytes(sketch)
+        return bucket
+
+
+# Aggregate columns of site_rollups, in RollupBucket.to_row order
+ROLLUP_COLUMNS = ("count", "up_count", "rt_count", "rt_sum", "rt_min", "rt_max", "sketch")
+
+
+def bucket_start(epoch_seconds: float, resolution: int) -> int:
+    return int(epoch_seconds // resolution) * resolution
+
+
+def accumulate(checks: Iterable[Tuple[int, str, float, Optional[float]]],
+               into: Optional[Dict[RollupKey, RollupBucket]] = None) -> Dict[RollupKey, RollupBucket]:
+    """
+    Aggregates ``(site_id, status, epoch_seconds, response_time)`` checks into
+    buckets at every resolution.
+    """
+    buckets = {} if into is None else into
+    for site_id, status, epoch_seconds, response_time in checks:
+        for resolution in RESOLUTIONS:
+            key = (site_id, resolution, bucket_start(epoch_seconds, resolution))
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = RollupBucket()
+            bucket.add(status, response_time)
+    return buckets
+
+
+def pick_resolution(interval_seconds: int) -> Optional[int]:
+    """The coarsest rollup resolution whose buckets tile ``interval_seconds`` exactly, if any."""
+    fitting = [r for r in RESOLUTIONS if r <= interval_seconds and interval_seconds % r == 0]
+    return max(fitting) if fitting else None
+
+
+def cover_window(start: float, end: float) -> List[Tuple[int, int, int]]:
+    """
+    Splits the window ``[start, end)`` (epoch seconds, widened to whole
+    minutes) into ``(resolution, first bucket, end)`` ranges of whole rollup
+    buckets, using the coarsest resolution that fits each part, so a window of
+    any length is covered by a handful of bucket ranges.
+    """
+    finest = RESOLUTIONS[0]
+    ranges: List[Tuple[int, int, int]] = []
+
+    def split(low: int, high: int, level: int):
+        if low >= high:
+            return
+        resolution = RESOLUTIONS[level]
+        if level == 0:
+            ranges.append((resolution, low, high))
+            return
+        first = -(-low // resolution) * resolution
+        last = high // resolution * resolution
+        if first >= last:
+            split(low, high, level - 1)
+            return
+        split(low, first, level - 1)
+        ranges.append((resolution, first, last))
+        split(last, high, level - 1)
+
+    split(bucket_start(start, finest), -(-int(end) // finest) * finest, len(RESOLUTIONS) - 1)
+    return ranges
+
+
+def quantile_key(q: float) -> str:
+    """Response key for a quantile: 0.5 -> "p50", 0.999 -> "p99.9"."""
+    return f"p{round(q * 100, 6):g}"
+
+
+def summarize_latency(sketch: DDSketch, quantiles: Sequence[float] = LATENCY_QUANTILES) -> Dict[str, Any]:
+    """Sample count and response time quantiles (seconds) of a sketch."""
+    summary: Dict[str, Any] = {"count": sketch.count}
+    for q in quantiles:
+        summary[quantile_key(q)] = sketch.quantile(q)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point: ``python -m backend.app.rollups rebuild [--site ID ...]``."""
+    parser = argparse.ArgumentParser(description="Manage check rollup tables.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="Recompute rollups from the raw check history.")
+    rebuild.add_argument("--site", type=int, action="append", dest="site_ids",
+                         help="Only rebuild this site (repeatable).")
+    args = parser.parse_args(argv)
+
+    from .database import close_database, init_database, rebuild_rollups
+
+    async def run():
+        await init_database()
+        try:
+            checks = await rebuild_rollups(args.site_ids)
+        finally:
+            await close_database()
+        print(f"Rebuilt rollups from {checks} checks")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _ScheduleEntry:
+    """Per-site scheduling state."""
+    __slots__ = ("site_id", "interval", "due", "token", "last_dispatch")
+
+    def __init__(self, site_id: int, interval: float, due: float, token: int):
+        self.site_id = site_id
+        self.interval = interval
+        self.due = due
+        self.token = token
+        self.last_dispatch: Optional[float] = None
+
+
+class CheckScheduler:
+    """
+    Deadline heap of per-site next-due times.
+
+    Each site sits in the heap exactly once, keyed on its next due time
+    (``time.monotonic()`` based). Removing or rescheduling a site bumps its
+    token so stale heap entries are discarded lazily when they surface.
+    Idle cost is a single sleep until the earliest deadline, regardless of how
+    many sites are scheduled.
+    """
+
+    def __init__(self, spread_seconds: float = 60.0):
+        self.spread_seconds = spread_seconds
+        self._heap: List[Tuple[float, int, int]] = []
+        self._entries: Dict[int, _ScheduleEntry] = {}
+        self._counter = 0
+        self._changed = asyncio.Event()
+
+        # Timing statistics
+        self._dispatched = 0
+        self._lateness_total = 0.0
+        self._lateness_max = 0.0
+        self._lateness_last = 0.0
+        self._drift_total = 0.0
+        self._drift_samples = 0
+        self._drift_max = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, site_id: int) -> bool:
+        return site_id in self._entries
+
+    def phase(self, site_id: int, interval: float) -> float:
+        """Deterministic per-site offset in ``[0, min(interval, spread_seconds))``."""
+        window = min(interval, self.spread_seconds)
+        fraction = zlib.crc32(str(site_id).encode()) / 0x100000000
+        return fraction * window
+
+    def add(self, site_id: int, interval: float, now: Optional[float] = None,
+            immediate: bool = False) -> None:
+        """Schedule a site. Existing entries are replaced."""
+        now = time.monotonic() if now is None else now
+        due = now if immediate else now + self.phase(site_id, interval)
+        self._push(site_id, interval, due)
+
+    def update(self, site_id: int, interval: float, now: Optional[float] = None) -> None:
+        """Change a site's interval without resetting its position in the schedule."""
+        entry = self._entries.get(site_id)
+        if entry is None:
+            self.add(site_id, interval, now)
+            return
+        if entry.interval == interval:
+            return
+        now = time.monotonic() if now is None else now
+        # Pull the deadline in if the new interval is shorter, never push it out
+        # past what the old interval already promised.
+        anchor = entry.last_dispatch if entry.last_dispatch is not None else now
+        due = min(entry.due, max(now, anchor + interval))
+        self._push(site_id, interval, due, last_dispatch=entry.last_dispatch)
+
+    def remove(self, site_id: int) -> None:
+        """Stop scheduling a site. Its stale heap entry is skipped when popped."""
+        if self._entries.pop(site_id, None) is not None:
+            self._changed.set()
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._entries.clear()
+        self._changed.set()
+
+    def next_deadline(self) -> Optional[float]:
+        """Returns the earliest live deadline, discarding stale heap entries."""
+        while self._heap:
+            due, token, site_id = self._heap[0]
+            entry = self._entries.get(site_id)
+            if entry is not None and entry.token == token:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Pops every site whose deadline has passed and reschedules it one
+        interval after its previous deadline (skipping missed periods).
+        Returns ``(site_id, overdue_seconds)`` pairs.
+        """
+        now = time.monotonic() if now is None else now
+        due_sites = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                break
+            _, _, site_id = heapq.heappop(self._heap)
+            entry = self._entries[site_id]
+
+            lateness = now - entry.due
+            self._record_lateness(lateness)
+            if entry.last_dispatch is not None:
+                self._record_drift(abs((now - entry.last_dispatch) - entry.interval))
+            entry.last_dispatch = now
+
+            next_due = entry.due + entry.interval
+            if next_due <= now:
+                missed = int((now - next_due) // entry.interval) + 1
+                next_due += missed * entry.interval
+            self._push(site_id, entry.interval, next_due, last_dispatch=now, notify=False)
+            due_sites.append((site_id, lateness))
+        return due_sites
+
+    async def wait_due(self) -> List[Tuple[int, float]]:
+        """Sleeps until the next deadline (or a schedule change) and returns due sites."""
+        while True:
+            self._changed.clear()
+            now = time.monotonic()
+            due_sites = self.pop_due(now)
+            if due_sites:
+                return due_sites
+
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - now)
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduling lateness and drift figures, in seconds."""
+        deadline = self.next_deadline()
+        return {
+            "scheduled_sites": len(self._entries),
+            "heap_size": len(self._heap),
+            "next_due_in": None if deadline is None else max(0.0, deadline - time.monotonic()),
+            "dispatched": self._dispatched,
+            "lateness_last": self._lateness_last,
+            "lateness_avg": self._lateness_total / self._dispatched if self._dispatched else None,
+            "lateness_max": self._lateness_max,
+            "drift_avg": self._drift_total / self._drift_samples if self._drift_samples else None,
+            "drift_max": self._drift_max,
+        }
+
+    def _push(self, site_id: int, interval: float, due: float,
+              last_dispatch: Optional[float] = None, notify: bool = True) -> None:
+        self._counter += 1
+        entry = _ScheduleEntry(site_id, interval, due, self._counter)
+        entry.last_dispatch = last_dispatch
+        self._entries[site_id] = entry
+        heapq.heappush(self._heap, (due, self._counter, site_id))
+        # Compact when lazily-deleted entries dominate the heap.
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(e.due, e.token, e.site_id) for e in self._entries.values()]
+            heapq.heapify(self._heap)
+        if notify:
+            self._changed.set()
+
+    def _record_lateness(self, lateness: float) -> None:
+        self._dispatched += 1
+        self._lateness_last = lateness
+        self._lateness_total += lateness
+        self._lateness_max = max(self._lateness_max, lateness)
+
+    def _record_drift(self, drift: float) -> None:
+        self._drift_samples += 1
+        self._drift_total += drift
+        self._drift_max = max(self._drift_max, drift)
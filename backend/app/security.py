@@ -0,0 +1,511 @@
+import asyncio
+import logging
+import socket
+import ssl
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from .config import settings
+from .database import SECURITY_COLUMNS, get_site_security, get_sites
+from .resolver import get_resolver
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AGENT_PORT = "8081"
+
+# ALPN protocol -> HTTP version reported for the connection
+_ALPN_HTTP_VERSIONS = {"h2": "HTTP/2", "http/1.1": "HTTP/1.1"}
+
+# DER object identifiers of the name attributes reported for certificates
+_OID_COMMON_NAME = b"\x55\x04\x03"
+_OID_ORGANIZATION = b"\x55\x04\x0a"
+
+_verified_context: Optional[ssl.SSLContext] = None
+_unverified_context: Optional[ssl.SSLContext] = None
+
+
+def is_agent_site(site: Dict[str, Any]) -> bool:
+    """Whether a site is a monitoring agent (agent port, or agent in its URL or name)."""
+    url = site.get('url', '')
+    return (
+        f':{DEFAULT_AGENT_PORT}' in url or
+        'agent' in url.lower() or
+        site.get('name', '').lower().startswith('agent')
+    )
+
+
+def _context(verify: bool) -> ssl.SSLContext:
+    """Shared client contexts (loading the CA store once), offering h2 and HTTP/1.1 via ALPN."""
+    global _verified_context, _unverified_context
+    if verify:
+        if _verified_context is None:
+            _verified_context = ssl.create_default_context()
+            _verified_context.set_alpn_protocols(["h2", "http/1.1"])
+        return _verified_context
+    if _unverified_context is None:
+        _unverified_context = ssl.create_default_context()
+        _unverified_context.check_hostname = False
+        _unverified_context.verify_mode = ssl.CERT_NONE
+        _unverified_context.set_alpn_protocols(["h2", "http/1.1"])
+    return _unverified_context
+
+
+def _name_field(name: Tuple, field: str) -> Optional[str]:
+    for rdn in name or ():
+        for key, value in rdn:
+            if key == field:
+                return value
+    return None
+
+
+def certificate_details(cert: Dict[str, Any]) -> Dict[str, Any]:
+    """Subject, issuer, expiry and SANs of a certificate as returned by ``SSLSocket.getpeercert()``."""
+    if not cert:
+        return {}
+    details: Dict[str, Any] = {
+        'certificate_subject': _name_field(cert.get('subject'), 'commonName'),
+        'certificate_issuer': (_name_field(cert.get('issuer'), 'organizationName')
+                               or _name_field(cert.get('issuer'), 'commonName')),
+        'certificate_san': [value for kind, value in cert.get('subjectAltName', ()) if kind == 'DNS'],
+    }
+    if cert.get('notAfter'):
+        expires = ssl.cert_time_to_seconds(cert['notAfter'])
+        details['certificate_expires_at'] = datetime.fromtimestamp(expires, timezone.utc).isoformat()
+    return details
+
+
+def _der_element(data: bytes, pos: int) -> Tuple[int, int, int]:
+    """Tag, content start and content end of the DER element at ``pos``."""
+    tag, length = data[pos], data[pos + 1]
+    start = pos + 2
+    if length & 0x80:
+        size = length & 0x7f
+        length = int.from_bytes(data[start:start + size], 'big')
+        start += size
+    return tag, start, start + length
+
+
+def _der_children(data: bytes, element: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+    children = []
+    pos, end = element[1], element[2]
+    while pos < end:
+        child = _der_element(data, pos)
+        children.append(child)
+        pos = child[2]
+    return children
+
+
+def _der_name(data: bytes, element: Tuple[int, int, int]) -> Dict[bytes, str]:
+    """First value of each attribute of an X.509 Name, keyed by OID."""
+    fields: Dict[bytes, str] = {}
+    for rdn in _der_children(data, element):
+        for attribute in _der_children(data, rdn):
+            (_, oid_start, oid_end), (_, value_start, value_end) = _der_children(data, attribute)[:2]
+            fields.setdefault(data[oid_start:oid_end], data[value_start:value_end].decode('utf-8', 'replace'))
+    return fields
+
+
+def der_certificate_details(der: Optional[bytes]) -> Dict[str, Any]:
+    """
+    Subject, issuer and expiry of a DER certificate. Check connections don't
+    verify certificates, so ``getpeercert()`` is empty there and only the
+    binary form is available.
+    """
+    if not der:
+        return {}
+    try:
+        tbs = _der_children(der, _der_element(der, 0))[0]
+        fields = _der_children(der, tbs)
+        if fields[0][0] == 0xa0:  # Explicit version tag
+            fields = fields[1:]
+        issuer, validity, subject = _der_name(der, fields[2]), fields[3], _der_name(der, fields[4])
+        tag, start, end = _der_children(der, validity)[1]
+        expires = datetime.strptime(
+            der[start:end].decode('ascii'), '%y%m%d%H%M%SZ' if tag == 0x17 else '%Y%m%d%H%M%SZ'
+        ).replace(tzinfo=timezone.utc)
+    except (IndexError, ValueError) as e:
+        logger.debug(f"Could not parse peer certificate: {e}")
+        return {}
+    return {
+        'certificate_subject': subject.get(_OID_COMMON_NAME),
+        'certificate_issuer': issuer.get(_OID_ORGANIZATION) or issuer.get(_OID_COMMON_NAME),
+        'certificate_expires_at': expires.isoformat(),
+    }
+
+
+def connection_security(ssl_object: ssl.SSLObject, http_version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    TLS version, cipher, ALPN protocol and certificate details of an
+    established connection, e.g. the one a site check just used.
+    """
+    cipher = ssl_object.cipher()
+    alpn_protocol = ssl_object.selected_alpn_protocol()
+    info = {
+        'tls_version': ssl_object.version(),
+        'cipher_suite': cipher[0] if cipher else None,
+        'key_strength': cipher[2] if cipher else None,
+        'alpn_protocol': alpn_protocol,
+        'http_version': http_version or _ALPN_HTTP_VERSIONS.get(alpn_protocol, 'HTTP/1.1'),
+    }
+    info.update(der_certificate_details(ssl_object.getpeercert(binary_form=True)))
+    return info
+
+
+def with_certificate_expiry(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Adds days until the certificate expires, and whether that is within ``CERT_EXPIRY_WARNING_DAYS``."""
+    expires_at = info.get('certificate_expires_at')
+    if not expires_at:
+        return info
+    days = (datetime.fromisoformat(expires_at).timestamp() - time.time()) / 86400
+    return {
+        **info,
+        'certificate_days_remaining': round(days, 1),
+        'certificate_expiring': days < settings.CERT_EXPIRY_WARNING_DAYS,
+    }
+
+
+async def probe_tls(hostname: str, port: int, address: Optional[str] = None,
+                    timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Performs a TLS handshake without blocking the event loop and returns the
+    negotiated version, cipher, HTTP version (from ALPN) and certificate
+    details. Certificates that fail verification are still inspected with an
+    unverified handshake and reported with ``certificate_valid`` False.
+    """
+    timeout = settings.SECURITY_PROBE_TIMEOUT_SECONDS if timeout is None else timeout
+    info: Dict[str, Any] = {'certificate_valid': True}
+    try:
+        ssl_object = await _handshake(hostname, port, address, _context(verify=True), timeout)
+    except ssl.SSLCertVerificationError as e:
+        info = {'certificate_valid': False, 'certificate_error': e.verify_message or str(e)}
+        ssl_object = await _handshake(hostname, port, address, _context(verify=False), timeout)
+
+    cipher = ssl_object['cipher']
+    info.update({
+        'tls_version': ssl_object['version'],
+        'cipher_suite': cipher[0] if cipher else None,
+        'key_strength': cipher[2] if cipher else None,
+        'alpn_protocol': ssl_object['alpn'],
+        'http_version': _ALPN_HTTP_VERSIONS.get(ssl_object['alpn'], 'HTTP/1.1'),
+    })
+    info.update(certificate_details(ssl_object['cert']))
+    return info
+
+
+async def _handshake(hostname: str, port: int, address: Optional[str],
+                     context: ssl.SSLContext, timeout: float) -> Dict[str, Any]:
+    _, writer = await asyncio.wait_for(
+        asyncio.open_connection(address or hostname, port, ssl=context, server_hostname=hostname),
+        timeout,
+    )
+    try:
+        ssl_object = writer.get_extra_info('ssl_object')
+        return {
+            'version': ssl_object.version(),
+            'cipher': ssl_object.cipher(),
+            'alpn': ssl_object.selected_alpn_protocol(),
+            'cert': ssl_object.getpeercert() if context.verify_mode != ssl.CERT_NONE else {},
+        }
+    finally:
+        writer.close()
+        try:
+            await asyncio.wait_for(writer.wait_closed(), timeout)
+        except Exception:
+            pass
+
+
+def _site_base_info(url: str) -> Dict[str, Any]:
+    parsed_url = urlparse(url)
+    return {
+        'protocol': parsed_url.scheme,
+        'is_encrypted': parsed_url.scheme in ['https', 'wss'],
+        'hostname': parsed_url.hostname,
+        'port': parsed_url.port or (443 if parsed_url.scheme == 'https' else 80),
+        'tls_version': None,
+        'cipher_suite': None,
+        'key_strength': None,
+        'http_version': None,
+    }
+
+
+def _agent_base_info(url: str, agent_port: str = DEFAULT_AGENT_PORT) -> Dict[str, Any]:
+    parsed_url = urlparse(url)
+    return {
+        'connection_type': 'agent',
+        'agent_port': agent_port,
+        'hostname': parsed_url.hostname or parsed_url.netloc,
+        'ip_address': None,
+        'protocol': None,
+        'is_encrypted': False,
+        'tls_version': None,
+        'cipher_suite': None,
+        'key_strength': None,
+        'http_version': None,
+        'connection_status': 'disconnected',
+        'fallback_used': False,
+    }
+
+
+async def probe_site(url: str) -> Dict[str, Any]:
+    """SSL/TLS security information for a monitored site."""
+    security_info = _site_base_info(url)
+    hostname = security_info['hostname']
+    if security_info['is_encrypted'] and hostname:
+        try:
+            address = await get_resolver().resolve_first(hostname)
+            security_info.update(await probe_tls(hostname, security_info['port'], address))
+        except Exception as e:
+            logger.debug(f"TLS probe failed for {url}: {e}")
+    return security_info
+
+
+async def probe_agent(url: str, agent_port: str = DEFAULT_AGENT_PORT) -> Dict[str, Any]:
+    """Security information for an agent: TLS (WSS) on the agent port, falling back to plain HTTP."""
+    security_info = _agent_base_info(url, agent_port)
+    hostname = security_info['hostname']
+    if not hostname:
+        security_info['connection_status'] = 'failed'
+        return security_info
+    security_info['ip_address'] = await get_resolver().resolve_first(hostname, family=socket.AF_INET)
+
+    try:
+        security_info.update(await probe_tls(hostname, int(agent_port), security_info['ip_address']))
+        security_info.update({'protocol': 'wss', 'is_encrypted': True, 'connection_status': 'connected'})
+        return security_info
+    except Exception as e:
+        logger.debug(f"TLS probe failed for agent {hostname}:{agent_port}: {e}")
+
+    try:
+        async with httpx.AsyncClient(timeout=settings.SECURITY_PROBE_TIMEOUT_SECONDS) as client:
+            response = await client.get(f"http://{hostname}:{agent_port}/api/sites")
+        security_info.update({
+            'protocol': 'http',
+            'http_version': response.http_version,
+            'connection_status': 'connected',
+            'fallback_used': True,
+        })
+    except Exception as e:
+        logger.debug(f"HTTP fallback failed for agent {hostname}:{agent_port}: {e}")
+        security_info['connection_status'] = 'failed'
+    return security_info
+
+
+class SecurityInventory:
+    """
+    TLS/security information of every site, served from memory so request
+    handlers never wait on a handshake.
+
+    Monitored sites report what their own check connection negotiated: checks
+    that perform a TLS handshake attach a ``security`` snapshot to their
+    result, which the ingest queue persists to site_security and hands to
+    ``on_checks_recorded``. Agents are probed on their agent port by a
+    background task instead, re-probed once their entry is older than
+    ``SECURITY_INVENTORY_TTL_SECONDS`` (``SECURITY_INVENTORY_ERROR_TTL_SECONDS``
+    after a failure), at most ``SECURITY_PROBE_CONCURRENCY`` at a time.
+    Concurrent refreshes of one site share a single probe.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[int, Dict[str, Any]] = {}  # site_id -> latest check connection details
+        self._entries: Dict[int, Tuple[Dict[str, Any], float]] = {}  # agent site_id -> (info, expires at)
+        self._probes: Dict[int, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self.version = 0  # Bumped whenever any site's information changes
+
+        # Statistics
+        self._probe_count = 0
+        self._failures = 0
+        self._snapshots_recorded = 0
+        self._last_pass_seconds: Optional[float] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if not self.is_running:
+            for site_id, snapshot in (await get_site_security()).items():
+                self._store_snapshot(site_id, snapshot)
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Security inventory started with {len(self._snapshots)} stored snapshots.")
+
+    async def stop(self):
+        if self.is_running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for probe in list(self._probes.values()):
+            probe.cancel()
+        logger.info("Security inventory stopped.")
+
+    def get(self, site: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cached security information for a site, without waiting on the network.
+        Stale agent entries are served while a refresh runs. HTTPS sites not
+        checked yet, and agents not probed yet, report ``connection_status``
+        "pending".
+        """
+        if is_agent_site(site):
+            entry = self._entries.get(site['id'])
+            if entry is None or entry[1] <= time.monotonic():
+                self._schedule(site)
+            if entry is None:
+                return {**_agent_base_info(site['url']), 'connection_status': 'pending'}
+            return with_certificate_expiry(entry[0])
+
+        info = {**_site_base_info(site['url']), 'connection_type': 'resource'}
+        snapshot = self._snapshots.get(site['id'])
+        if snapshot is not None:
+            info.update({column: snapshot[column] for column in SECURITY_COLUMNS})
+            info['security_captured_at'] = snapshot['checked_at']
+            return with_certificate_expiry(info)
+        if info['is_encrypted']:
+            info['connection_status'] = 'pending'
+        return info
+
+    def certificates(self, sites: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Certificate expiry of every site with a known certificate, soonest first."""
+        certificates = []
+        for site in sites:
+            info = self.get(site)
+            if info.get('certificate_expires_at'):
+                certificates.append({
+                    'id': site['id'],
+                    'name': site['name'],
+                    'url': site['url'],
+                    **{key: info.get(key) for key in (
+                        'certificate_subject', 'certificate_issuer', 'certificate_expires_at',
+                        'certificate_days_remaining', 'certificate_expiring',
+                    )},
+                })
+        return sorted(certificates, key=lambda certificate: certificate['certificate_days_remaining'])
+
+    async def refresh(self, site: Dict[str, Any]) -> Dict[str, Any]:
+        """Probes a site now (joining a probe already in flight) and returns the fresh information."""
+        await asyncio.shield(self._schedule(site))
+        return self.get(site)
+
+    def forget(self, site_id: int):
+        self._snapshots.pop(site_id, None)
+        self._entries.pop(site_id, None)
+        self.version += 1
+
+    def on_checks_recorded(self, records: List[Tuple[int, Dict[str, Any]]]):
+        """Ingest listener: keeps the newest check connection snapshot of each site."""
+        for site_id, result in records:
+            security = result.get('security')
+            if security:
+                self._store_snapshot(site_id, {**security, 'checked_at': result['checked_at']})
+                self._snapshots_recorded += 1
+
+    def _store_snapshot(self, site_id: int, snapshot: Dict[str, Any]):
+        current = self._snapshots.get(site_id)
+        if current is None or snapshot['checked_at'] >= current['checked_at']:
+            self._snapshots[site_id] = {
+                **{column: snapshot.get(column) for column in SECURITY_COLUMNS},
+                'checked_at': snapshot['checked_at'],
+            }
+            self.version += 1
+
+    def _schedule(self, site: Dict[str, Any]) -> asyncio.Task:
+        probe = self._probes.get(site['id'])
+        if probe is None:
+            probe = self._probes[site['id']] = asyncio.create_task(self._probe(site))
+        return probe
+
+    async def _probe(self, site: Dict[str, Any]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.SECURITY_PROBE_CONCURRENCY)
+        agent = is_agent_site(site)
+        try:
+            async with self._semaphore:
+                try:
+                    info = await (probe_agent(site['url']) if agent else probe_site(site['url']))
+                    failed = info.get('connection_status') == 'failed' or (
+                        info.get('is_encrypted') and info.get('tls_version') is None
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to get security info for {site['url']}: {e}")
+                    info = {
+                        'connection_type': 'agent' if agent else 'resource',
+                        'protocol': 'unknown',
+                        'is_encrypted': False,
+                        'connection_status': 'error',
+                    }
+                    failed = True
+            self._probe_count += 1
+            self._failures += int(failed)
+            if agent:
+                info['inventoried_at'] = datetime.now(timezone.utc).isoformat()
+                ttl = settings.SECURITY_INVENTORY_ERROR_TTL_SECONDS if failed else settings.SECURITY_INVENTORY_TTL_SECONDS
+                self._entries[site['id']] = (info, time.monotonic() + ttl)
+                self.version += 1
+            elif not failed and info.get('tls_version'):
+                # Until the site's next check handshake replaces it
+                checked_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                self._store_snapshot(site['id'], {**info, 'checked_at': checked_at})
+        finally:
+            self._probes.pop(site['id'], None)
+
+    async def _loop(self):
+        while True:
+            try:
+                started = time.perf_counter()
+                sites = await get_sites()
+                await self.refresh_due(sites)
+                self._last_pass_seconds = time.perf_counter() - started
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Security inventory pass failed: {e}", exc_info=True)
+            await asyncio.sleep(settings.SECURITY_INVENTORY_INTERVAL_SECONDS)
+
+    async def refresh_due(self, sites: List[Dict[str, Any]]):
+        """Probes every agent whose entry is missing or expired, concurrently."""
+        now = time.monotonic()
+        known = {site['id'] for site in sites}
+        for site_id in [site_id for site_id in self._entries if site_id not in known]:
+            self.forget(site_id)
+        due = [
+            site for site in sites
+            if is_agent_site(site) and self._entries.get(site['id'], (None, 0.0))[1] <= now
+        ]
+        if due:
+            await asyncio.gather(*(self._schedule(site) for site in due), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "running": self.is_running,
+            "snapshots": len(self._snapshots),
+            "snapshots_recorded": self._snapshots_recorded,
+            "expiring_certificates": sum(
+                1 for snapshot in self._snapshots.values()
+                if with_certificate_expiry(snapshot).get('certificate_expiring')
+            ),
+            "agent_entries": len(self._entries),
+            "stale_agent_entries": sum(1 for _, expires in self._entries.values() if expires <= now),
+            "probes_in_flight": len(self._probes),
+            "probes": self._probe_count,
+            "failures": self._failures,
+            "last_pass_seconds": self._last_pass_seconds,
+        }
+
+
+# --- Singleton Pattern ---
+_inventory_instance: Optional[SecurityInventory] = None
+
+def get_security_inventory() -> SecurityInventory:
+    """Returns the shared SecurityInventory instance."""
+    global _inventory_instance
+    if _inventory_instance is None:
+        _inventory_instance = SecurityInventory()
+    return _inventory_instance
@@ -0,0 +1,155 @@
+import math
+import struct
+from typing import Dict, Iterable, Optional
+
+# 1% relative accuracy: any quantile is within 1% of a value actually observed
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BINS = 2048
+# Values at or below this (seconds) are counted as zero
+MIN_INDEXABLE_VALUE = 1e-6
+
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("!BdI")  # version, relative accuracy, max bins
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if not value & 1 else -(value + 1) // 2
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with relative-error guarantees (DDSketch).
+
+    Positive values are counted in logarithmically sized bins, so any quantile
+    is returned within ``relative_accuracy`` of the true value, and two
+    sketches built with the same accuracy merge exactly by adding bin counts.
+    If more than ``max_bins`` bins are needed the lowest ones are collapsed,
+    which only affects the accuracy of the lowest quantiles.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_bins: int = DEFAULT_MAX_BINS):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # Midpoint of the bin (gamma^(i-1), gamma^i] in relative terms
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        if value <= MIN_INDEXABLE_VALUE:
+            self.zero_count += count
+        else:
+            index = self._index(value)
+            self.bins[index] = self.bins.get(index, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += count
+
+    def add_all(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "DDSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        """Folds the lowest bins into one until at most ``max_bins`` remain."""
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins + 1
+        target = indexes[excess]
+        self.bins[target] += sum(self.bins.pop(index) for index in indexes[:excess])
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Returns the approximate ``q`` quantile (0 <= q <= 1), or None if empty."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                return self._value(index)
+        return self._value(max(self.bins))
+
+    def count_at_most(self, value: float) -> int:
+        """Approximate number of values <= ``value``, judging each bin by its representative value."""
+        if value < 0:
+            return 0
+        count = self.zero_count
+        for index, bin_count in self.bins.items():
+            if self._value(index) <= value:
+                count += bin_count
+        return count
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary encoding: a fixed header, then varints for the zero
+        count, the bin count and each bin as (zigzag index delta, count).
+        """
+        out = bytearray(_HEADER.pack(_FORMAT_VERSION, self.relative_accuracy, self.max_bins))
+        _write_varint(out, self.zero_count)
+        _write_varint(out, len(self.bins))
+        previous = 0
+        for index in sorted(self.bins):
+            _write_varint(out, _zigzag(index - previous))
+            _write_varint(out, self.bins[index])
+            previous = index
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        version, relative_accuracy, max_bins = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported sketch format version {version}")
+        sketch = cls(relative_accuracy, max_bins)
+        pos = _HEADER.size
+        sketch.zero_count, pos = _read_varint(data, pos)
+        bin_count, pos = _read_varint(data, pos)
+        index = 0
+        for _ in range(bin_count):
+            delta, pos = _read_varint(data, pos)
+            count, pos = _read_varint(data, pos)
+            index += _unzigzag(delta)
+            sketch.bins[index] = count
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
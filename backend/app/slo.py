@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .database import get_checks_since, get_database, get_rollups, get_slos
+from .sketch import DDSketch
+
+logger = logging.getLogger(__name__)
+
+SLO_KINDS = ("availability", "latency")
+
+# Multiwindow, multi-burn-rate alerts: (severity, long window, short window, burn
+# rate threshold), windows in seconds. An alert fires while both windows burn
+# the error budget at least that many times faster than sustainable.
+BURN_RATE_ALERTS = (
+    ("page", 3600, 300, 14.4),     # 2% of a 30-day budget in 1 hour
+    ("page", 21600, 1800, 6.0),    # 5% in 6 hours
+    ("ticket", 259200, 21600, 1.0),  # 10% in 3 days
+)
+
+_MINUTE = 60
+_HOUR = 3600
+
+
+def window_label(seconds: int) -> str:
+    """Short label for a window: 300 -> "5m", 21600 -> "6h", 259200 -> "3d"."""
+    for unit, size in (("d", 86400), ("h", _HOUR), ("m", _MINUTE)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+def _checked_at_seconds(checked_at: str) -> float:
+    return datetime.fromisoformat(checked_at).replace(tzinfo=timezone.utc).timestamp()
+
+
+class _Ring:
+    """
+    Good/total counters per SLO (rows) in ``slots`` time slots of ``width``
+    seconds. Slot ``p % slots`` holds period ``p``; the stamps say which
+    period each slot currently holds, so old periods are recycled lazily.
+    """
+
+    def __init__(self, width: int, slots: int):
+        self.width = width
+        self.slots = slots
+        self.good = np.zeros((0, slots), dtype=np.int64)
+        self.total = np.zeros((0, slots), dtype=np.int64)
+        self.stamp = np.full(slots, -1, dtype=np.int64)
+
+    def add(self, row: int, period: int, good: int, total: int):
+        slot = period % self.slots
+        held = self.stamp[slot]
+        if held != period:
+            if held > period:
+                return  # Older than the ring reaches
+            self.good[:, slot] = 0
+            self.total[:, slot] = 0
+            self.stamp[slot] = period
+        self.good[row, slot] += good
+        self.total[row, slot] += total
+
+    def sums(self, now_period: int, periods: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-row good and total over the ``periods`` periods ending with ``now_period``."""
+        valid = ((self.stamp > now_period - periods) & (self.stamp <= now_period)).astype(np.int64)
+        return self.good @ valid, self.total @ valid
+
+    def append_rows(self, count: int):
+        self.good = np.vstack([self.good, np.zeros((count, self.slots), dtype=np.int64)])
+        self.total = np.vstack([self.total, np.zeros((count, self.slots), dtype=np.int64)])
+
+    def delete_rows(self, rows: List[int]):
+        self.good = np.delete(self.good, rows, axis=0)
+        self.total = np.delete(self.total, rows, axis=0)
+
+
+class SloTracker:
+    """
+    Evaluates per-site SLOs from in-memory counters kept up to date by the
+    ingest listener ``on_checks_recorded``, so evaluation never queries
+    site_checks. A minute ring covers the burn rate windows and an hour ring
+    the ``SLO_WINDOW_DAYS`` error budget window; both are seeded from the
+    rollups (and the current minute's raw checks) when the tracker starts and
+    when an SLO is added.
+
+    Availability SLOs count up checks out of all checks. Latency SLOs count
+    up checks responding within the threshold out of up checks with a
+    response time (judged from the rollup sketches when seeding).
+    """
+
+    def __init__(self):
+        self._slos: List[Dict[str, Any]] = []  # Definitions, in row order
+        self._rows_by_site: Dict[int, List[int]] = {}
+        longest = max(long for _, long, _, _ in BURN_RATE_ALERTS)
+        self._minutes = _Ring(_MINUTE, longest // _MINUTE)
+        self._hours = _Ring(_HOUR, max(1, math.ceil(settings.SLO_WINDOW_DAYS * 24)))
+        self._lock = asyncio.Lock()  # Serialises seeding
+        self._task: Optional[asyncio.Task] = None
+        self._loaded = False
+
+    async def start(self):
+        """Loads the SLO definitions and seeds their counters in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._load())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _load(self):
+        try:
+            slos = await get_slos()
+            if slos:
+                await self._seed(slos)
+            self._loaded = True
+            logger.info(f"SLO tracker loaded {len(slos)} SLOs.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to load SLOs: {e}", exc_info=True)
+
+    async def add(self, slo: Dict[str, Any]):
+        """Starts tracking a newly created SLO, seeded from the rollups."""
+        await self._seed([slo])
+
+    def remove(self, slo_id: int):
+        self._delete_rows([row for row, slo in enumerate(self._slos) if slo['id'] == slo_id])
+
+    def remove_site(self, site_id: int):
+        self._delete_rows(list(self._rows_by_site.get(site_id, ())))
+
+    def _delete_rows(self, rows: List[int]):
+        if not rows:
+            return
+        self._minutes.delete_rows(rows)
+        self._hours.delete_rows(rows)
+        dropped = set(rows)
+        self._slos = [slo for row, slo in enumerate(self._slos) if row not in dropped]
+        self._index_rows()
+
+    def _index_rows(self):
+        self._rows_by_site = {}
+        for row, slo in enumerate(self._slos):
+            self._rows_by_site.setdefault(slo['site_id'], []).append(row)
+
+    async def _seed(self, slos: List[Dict[str, Any]]):
+        """
+        Adds rows for ``slos`` and fills them from the 1m and 1h rollups before
+        the current minute and the raw checks from it on. Writes are held off
+        meanwhile (see Database.hold_writes), so every check committed so far is
+        in what is read and was seen by the listener before the rows existed,
+        and every later one reaches the listener after they are filled: each
+        check is counted exactly once, and other SLOs keep counting as usual.
+        """
+        async with self._lock, get_database().hold_writes():
+            cutoff_minute = int(time.time() // _MINUTE)
+            cutoff_hour = cutoff_minute * _MINUTE // _HOUR
+            hour_start_minute = cutoff_hour * _HOUR // _MINUTE
+            site_ids = sorted({slo['site_id'] for slo in slos})
+            with_sketch = any(slo['kind'] == 'latency' for slo in slos)
+            minute_rollups = await get_rollups(
+                site_ids, _MINUTE,
+                (cutoff_minute - self._minutes.slots + 1) * _MINUTE, (cutoff_minute - 1) * _MINUTE,
+                with_sketch,
+            )
+            hour_rollups = await get_rollups(
+                site_ids, _HOUR,
+                (cutoff_hour - self._hours.slots + 1) * _HOUR, (cutoff_hour - 1) * _HOUR,
+                with_sketch,
+            )
+            recent_checks = await get_checks_since(site_ids, cutoff_minute * _MINUTE)
+
+            # Rows are added only now, after the awaits, so a concurrent remove can't shift them
+            first_row = len(self._slos)
+            self._slos.extend(slos)
+            self._minutes.append_rows(len(slos))
+            self._hours.append_rows(len(slos))
+            self._index_rows()
+            rows_by_site: Dict[int, List[int]] = {}
+            for row in range(first_row, len(self._slos)):
+                rows_by_site.setdefault(self._slos[row]['site_id'], []).append(row)
+
+            for rollup in minute_rollups:
+                minute = rollup['bucket'] // _MINUTE
+                for row in rows_by_site.get(rollup['site_id'], ()):
+                    good, total = self._rollup_counts(self._slos[row], rollup)
+                    self._minutes.add(row, minute, good, total)
+                    if minute >= hour_start_minute:
+                        # The current hour isn't in the 1h rollups read above
+                        self._hours.add(row, cutoff_hour, good, total)
+            for rollup in hour_rollups:
+                for row in rows_by_site.get(rollup['site_id'], ()):
+                    good, total = self._rollup_counts(self._slos[row], rollup)
+                    self._hours.add(row, rollup['bucket'] // _HOUR, good, total)
+            for check in recent_checks:
+                self._count(rows_by_site.get(check['site_id'], ()), check['ts'] / 1000, check)
+
+    @staticmethod
+    def _rollup_counts(slo: Dict[str, Any], rollup: Dict[str, Any]) -> Tuple[int, int]:
+        if slo['kind'] == 'availability':
+            return rollup['up_count'], rollup['count']
+        if not rollup['rt_count'] or rollup['sketch'] is None:
+            return 0, 0
+        sketch = DDSketch.from_bytes(rollup['sketch'])
+        return sketch.count_at_most(slo['latency_threshold']), rollup['rt_count']
+
+    @staticmethod
+    def _check_counts(slo: Dict[str, Any], result: Dict[str, Any]) -> Tuple[int, int]:
+        up = result.get('status') == 'up'
+        if slo['kind'] == 'availability':
+            return int(up), 1
+        response_time = result.get('response_time')
+        if not up or response_time is None:
+            return 0, 0
+        return int(response_time <= slo['latency_threshold']), 1
+
+    def on_checks_recorded(self, records: List[Tuple[int, Dict[str, Any]]]):
+        """Ingest listener: counts each committed check towards its site's SLOs."""
+        for site_id, result in records:
+            rows = self._rows_by_site.get(site_id)
+            if rows:
+                self._count(rows, _checked_at_seconds(result['checked_at']), result)
+
+    def _count(self, rows: List[int], checked_at: float, check: Dict[str, Any]):
+        minute = int(checked_at // _MINUTE)
+        hour = int(checked_at // _HOUR)
+        for row in rows:
+            good, total = self._check_counts(self._slos[row], check)
+            if total:
+                self._minutes.add(row, minute, good, total)
+                self._hours.add(row, hour, good, total)
+
+    def evaluate(self, site_id: Optional[int] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """Error budget and burn rates of every SLO (or one site's), from the counters alone."""
+        now = time.time() if now is None else now
+        minute = int(now // _MINUTE)
+        hour = int(now // _HOUR)
+        objectives = np.array([slo['objective'] for slo in self._slos], dtype=np.float64)
+        allowed = 1 - objectives  # Error budget as a fraction of checks
+
+        good, total = self._hours.sums(hour, self._hours.slots)
+        windows = sorted({window for _, long, short, _ in BURN_RATE_ALERTS for window in (long, short)})
+        burn_rates = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sli = np.where(total > 0, good / total, np.nan)
+            budget_remaining = np.where(total > 0, 1 - (total - good) / (total * allowed), np.nan)
+            for window in windows:
+                window_good, window_total = self._minutes.sums(minute, window // _MINUTE)
+                burn_rates[window] = np.where(
+                    window_total > 0, (window_total - window_good) / (window_total * allowed), np.nan
+                )
+
+        def value(array: np.ndarray, row: int) -> Optional[float]:
+            item = float(array[row])
+            return None if math.isnan(item) else round(item, 6)
+
+        results = []
+        for row, slo in enumerate(self._slos):
+            if site_id is not None and slo['site_id'] != site_id:
+                continue
+            alerts = []
+            for severity, long, short, threshold in BURN_RATE_ALERTS:
+                long_rate, short_rate = value(burn_rates[long], row), value(burn_rates[short], row)
+                alerts.append({
+                    "severity": severity,
+                    "long_window": window_label(long),
+                    "short_window": window_label(short),
+                    "burn_rate_threshold": threshold,
+                    "firing": (long_rate is not None and short_rate is not None
+                               and long_rate >= threshold and short_rate >= threshold),
+                })
+            results.append({
+                "id": slo['id'],
+                "site_id": slo['site_id'],
+                "name": slo['name'],
+                "kind": slo['kind'],
+                "objective": slo['objective'],
+                "latency_threshold": slo['latency_threshold'],
+                "good": int(good[row]),
+                "total": int(total[row]),
+                "sli": value(sli, row),
+                "error_budget_remaining": value(budget_remaining, row),
+                "burn_rates": {window_label(window): value(burn_rates[window], row) for window in windows},
+                "alerts": alerts,
+            })
+        return {
+            "loaded": self._loaded,
+            "window_days": settings.SLO_WINDOW_DAYS,
+            "evaluated_at": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+            "slos": results,
+        }
+
+
+# --- Singleton Pattern ---
+_slo_tracker_instance: Optional[SloTracker] = None
+
+def get_slo_tracker() -> SloTracker:
+    """Returns the shared SloTracker instance."""
+    global _slo_tracker_instance
+    if _slo_tracker_instance is None:
+        _slo_tracker_instance = SloTracker()
+    return _slo_tracker_instance
@@ -0,0 +1,348 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import settings
+from .ingest import utc_timestamp
+from .monitor import SiteMonitor
+
+logger = logging.getLogger(__name__)
+
+# Use spawn so workers never inherit the coordinator's event loop or sockets
+_mp = multiprocessing.get_context("spawn")
+
+STATS_INTERVAL_SECONDS = 5.0
+
+
+class ConsistentHashRing:
+    """Consistent hash ring with virtual nodes, mapping site IDs to worker IDs."""
+
+    def __init__(self, replicas: int = 128):
+        self.replicas = replicas
+        self._keys: List[int] = []
+        self._nodes: Dict[int, int] = {}
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def add(self, node: int):
+        for i in range(self.replicas):
+            key = self._hash(f"worker-{node}#{i}")
+            self._nodes[key] = node
+            bisect.insort(self._keys, key)
+
+    def remove(self, node: int):
+        for i in range(self.replicas):
+            key = self._hash(f"worker-{node}#{i}")
+            if self._nodes.pop(key, None) is not None:
+                self._keys.pop(bisect.bisect_left(self._keys, key))
+
+    def get(self, site_id: int) -> Optional[int]:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, self._hash(f"site-{site_id}")) % len(self._keys)
+        return self._nodes[self._keys[index]]
+
+
+class _ShardMonitor(SiteMonitor):
+    """SiteMonitor running inside a worker process on the sites assigned to it."""
+
+    def __init__(self, worker_id: int, results):
+        super().__init__()
+        self.worker_id = worker_id
+        self._results = results
+
+    async def start(self):
+        if not self.is_running:
+            self.is_running = True
+            self._task = asyncio.create_task(self._monitor_loop())
+
+    async def refresh_monitoring(self):
+        """Sites are assigned by the coordinator, never loaded from the database."""
+
+    # Results reach the coordinator's ingest queue only after the batch and the
+    # results pipe, so stamp them here, when the check starts
+    async def _check_http_site(self, site: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        started_at = utc_timestamp()
+        return self._stamp(await super()._check_http_site(site), started_at)
+
+    async def check_ping_site(self, site: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        started_at = utc_timestamp()
+        return self._stamp(await super().check_ping_site(site), started_at)
+
+    @staticmethod
+    def _stamp(result: Optional[Dict[str, Any]], checked_at: str) -> Optional[Dict[str, Any]]:
+        return {**result, "checked_at": checked_at} if isinstance(result, dict) else result
+
+    async def _persist_results(self, records: List[Tuple[int, Dict[str, Any]]]):
+        for site_id, result in records:
+            self._last_status[site_id] = result['status']
+        self._results.put(("results", self.worker_id, records))
+
+
+def _worker_main(worker_id: int, commands, results):
+    """Entry point of a worker process."""
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL.upper()),
+        format=f'%(asctime)s - worker-{worker_id} - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    try:
+        asyncio.run(_run_worker(worker_id, commands, results))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _run_worker(worker_id: int, commands, results):
+    monitor = _ShardMonitor(worker_id, results)
+    await monitor.start()
+    loop = asyncio.get_running_loop()
+    command_reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worker-commands")
+
+    async def report_stats():
+        while True:
+            await asyncio.sleep(STATS_INTERVAL_SECONDS)
+            results.put(("stats", worker_id, {
+                "sites": len(monitor.sites),
+                "scheduler": monitor.get_scheduler_stats(),
+                "executor": monitor.get_executor_stats(),
+            }))
+
+    stats_task = asyncio.create_task(report_stats())
+    try:
+        while True:
+            op, payload = await loop.run_in_executor(command_reader, commands.get)
+            if op == "track":
+                sites, immediate = payload
+                for site in sites:
+                    monitor.track_site(site, immediate=immediate)
+            elif op == "untrack":
+                for site_id in payload:
+                    monitor.untrack_site(site_id)
+            elif op == "stop":
+                break
+    finally:
+        stats_task.cancel()
+        await monitor.stop()
+        command_reader.shutdown(wait=False)
+
+
+class _Worker:
+    def __init__(self, worker_id: int, results):
+        self.worker_id = worker_id
+        self.commands = _mp.Queue()
+        self.process = _mp.Process(
+            target=_worker_main,
+            args=(worker_id, self.commands, results),
+            name=f"siteup-check-worker-{worker_id}",
+            daemon=True,
+        )
+        self.stats: Dict[str, Any] = {}
+        self.results_received = 0
+
+
+class WorkerPool:
+    """
+    Coordinator for sharded check workers. Sites are partitioned across worker
+    processes by consistent hashing of the site ID; workers schedule and run
+    the checks, and stream result batches back for persistence here. Adding or
+    removing a worker only moves the sites whose ring owner changed.
+    """
+
+    def __init__(self, persist: Callable[[List[Tuple[int, Dict[str, Any]]]], Awaitable[None]]):
+        self._persist = persist
+        self._results = _mp.Queue()
+        self._workers: Dict[int, _Worker] = {}
+        self._ring = ConsistentHashRing()
+        self._sites: Dict[int, Dict[str, Any]] = {}
+        self._owner: Dict[int, int] = {}
+        self._next_worker_id = 0
+        self._collector: Optional[asyncio.Task] = None
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worker-results")
+        self._persisted = 0
+        self._stopping = False
+
+    async def start(self, count: int):
+        for _ in range(count):
+            self.add_worker()
+        self._collector = asyncio.create_task(self._collect())
+        logger.info(f"Started {count} check workers.")
+
+    async def stop(self):
+        for worker in self._workers.values():
+            worker.commands.put(("stop", None))
+        loop = asyncio.get_running_loop()
+        for worker in self._workers.values():
+            await loop.run_in_executor(None, worker.process.join, 10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        if self._collector:
+            # Let the collector finish its current read so no drained batch is dropped
+            self._stopping = True
+            await self._collector
+        # Persist whatever the workers flushed before exiting
+        while True:
+            records = self._drain(block=False)
+            if not records:
+                break
+            await self._persist_batch(records)
+        self._workers.clear()
+        self._reader.shutdown(wait=False)
+        logger.info("Check workers stopped.")
+
+    def add_worker(self) -> int:
+        """Starts a new worker and moves the sites it now owns onto it."""
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        worker = _Worker(worker_id, self._results)
+        worker.process.start()
+        self._workers[worker_id] = worker
+        self._ring.add(worker_id)
+        self._rebalance()
+        return worker_id
+
+    def remove_worker(self, worker_id: Optional[int] = None):
+        """Stops a worker (the newest by default) and hands its sites to the others."""
+        if not self._workers:
+            return
+        worker_id = max(self._workers) if worker_id is None else worker_id
+        worker = self._workers.pop(worker_id, None)
+        if worker is None:
+            return
+        self._ring.remove(worker_id)
+        if worker.process.is_alive():
+            worker.commands.put(("stop", None))
+        for site_id, owner in list(self._owner.items()):
+            if owner == worker_id:
+                del self._owner[site_id]
+        self._rebalance()
+
+    def _replace_worker(self, worker_id: int):
+        """
+        Restarts a dead worker under the same ID. Its ring position is kept,
+        so exactly its sites move, once, to the replacement, and no other
+        site changes owner.
+        """
+        worker = _Worker(worker_id, self._results)
+        worker.process.start()
+        self._workers[worker_id] = worker
+        sites = [
+            self._sites[site_id] for site_id, owner in self._owner.items()
+            if owner == worker_id and site_id in self._sites
+        ]
+        if sites:
+            worker.commands.put(("track", (sites, False)))
+
+    def scale(self, count: int):
+        """Adds or removes workers until ``count`` are running."""
+        count = max(1, count)
+        while len(self._workers) < count:
+            self.add_worker()
+        while len(self._workers) > count:
+            self.remove_worker()
+
+    def assign(self, site: Dict[str, Any], immediate: bool = False):
+        """Tracks (or updates) a site on the worker that owns it."""
+        self._sites[site['id']] = site
+        worker_id = self._ring.get(site['id'])
+        if worker_id is None:
+            return
+        self._owner[site['id']] = worker_id
+        self._workers[worker_id].commands.put(("track", ([site], immediate)))
+
+    def unassign(self, site_id: int):
+        self._sites.pop(site_id, None)
+        worker_id = self._owner.pop(site_id, None)
+        if worker_id is not None and worker_id in self._workers:
+            self._workers[worker_id].commands.put(("untrack", [site_id]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "sites": len(self._sites),
+            "results_persisted": self._persisted,
+            "per_worker": {
+                worker_id: {
+                    "pid": worker.process.pid,
+                    "alive": worker.process.is_alive(),
+                    "assigned_sites": sum(1 for owner in self._owner.values() if owner == worker_id),
+                    "results_received": worker.results_received,
+                    **worker.stats,
+                }
+                for worker_id, worker in self._workers.items()
+            },
+        }
+
+    def _rebalance(self):
+        """Moves sites whose ring owner changed, batching commands per worker."""
+        moves_out: Dict[int, List[int]] = {}
+        moves_in: Dict[int, List[Dict[str, Any]]] = {}
+        for site_id, site in self._sites.items():
+            owner = self._ring.get(site_id)
+            previous = self._owner.get(site_id)
+            if owner == previous:
+                continue
+            if previous is not None and previous in self._workers:
+                moves_out.setdefault(previous, []).append(site_id)
+            if owner is not None:
+                moves_in.setdefault(owner, []).append(site)
+                self._owner[site_id] = owner
+
+        for worker_id, site_ids in moves_out.items():
+            self._workers[worker_id].commands.put(("untrack", site_ids))
+        for worker_id, sites in moves_in.items():
+            self._workers[worker_id].commands.put(("track", (sites, False)))
+        if moves_in:
+            logger.info(f"Rebalanced {sum(len(s) for s in moves_in.values())} sites across {len(self._workers)} workers.")
+
+    def _drain(self, block: bool = True) -> List[Tuple[int, Dict[str, Any]]]:
+        """Reads messages from workers; returns the check results among them."""
+        records = []
+        try:
+            message = self._results.get(timeout=0.5) if block else self._results.get_nowait()
+            while True:
+                kind, worker_id, payload = message
+                worker = self._workers.get(worker_id)
+                if kind == "results":
+                    records.extend(payload)
+                    if worker is not None:
+                        worker.results_received += len(payload)
+                elif kind == "stats" and worker is not None:
+                    worker.stats = payload
+                if len(records) >= settings.CHECK_WORKER_BATCH_SIZE:
+                    break
+                message = self._results.get_nowait()
+        except queue.Empty:
+            pass
+        return records
+
+    async def _persist_batch(self, records: List[Tuple[int, Dict[str, Any]]]):
+        if not records:
+            return
+        try:
+            await self._persist(records)
+            self._persisted += len(records)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(records)} worker results: {e}", exc_info=True)
+
+    async def _collect(self):
+        """Streams result batches from workers into persistence and restarts dead workers."""
+        loop = asyncio.get_running_loop()
+        last_health_check = time.monotonic()
+        while not self._stopping:
+            records = await loop.run_in_executor(self._reader, self._drain)
+            await self._persist_batch(records)
+
+            if not self._stopping and time.monotonic() - last_health_check >= STATS_INTERVAL_SECONDS:
+                last_health_check = time.monotonic()
+                for worker_id, worker in list(self._workers.items()):
+                    if not worker.process.is_alive():
+                        logger.error(f"Check worker {worker_id} exited (code {worker.process.exitcode}); replacing it.")
+                        self._replace_worker(worker_id)
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+from backend.app.analytics import Series
+from backend.app.analytics_cache import AnalyticsCache, etag_matches
+
+MINUTE_MS = 60_000
+ETAG = '"1-2-3-4"'
+
+
+def _at(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def test_etag_matches_exact_tags():
+    assert etag_matches(ETAG, ETAG)
+    assert not etag_matches('"1-2-3-5"', ETAG)
+    # Tags are compared whole, not as substrings of the header
+    assert not etag_matches('"1-2-3-4x"', ETAG)
+    assert not etag_matches('"x1-2-3-4"', ETAG)
+
+
+def test_etag_matches_weak_tags():
+    assert etag_matches('W/"1-2-3-4"', ETAG)
+    assert etag_matches(ETAG, 'W/"1-2-3-4"')
+    assert not etag_matches('W/"1-2-3-5"', ETAG)
+
+
+def test_etag_matches_lists_and_wildcard():
+    assert etag_matches('"a", W/"b", "1-2-3-4"', ETAG)
+    assert etag_matches('"a",,  "1-2-3-4" ,', ETAG)
+    assert not etag_matches('"a", "b"', ETAG)
+    assert etag_matches('*', ETAG)
+    assert etag_matches(' * ', ETAG)
+
+
+def test_etag_matches_rejects_malformed_headers():
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches('', ETAG)
+    assert not etag_matches('1-2-3-4', ETAG)
+    assert not etag_matches('"1-2-3-4" "a"', ETAG)
+    assert not etag_matches('"a", 1-2-3-4', ETAG)
+    assert not etag_matches('"1-2-3-4', ETAG)
+    assert not etag_matches('w/"1-2-3-4"', ETAG)
+
+
+def test_late_check_rewinds_closed_buckets():
+    cache = AnalyticsCache(max_entries=4)
+    start = 1_700_000_000_000 // MINUTE_MS * MINUTE_MS
+    entry = cache.entry(((1,), 1.0, 60), MINUTE_MS)
+
+    # First poll: nothing cached, load everything and keep ten closed buckets
+    closed, load_from = entry.take_closed(start, start + 10 * MINUTE_MS)
+    assert len(closed.ts) == 0 and load_from == start
+    entry.store_closed(Series.from_rows((1, start + i * MINUTE_MS, 0.1, 1) for i in range(10)))
+
+    # Next poll reuses all ten and only loads from where they end
+    closed, load_from = entry.take_closed(start, start + 11 * MINUTE_MS)
+    assert list(closed.ts) == [start + i * MINUTE_MS for i in range(10)]
+    assert load_from == start + 10 * MINUTE_MS
+    entry.store_closed(Series.from_rows((1, start + i * MINUTE_MS, 0.1, 1) for i in range(11)))
+
+    # A late check in bucket 4 bumps the version and rewinds the closed range to that bucket
+    version = entry.version
+    etag = cache.etag(entry, start, start + 11 * MINUTE_MS)
+    cache.on_checks_recorded([(1, {"checked_at": _at(start + 4 * MINUTE_MS + 30_000)})])
+    assert entry.version > version
+    assert cache.etag(entry, start, start + 11 * MINUTE_MS) != etag
+    assert entry.closed_end_ms == start + 4 * MINUTE_MS
+
+    closed, load_from = entry.take_closed(start, start + 11 * MINUTE_MS)
+    assert list(closed.ts) == [start + i * MINUTE_MS for i in range(4)]
+    assert load_from == start + 4 * MINUTE_MS
+
+
+def test_checks_for_other_sites_leave_the_entry_alone():
+    cache = AnalyticsCache(max_entries=4)
+    start = 1_700_000_000_000 // MINUTE_MS * MINUTE_MS
+    entry = cache.entry(((1,), 1.0, 60), MINUTE_MS)
+    entry.take_closed(start, start + 10 * MINUTE_MS)
+    version = entry.version
+
+    cache.on_checks_recorded([(2, {"checked_at": _at(start + MINUTE_MS)})])
+    assert entry.version == version
+    assert entry.closed_end_ms == start + 10 * MINUTE_MS
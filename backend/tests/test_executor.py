@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from backend.app.executor import PRIORITY_DOWN, PRIORITY_NORMAL, CheckExecutor
+
+
+class _Checks:
+    """Check functions that record when they start and finish when released."""
+
+    def __init__(self):
+        self.started = []
+        self.running = set()
+        self.peak = {}
+        self._release = {}
+
+    def check(self, name, group=None):
+        release = self._release[name] = asyncio.Event()
+
+        async def run():
+            self.started.append(name)
+            self.running.add(name)
+            if group is not None:
+                concurrent = sum(1 for other in self.running if other[0] == group)
+                self.peak[group] = max(self.peak.get(group, 0), concurrent)
+            await release.wait()
+            self.running.discard(name)
+            return name
+        return run
+
+    def release(self, *names):
+        for name in names:
+            self._release[name].set()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_priority_then_most_overdue_then_submission_order():
+    async def scenario():
+        executor = CheckExecutor(max_concurrency=1, max_per_host=10, max_per_ip=10)
+        checks = _Checks()
+        blocker = asyncio.ensure_future(executor.submit(checks.check("blocker"), "busy.example"))
+        await _settle()
+
+        submitted = [
+            ("late", PRIORITY_NORMAL, 5.0),
+            ("first", PRIORITY_NORMAL, 0.0),
+            ("down", PRIORITY_DOWN, 0.0),
+            ("later", PRIORITY_NORMAL, 30.0),
+            ("second", PRIORITY_NORMAL, 0.0),
+        ]
+        futures = []
+        for name, priority, overdue in submitted:
+            futures.append(asyncio.ensure_future(
+                executor.submit(checks.check(name), f"{name}.example", priority=priority, overdue=overdue)
+            ))
+        await _settle()
+        assert executor.stats()["queue_depth"] == len(submitted)
+
+        checks.release(*(name for name, _, _ in submitted), "blocker")
+        assert await asyncio.gather(blocker, *futures) == ["blocker"] + [name for name, _, _ in submitted]
+        assert checks.started == ["blocker", "down", "later", "late", "first", "second"]
+        assert executor.stats()["completed"] == 6
+
+    asyncio.run(scenario())
+
+
+def test_host_at_its_cap_is_parked_without_blocking_other_hosts():
+    async def scenario():
+        executor = CheckExecutor(max_concurrency=4, max_per_host=1, max_per_ip=10)
+        checks = _Checks()
+        futures = [
+            asyncio.ensure_future(executor.submit(checks.check(name, group=name[0]), f"{name[0]}.example"))
+            for name in ("a1", "a2", "a3", "b1")
+        ]
+        await _settle()
+
+        # a2 and a3 wait on host a, leaving slots for b
+        assert checks.started == ["a1", "b1"]
+        stats = executor.stats()
+        assert stats["active"] == 2 and stats["parked"] == 2 and stats["queue_depth"] == 2
+
+        # Each finished check for a host puts the next one parked on it back in the queue
+        checks.release("a1")
+        await _settle()
+        assert checks.started == ["a1", "b1", "a2"]
+        assert executor.stats()["parked"] == 1
+
+        checks.release("a2", "a3", "b1")
+        assert await asyncio.gather(*futures) == ["a1", "a2", "a3", "b1"]
+        assert checks.peak["a"] == 1
+        stats = executor.stats()
+        assert stats["active"] == 0 and stats["parked"] == 0 and stats["active_hosts"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_hosts_sharing_an_ip_are_capped_together():
+    async def scenario():
+        addresses = {"a.example": "10.0.0.1", "b.example": "10.0.0.1", "c.example": "10.0.0.2"}
+
+        async def resolve(host):
+            if host not in addresses:
+                raise OSError("no such host")
+            return addresses[host]
+
+        executor = CheckExecutor(max_concurrency=4, max_per_host=4, max_per_ip=1, resolve=resolve)
+        checks = _Checks()
+        futures = [
+            asyncio.ensure_future(executor.submit(checks.check(name, group=group), host))
+            for name, group, host in (
+                ("x1", "x", "a.example"), ("x2", "x", "b.example"),
+                ("y1", "y", "c.example"), ("z1", "z", "unresolved.example"),
+            )
+        ]
+        await _settle()
+
+        # b shares a's address; an unresolvable host only has its host cap
+        assert checks.started == ["x1", "y1", "z1"]
+        assert executor.stats()["parked"] == 1
+
+        checks.release("x1", "x2", "y1", "z1")
+        assert await asyncio.gather(*futures) == ["x1", "x2", "y1", "z1"]
+        assert checks.peak["x"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_errors_and_cancellation():
+    async def scenario():
+        executor = CheckExecutor(max_concurrency=1, max_per_host=1, max_per_ip=1)
+        checks = _Checks()
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await executor.submit(failing, "a.example")
+
+        # Cancelling a waiting caller cancels its running check and frees the slot
+        running = asyncio.ensure_future(executor.submit(checks.check("slow"), "a.example"))
+        queued = asyncio.ensure_future(executor.submit(checks.check("next"), "b.example"))
+        await _settle()
+        running.cancel()
+        await _settle()
+        assert checks.started == ["slow", "next"]
+        checks.release("next")
+        assert await queued == "next"
+
+        # close() cancels whatever is still queued
+        blocker = asyncio.ensure_future(executor.submit(checks.check("blocker"), "a.example"))
+        waiting = asyncio.ensure_future(executor.submit(checks.check("waiting"), "b.example"))
+        await _settle()
+        await executor.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        checks.release("blocker")
+        assert await blocker == "blocker"
+        assert "waiting" not in checks.started
+
+    asyncio.run(scenario())
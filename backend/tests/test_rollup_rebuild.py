@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from backend.app import database
+from backend.app.database import (
+    Database, add_site, close_database, get_rollups, init_database,
+    prune_site_checks, rebuild_rollups, record_checks,
+)
+
+DAY = 86400
+HOUR = 3600
+
+
+def _at(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def test_rebuild_after_pruning_keeps_older_rollups(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "_database_instance", Database(str(tmp_path / "monitor.db"), 1))
+
+    async def scenario():
+        await init_database()
+        try:
+            site_id = await add_site("https://example.com", "Example")
+            # Checks every 30 minutes for three days, starting mid-morning
+            start = datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+            checks = [
+                (site_id, {"status": "up", "response_time": 0.1, "checked_at": _at(start + timedelta(minutes=30 * i))})
+                for i in range(3 * 48)
+            ]
+            await record_checks(checks)
+
+            window = (start.timestamp() - DAY, start.timestamp() + 4 * DAY)
+            hourly = await get_rollups([site_id], HOUR, *window)
+            daily = await get_rollups([site_id], DAY, *window)
+
+            # Prune raw checks older than the second day, 06:00 (mid-way through a daily bucket)
+            cutoff = start + timedelta(hours=20)
+            await prune_site_checks(site_id, int(cutoff.timestamp() * 1000), 10_000)
+            processed = await rebuild_rollups()
+            assert processed == sum(1 for _, check in checks if check["checked_at"] >= _at(cutoff))
+
+            assert await get_rollups([site_id], HOUR, *window) == hourly
+            assert await get_rollups([site_id], DAY, *window) == daily
+        finally:
+            await close_database()
+
+    asyncio.run(scenario())
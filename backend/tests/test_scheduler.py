@@ -0,0 +1,116 @@
+import asyncio
+
+from backend.app.scheduler import CheckScheduler
+
+
+def test_phase_is_deterministic_and_within_the_spread():
+    scheduler = CheckScheduler(spread_seconds=60)
+    for site_id in range(1, 200):
+        phase = scheduler.phase(site_id, 300)
+        assert 0 <= phase < 60
+        assert phase == CheckScheduler(spread_seconds=60).phase(site_id, 300)
+        # Short intervals spread over the interval itself
+        assert 0 <= scheduler.phase(site_id, 10) < 10
+    assert len({scheduler.phase(site_id, 300) for site_id in range(1, 200)}) > 190
+
+
+def test_sites_come_due_in_deadline_order():
+    scheduler = CheckScheduler(spread_seconds=60)
+    site_ids = list(range(1, 51))
+    for site_id in site_ids:
+        scheduler.add(site_id, 120, now=0)
+    assert len(scheduler) == 50
+
+    order = []
+    for now in range(0, 61):
+        order.extend(site_id for site_id, _ in scheduler.pop_due(now))
+    assert sorted(order) == site_ids
+    assert order == sorted(site_ids, key=lambda site_id: scheduler.phase(site_id, 120))
+    assert scheduler.next_deadline() == min(scheduler.phase(site_id, 120) for site_id in site_ids) + 120
+
+
+def test_immediate_sites_are_due_now():
+    scheduler = CheckScheduler()
+    scheduler.add(7, 300, now=100, immediate=True)
+    assert scheduler.next_deadline() == 100
+    assert scheduler.pop_due(100) == [(7, 0)]
+
+
+def test_pop_due_reschedules_one_interval_after_the_deadline():
+    scheduler = CheckScheduler()
+    scheduler.add(1, 30, now=0, immediate=True)
+
+    assert scheduler.pop_due(2) == [(1, 2)]
+    # The next deadline keeps the cadence of the previous one, not of the late dispatch
+    assert scheduler.next_deadline() == 30
+    assert scheduler.pop_due(29) == []
+
+    # Missed periods are skipped rather than dispatched back to back
+    assert scheduler.pop_due(100) == [(1, 70)]
+    assert scheduler.next_deadline() == 120
+    assert scheduler.pop_due(100) == []
+    stats = scheduler.stats()
+    assert stats["dispatched"] == 2 and stats["lateness_max"] == 70
+
+
+def test_remove_untracks_and_readd_replaces():
+    scheduler = CheckScheduler()
+    scheduler.add(1, 10, now=0, immediate=True)
+    scheduler.add(2, 10, now=0, immediate=True)
+    scheduler.remove(1)
+    scheduler.remove(99)  # Unknown sites are ignored
+
+    assert 1 not in scheduler and 2 in scheduler
+    assert [site_id for site_id, _ in scheduler.pop_due(0)] == [2]
+
+    # Re-adding replaces the old deadline; the stale heap entry is skipped
+    scheduler.add(2, 10, now=1, immediate=True)
+    scheduler.add(2, 10, now=5, immediate=True)
+    assert scheduler.pop_due(4) == []
+    assert scheduler.pop_due(5) == [(2, 0)]
+
+    scheduler.clear()
+    assert len(scheduler) == 0 and scheduler.next_deadline() is None
+
+
+def test_update_pulls_in_but_never_pushes_out():
+    scheduler = CheckScheduler()
+    scheduler.add(1, 300, now=0, immediate=True)
+    scheduler.pop_due(0)
+    assert scheduler.next_deadline() == 300
+
+    # Shorter interval: due one new interval after the last dispatch
+    scheduler.update(1, 60, now=10)
+    assert scheduler.next_deadline() == 60
+    # Longer interval: the deadline already promised stands
+    scheduler.update(1, 600, now=20)
+    assert scheduler.next_deadline() == 60
+    # A new interval that is already overdue makes the site due now
+    scheduler.update(1, 5, now=30)
+    assert scheduler.next_deadline() == 30
+
+    # Updating an unknown site schedules it
+    scheduler.update(2, 60, now=0)
+    assert 2 in scheduler
+
+
+def test_stale_heap_entries_are_compacted():
+    scheduler = CheckScheduler()
+    for now in range(1000):
+        scheduler.add(1, 10, now=now)
+    assert len(scheduler) == 1
+    assert scheduler.stats()["heap_size"] <= 2 * len(scheduler) + 64
+
+
+def test_wait_due_wakes_for_new_sites():
+    async def scenario():
+        scheduler = CheckScheduler()
+        waiter = asyncio.ensure_future(scheduler.wait_due())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        scheduler.add(3, 60, immediate=True)
+        due = await asyncio.wait_for(waiter, timeout=1)
+        assert [site_id for site_id, _ in due] == [3]
+
+    asyncio.run(scenario())
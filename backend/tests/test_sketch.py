@@ -0,0 +1,146 @@
+import random
+
+import pytest
+
+from backend.app.sketch import (
+    DDSketch, MIN_INDEXABLE_VALUE, _read_varint, _unzigzag, _write_varint, _zigzag,
+)
+
+QUANTILES = (0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999, 1)
+
+
+def _values(seed: int, count: int):
+    generator = random.Random(seed)
+    # Response times from well under a millisecond to tens of seconds, so bin indexes go negative too
+    return [generator.lognormvariate(-2, 2) for _ in range(count)]
+
+
+def _exact(values, q):
+    return sorted(values)[int(q * (len(values) - 1))]
+
+
+@pytest.mark.parametrize("relative_accuracy", [0.01, 0.02, 0.05])
+def test_quantiles_are_within_the_relative_accuracy(relative_accuracy):
+    values = _values(1, 20_000)
+    sketch = DDSketch(relative_accuracy)
+    sketch.add_all(values)
+
+    assert sketch.count == len(values)
+    for q in QUANTILES:
+        exact = _exact(values, q)
+        assert abs(sketch.quantile(q) - exact) <= relative_accuracy * exact * (1 + 1e-9), q
+
+
+def test_zero_and_empty():
+    sketch = DDSketch()
+    assert sketch.quantile(0.5) is None
+    assert sketch.count_at_most(1.0) == 0
+
+    sketch.add(0.0, count=3)
+    sketch.add(MIN_INDEXABLE_VALUE)
+    sketch.add(0.5)
+    assert sketch.zero_count == 4 and sketch.count == 5
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.count_at_most(0.0) == 4
+    assert sketch.count_at_most(1.0) == 5
+    assert sketch.count_at_most(-1.0) == 0
+
+
+def test_count_at_most():
+    values = _values(2, 5_000)
+    sketch = DDSketch()
+    sketch.add_all(values)
+
+    for threshold in (0.01, 0.1, 0.5, 1.0, 10.0):
+        # Values are only known to their bin, so allow those within the accuracy of the threshold
+        low = sum(value <= threshold * (1 - sketch.relative_accuracy) for value in values)
+        high = sum(value <= threshold * (1 + sketch.relative_accuracy) for value in values)
+        assert low <= sketch.count_at_most(threshold) <= high
+
+
+def test_merge_equals_one_sketch_of_all_values():
+    first, second = _values(3, 3_000), _values(4, 7_000)
+    merged = DDSketch()
+    merged.add_all(first)
+    other = DDSketch()
+    other.add_all(second)
+    other.add(0.0)
+    merged.merge(other)
+
+    combined = DDSketch()
+    combined.add_all(first + second + [0.0])
+
+    assert merged.bins == combined.bins
+    assert merged.zero_count == combined.zero_count
+    assert merged.count == combined.count
+    for q in QUANTILES:
+        assert merged.quantile(q) == combined.quantile(q)
+
+
+def test_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        DDSketch(0.01).merge(DDSketch(0.02))
+
+
+def test_collapse_keeps_the_bin_limit_and_high_quantiles():
+    values = _values(5, 10_000)
+    bounded = DDSketch(max_bins=512)
+    bounded.add_all(values)
+    unbounded = DDSketch()
+    unbounded.add_all(values)
+
+    assert len(unbounded.bins) > 512
+    assert len(bounded.bins) <= 512
+    assert bounded.count == unbounded.count
+    assert sum(bounded.bins.values()) == sum(unbounded.bins.values())
+    # Only the lowest bins are folded together, so the top quantiles are unaffected
+    for q in (0.5, 0.9, 0.99, 1):
+        assert bounded.quantile(q) == unbounded.quantile(q)
+    assert bounded.quantile(0.01) > unbounded.quantile(0.01)
+
+    # Merging keeps the limit as well
+    bounded.merge(unbounded)
+    assert len(bounded.bins) <= 512
+    assert bounded.count == 2 * len(values)
+
+
+def test_bytes_round_trip():
+    sketch = DDSketch(0.02, max_bins=512)
+    sketch.add_all(_values(6, 5_000))
+    sketch.add(0.0, count=7)
+
+    restored = DDSketch.from_bytes(sketch.to_bytes())
+    assert restored.relative_accuracy == sketch.relative_accuracy
+    assert restored.max_bins == sketch.max_bins
+    assert restored.bins == sketch.bins
+    assert restored.zero_count == sketch.zero_count
+    assert restored.count == sketch.count
+    assert restored.to_bytes() == sketch.to_bytes()
+
+    empty = DDSketch.from_bytes(DDSketch().to_bytes())
+    assert empty.count == 0 and empty.bins == {}
+
+
+def test_from_bytes_rejects_unknown_versions():
+    data = bytearray(DDSketch().to_bytes())
+    data[0] = 99
+    with pytest.raises(ValueError):
+        DDSketch.from_bytes(bytes(data))
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 32, 2 ** 63 + 5])
+def test_varint_round_trip(value):
+    out = bytearray(b"x")
+    _write_varint(out, value)
+    _write_varint(out, 1)
+    decoded, pos = _read_varint(bytes(out), 1)
+    assert decoded == value
+    assert _read_varint(bytes(out), pos) == (1, len(out))
+
+
+@pytest.mark.parametrize("value", [0, 1, -1, 2, -2, 1000, -1000, 2 ** 40, -(2 ** 40)])
+def test_zigzag_round_trip(value):
+    assert _zigzag(value) >= 0
+    assert _unzigzag(_zigzag(value)) == value
+    # Small magnitudes of either sign stay small
+    assert _zigzag(value) <= 2 * abs(value)
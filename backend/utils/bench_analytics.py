@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /sites/analytics chart: the baseline endpoint's history query and
+Python bucketing/interpolation against the ts range query and the vectorised
+analytics module, over the same synthetic site_checks table. Fails if the two
+charts differ by more than rounding.
+
+Usage (from the repository root):
+    python backend/utils/bench_analytics.py [--rows 500000] [--sites 50]
+"""
+import argparse
+import math
+import random
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.analytics import Series, build_chart  # noqa: E402
+
+# Charts may differ by rounding: the baseline rounds after interpolating and
+# holds unrounded values at the ends, and the sums are accumulated differently
+TOLERANCE_MS = 0.02
+
+
+def baseline_query(db, site_ids, start_time, end_time):
+    """The history query of the baseline get_sites_analytics."""
+    placeholders = ','.join(['?' for _ in site_ids])
+    return db.execute("""
+        SELECT
+            site_id,
+            response_time,
+            status,
+            checked_at,
+            datetime(checked_at) as timestamp
+        FROM site_checks
+        WHERE site_id IN ({})
+          AND datetime(checked_at) >= datetime(?)
+          AND datetime(checked_at) <= datetime(?)
+          AND response_time IS NOT NULL
+        ORDER BY checked_at ASC
+    """.format(placeholders), site_ids + [start_time.isoformat(), end_time.isoformat()]).fetchall()
+
+
+def baseline_chart(checks, selected_site_ids, start_time, end_time, interval_seconds):
+    """The bucketing, interpolation and averaging of the baseline get_sites_analytics, unchanged."""
+    time_buckets = defaultdict(lambda: defaultdict(list))
+
+    for check in checks:
+        timestamp_str = check['timestamp']
+        try:
+            check_time = datetime.fromisoformat(timestamp_str)
+            if check_time.tzinfo is None:
+                check_time = check_time.replace(tzinfo=timezone.utc)
+        except ValueError:
+            check_time = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+        bucket_timestamp = start_time + timedelta(
+            seconds=math.floor((check_time - start_time).total_seconds() / interval_seconds) * interval_seconds
+        )
+        bucket_key = bucket_timestamp.isoformat()
+
+        if check['response_time'] is not None and check['status'] == 'up':
+            time_buckets[bucket_key][check['site_id']].append(check['response_time'])
+
+    chart_data = []
+    current_time = start_time
+
+    actual_data_points = {}
+    while current_time <= end_time:
+        bucket_key = current_time.isoformat()
+        data_point = {
+            "timestamp": current_time.strftime("%H:%M"),
+            "full_timestamp": current_time.isoformat()
+        }
+
+        has_data = False
+        for site_id in selected_site_ids:
+            response_times = time_buckets.get(bucket_key, {}).get(site_id, [])
+
+            if response_times:
+                avg_response_time = sum(response_times) / len(response_times)
+                data_point[f"site_{site_id}"] = round(avg_response_time * 1000, 2)
+                has_data = True
+                if site_id not in actual_data_points:
+                    actual_data_points[site_id] = []
+                actual_data_points[site_id].append((current_time, avg_response_time * 1000))
+
+        if has_data:
+            chart_data.append(data_point)
+
+        current_time += timedelta(seconds=interval_seconds)
+
+    if interval_seconds <= 5:
+        interpolated_data = []
+        current_time = start_time
+
+        while current_time <= end_time:
+            data_point = {
+                "timestamp": current_time.strftime("%H:%M:%S") if interval_seconds <= 60 else current_time.strftime("%H:%M"),
+                "full_timestamp": current_time.isoformat()
+            }
+
+            for site_id in selected_site_ids:
+                if site_id in actual_data_points and len(actual_data_points[site_id]) >= 2:
+                    site_points = actual_data_points[site_id]
+
+                    before = None
+                    after = None
+                    for i, (point_time, value) in enumerate(site_points):
+                        if point_time <= current_time:
+                            before = (point_time, value)
+                        if point_time >= current_time and after is None:
+                            after = (point_time, value)
+                            break
+
+                    if before and after and before[0] != after[0]:
+                        time_diff = (after[0] - before[0]).total_seconds()
+                        current_diff = (current_time - before[0]).total_seconds()
+                        ratio = current_diff / time_diff
+                        interpolated_value = before[1] + (after[1] - before[1]) * ratio
+                        data_point[f"site_{site_id}"] = round(interpolated_value, 2)
+                    elif before:
+                        data_point[f"site_{site_id}"] = before[1]
+                    elif after:
+                        data_point[f"site_{site_id}"] = after[1]
+
+            interpolated_data.append(data_point)
+            current_time += timedelta(seconds=1)
+
+        chart_data = interpolated_data[:300]
+
+    if len(selected_site_ids) >= 1:
+        for point in chart_data:
+            site_values = [point.get(f"site_{site_id}") for site_id in selected_site_ids
+                          if point.get(f"site_{site_id}") is not None]
+            if site_values:
+                point["average"] = round(sum(site_values) / len(site_values), 2)
+            else:
+                point["average"] = None
+    return chart_data
+
+
+def vectorised_query(db, site_ids, start_time, end_time):
+    """The raw-check history query of the vectorised endpoint (integer ts range, up checks only)."""
+    placeholders = ','.join('?' for _ in site_ids)
+    return db.execute(f"""
+        SELECT site_id, ts, response_time
+        FROM site_checks
+        WHERE site_id IN ({placeholders}) AND ts >= ? AND ts <= ?
+          AND status = 'up' AND response_time IS NOT NULL
+    """, site_ids + [int(start_time.timestamp() * 1000), int(end_time.timestamp() * 1000)]).fetchall()
+
+
+def synthetic_db(count, site_ids, start_time, end_time):
+    """An on-disk-like site_checks table with both timestamp columns and the ts index."""
+    random.seed(42)
+    start = int(start_time.timestamp())
+    span = int((end_time - start_time).total_seconds())
+    db = sqlite3.connect(":memory:")
+    db.execute("""
+        CREATE TABLE site_checks (
+            id INTEGER PRIMARY KEY, site_id INTEGER, status TEXT, response_time REAL,
+            checked_at TIMESTAMP, ts INTEGER
+        )
+    """)
+    rows = []
+    for _ in range(count):
+        moment = start + random.randrange(span)
+        status = 'up' if random.random() < 0.95 else 'down'
+        rows.append((
+            random.choice(site_ids), status, random.lognormvariate(-2, 0.5),
+            datetime.fromtimestamp(moment, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'), moment * 1000,
+        ))
+    db.executemany("INSERT INTO site_checks (site_id, status, response_time, checked_at, ts) VALUES (?, ?, ?, ?, ?)", rows)
+    db.execute("CREATE INDEX idx_site_checks_site_ts ON site_checks (site_id, ts)")
+    db.row_factory = sqlite3.Row
+    return db
+
+
+def compare(baseline, vectorised):
+    """Asserts both charts have the same points and per-site values within TOLERANCE_MS."""
+    assert [p["full_timestamp"] for p in baseline] == [p["full_timestamp"] for p in vectorised], \
+        "charts have different points"
+    worst = 0.0
+    for old, new in zip(baseline, vectorised):
+        assert old.keys() == new.keys(), f"different series at {old['full_timestamp']}"
+        for key, value in old.items():
+            if key in ("timestamp", "full_timestamp") or value is None or new[key] is None:
+                assert value == new[key], f"{key} at {old['full_timestamp']}: {value} != {new[key]}"
+                continue
+            difference = abs(value - new[key])
+            assert difference <= TOLERANCE_MS, f"{key} at {old['full_timestamp']}: {value} != {new[key]}"
+            worst = max(worst, difference)
+    return worst
+
+
+def run(name, db, site_ids, start_time, end_time, interval_seconds):
+    started = time.perf_counter()
+    rows = baseline_query(db, site_ids, start_time, end_time)
+    baseline_query_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    baseline = baseline_chart(rows, site_ids, start_time, end_time, interval_seconds)
+    baseline_chart_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows = vectorised_query(db, site_ids, start_time, end_time)
+    vectorised_query_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    vectorised = build_chart(Series.from_checks(rows), site_ids, start_time, end_time, interval_seconds)
+    vectorised_chart_seconds = time.perf_counter() - started
+
+    worst = compare(baseline, vectorised)
+    baseline_seconds = baseline_query_seconds + baseline_chart_seconds
+    vectorised_seconds = vectorised_query_seconds + vectorised_chart_seconds
+    print(f"{name}: {len(rows):,} up checks, {len(site_ids)} sites, {interval_seconds}s interval -> {len(vectorised)} points")
+    print(f"  baseline    query {baseline_query_seconds:7.3f}s  chart {baseline_chart_seconds:7.3f}s  total {baseline_seconds:7.3f}s")
+    print(f"  vectorised  query {vectorised_query_seconds:7.3f}s  chart {vectorised_chart_seconds:7.3f}s  total {vectorised_seconds:7.3f}s"
+          f"  ({baseline_seconds / vectorised_seconds:.1f}x faster)")
+    print(f"  values match (largest difference {worst:.3f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--sites", type=int, default=50)
+    args = parser.parse_args()
+
+    site_ids = list(range(1, args.sites + 1))
+    # Whole seconds, so both paths bucket from exactly the same start
+    end_time = datetime.now(timezone.utc).replace(microsecond=0)
+
+    start_time = end_time - timedelta(hours=24)
+    run("24h window", synthetic_db(args.rows, site_ids, start_time, end_time), site_ids, start_time, end_time, 60)
+
+    start_time = end_time - timedelta(minutes=4)
+    run("4m window (interpolated)", synthetic_db(args.rows, site_ids, start_time, end_time),
+        site_ids, start_time, end_time, 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { getSitesStatus, getMonitorStats, createSite, deleteSite, triggerManualCheck } from '@/lib/api';
-import { type SiteStatus, type MonitorStats, type CreateSiteRequest } from '@/lib/api';
+import { getSitesStatus, getMonitorStats, createSite, deleteSite, triggerManualCheck, waitForCheckJob, subscribeToEvents } from '@/lib/api';
+import { type SiteStatus, type MonitorStats, type CreateSiteRequest, type LiveUpdate } from '@/lib/api';
 import { AddSiteDialog } from '@/components/AddSiteDialog';
 import { DeleteSitesDialog } from '@/components/DeleteSitesDialog';
 import { MetricsCards } from '@/components/dashboard/metrics-cards';
@@ -23,10 +23,11 @@ export default function Home() {
   const [isChecking, setIsChecking] = useState(false);
   const [showAddDialog, setShowAddDialog] = useState(false);
   const [showDeleteDialog, setShowDeleteDialog] = useState(false);
-  const [autoRefreshInterval, setAutoRefreshInterval] = useState('30');
+  const [autoRefreshInterval, setAutoRefreshInterval] = useState('live');
   const { isAuthenticated } = useAuth();
 
   const AUTO_REFRESH_OPTIONS = [
+    { value: 'live', label: 'Live' },
     { value: 'off', label: 'Off' },
     { value: '1', label: '1s' },
     { value: '5', label: '5s' },
@@ -55,6 +56,24 @@ export default function Home() {
     }
   };
 
+  const applyLiveUpdate = (update: LiveUpdate) => {
+    if (update.resync) {
+      fetchData();
+      return;
+    }
+    if (update.checks.length > 0) {
+      const checks = new Map(update.checks.map(check => [check.id, check]));
+      setSites(prev => prev.map(site => {
+        const check = checks.get(site.id);
+        return check ? { ...site, ...check } : site;
+      }));
+    }
+    if (update.stats) {
+      const liveStats = update.stats;
+      setStats(prev => prev ? { ...prev, ...liveStats } : prev);
+    }
+  };
+
   const handleAddSite = async (siteData: CreateSiteRequest) => {
     try {
       await createSite(siteData);
@@ -73,10 +92,11 @@ export default function Home() {
     }
   };
 
-  const handleManualCheck = async () => {
+  const handleManualCheck = async (siteIds?: number[]) => {
     setIsChecking(true);
     try {
-      await triggerManualCheck();
+      const job = await triggerManualCheck(siteIds);
+      await waitForCheckJob(job.id);
       await fetchData();
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to trigger manual check');
@@ -86,9 +106,7 @@ export default function Home() {
   };
 
   const handleCheckSite = async (id: number) => {
-    // For now, trigger a full manual check
-    // In a real app, you might want to check just this site
-    await handleManualCheck();
+    await handleManualCheck([id]);
   };
 
   const handleDeleteSelectedSites = async (siteIds: number[]) => {
@@ -110,6 +128,18 @@ export default function Home() {
     if (autoRefreshInterval === 'off') {
       return; // No auto-refresh
     }
+
+    if (autoRefreshInterval === 'live') {
+      // Pushed updates; reload once the stream (re)connects in case any were missed
+      let connected = false;
+      return subscribeToEvents(
+        applyLiveUpdate,
+        () => {
+          if (connected) fetchData();
+          connected = true;
+        }
+      );
+    }
     
     const intervalMs = parseInt(autoRefreshInterval) * 1000;
     const interval = setInterval(fetchData, intervalMs);
@@ -159,7 +189,7 @@ export default function Home() {
               <span>Delete Sites</span>
             </Button>
             <Button
-              onClick={handleManualCheck}
+              onClick={() => handleManualCheck()}
               variant="outline"
               size="sm"
               disabled={isChecking || !isAuthenticated}
@@ -23,6 +23,13 @@ export function MetricsCards({ stats, sites }: MetricsCardsProps) {
     ? Math.round(stats.average_response_time * 1000)
     : 0;
 
+  const p95Ms = stats.response_time_percentiles?.p95 != null
+    ? Math.round(stats.response_time_percentiles.p95 * 1000)
+    : null;
+  const p99Ms = stats.response_time_percentiles?.p99 != null
+    ? Math.round(stats.response_time_percentiles.p99 * 1000)
+    : null;
+
   // Calculate change indicators (you could enhance this with historical data)
   const uptimeChange = parseFloat(uptimePercentage) >= 95 ? "up" : "down";
   const responseChange = avgResponseTimeMs <= 500 ? "up" : "down";
@@ -130,6 +137,11 @@ export function MetricsCards({ stats, sites }: MetricsCardsProps) {
             {avgResponseTimeMs <= 200 ? "Excellent response" :
              avgResponseTimeMs <= 500 ? "Good response" : "Slow response"}
           </p>
+          {p95Ms !== null && p99Ms !== null && (
+            <p className="text-xs text-muted-foreground">
+              p95 {p95Ms}ms · p99 {p99Ms}ms (last hour)
+            </p>
+          )}
         </CardContent>
       </Card>
     </div>
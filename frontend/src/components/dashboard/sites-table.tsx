@@ -188,6 +188,11 @@ export function SitesTable({ sites, onDeleteSite, onCheckSite, isChecking }: Sit
               {site.http_version && (
                 <div><span className="text-muted-foreground">HTTP:</span> {site.http_version}</div>
               )}
+              {site.certificate_days_remaining != null && (
+                <div className={cn(site.certificate_valid === false || site.certificate_expiring ? "text-orange-600" : undefined)}>
+                  <span className="text-muted-foreground">Cert:</span> {site.certificate_valid === false ? "untrusted, " : ""}expires in {Math.floor(site.certificate_days_remaining)}d
+                </div>
+              )}
               {site.fallback_used && (
                 <div className="text-orange-600 text-xs mt-1">⚠️ Fallback protocol used</div>
               )}
@@ -387,6 +392,11 @@ export function SitesTable({ sites, onDeleteSite, onCheckSite, isChecking }: Sit
                                 {node.http_version && (
                                   <div><span className="text-muted-foreground">Version:</span> {node.http_version}</div>
                                 )}
+                                {node.certificate_days_remaining != null && (
+                                  <div className={cn(node.certificate_valid === false || node.certificate_expiring ? "text-orange-600" : undefined)}>
+                                    <span className="text-muted-foreground">Cert:</span> {node.certificate_valid === false ? "untrusted, " : ""}expires in {Math.floor(node.certificate_days_remaining)}d
+                                  </div>
+                                )}
                               </>
                             ) : (
                               <>
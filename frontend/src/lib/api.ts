@@ -31,7 +31,13 @@ export interface SiteStatus {
   cipher_suite?: string;
   key_strength?: number;
   http_version?: string;
-  connection_status?: 'connected' | 'disconnected' | 'failed' | 'error';
+  certificate_valid?: boolean;
+  certificate_subject?: string;
+  certificate_issuer?: string;
+  certificate_expires_at?: string;
+  certificate_days_remaining?: number;
+  certificate_expiring?: boolean;
+  connection_status?: 'connected' | 'disconnected' | 'failed' | 'error' | 'pending';
   fallback_used?: boolean;
 }
 
@@ -50,6 +56,37 @@ export interface MonitorStats {
   sites_up: number;
   sites_down: number;
   average_response_time?: number;
+  response_time_percentiles?: {
+    count: number;
+    p50?: number | null;
+    p95?: number | null;
+    p99?: number | null;
+  };
+}
+
+export interface LiveCheck {
+  id: number;
+  status?: string;
+  response_time?: number;
+  status_code?: number;
+  error_message?: string;
+  checked_at?: string;
+  total_up: number;
+  total_down: number;
+}
+
+export interface LiveTransition {
+  site_id: number;
+  from: string | null;
+  to: string;
+  at: string;
+}
+
+export interface LiveUpdate {
+  checks: LiveCheck[];
+  transitions: LiveTransition[];
+  stats?: Pick<MonitorStats, 'total_sites' | 'sites_up' | 'sites_down' | 'average_response_time'>;
+  resync?: boolean;
 }
 
 export interface AppConfig {
@@ -142,9 +179,40 @@ export async function getMonitorStats(): Promise<MonitorStats> {
   return response.json();
 }
 
-export async function triggerManualCheck(): Promise<{ message: string; results: any[] }> {
+// Subscribes to the server-sent event stream; returns a function that closes it.
+// onOpen also fires after the browser reconnects, when updates may have been missed.
+export function subscribeToEvents(
+  onUpdate: (update: LiveUpdate) => void,
+  onOpen?: () => void,
+  siteIds?: number[]
+): () => void {
+  const params = siteIds ? `?site_ids=${siteIds.join(',')}` : '';
+  const source = new EventSource(`${API_BASE}/events${params}`);
+  source.addEventListener('update', (event) => {
+    onUpdate(JSON.parse((event as MessageEvent).data));
+  });
+  if (onOpen) source.onopen = onOpen;
+  return () => source.close();
+}
+
+export interface CheckJob {
+  id: string;
+  status: 'running' | 'completed';
+  total: number;
+  completed: number;
+  down: number;
+  deduplicated: number;
+  missing_site_ids: number[];
+  created_at: string;
+  finished_at: string | null;
+  results?: ({ site_id: number } & Partial<SiteCheck>)[];
+}
+
+export async function triggerManualCheck(siteIds?: number[]): Promise<CheckJob> {
   const response = await fetch(`${API_BASE}/check/manual`, {
     method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ site_ids: siteIds ?? null }),
   });
   if (!response.ok) {
     const error = await response.json();
@@ -153,6 +221,37 @@ export async function triggerManualCheck(): Promise<{ message: string; results:
   return response.json();
 }
 
+export async function getCheckJob(jobId: string): Promise<CheckJob> {
+  const response = await fetch(`${API_BASE}/check/jobs/${jobId}`);
+  if (!response.ok) throw new Error('Failed to fetch check job');
+  return response.json();
+}
+
+// Resolves with the job summary once every site was checked: follows the
+// job's event stream, falling back to polling if the stream fails.
+export function waitForCheckJob(jobId: string, pollIntervalMs: number = 1000): Promise<CheckJob> {
+  return new Promise((resolve, reject) => {
+    const poll = async () => {
+      try {
+        const job = await getCheckJob(jobId);
+        if (job.status === 'running') setTimeout(poll, pollIntervalMs);
+        else resolve(job);
+      } catch (err) {
+        reject(err);
+      }
+    };
+    const source = new EventSource(`${API_BASE}/check/jobs/${jobId}/events`);
+    source.addEventListener('done', (event) => {
+      source.close();
+      resolve(JSON.parse((event as MessageEvent).data));
+    });
+    source.onerror = () => {
+      source.close();
+      poll();
+    };
+  });
+}
+
 export async function getAppConfig(): Promise<AppConfig> {
   const response = await fetch(`${API_BASE}/config`);
   if (!response.ok) throw new Error('Failed to fetch app configuration');